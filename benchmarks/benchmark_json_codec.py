@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares parsing and dumping a large synthetic Ceph report with the stdlib JSON
+module and the rookify JSON codec.
+
+Usage: python benchmarks/benchmark_json_codec.py [OSD count] [rounds]
+"""
+
+import json
+import sys
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from rookify import json_codec
+
+
+def get_synthetic_report(osd_count: int) -> Dict[str, Any]:
+    hosts_count = max(1, osd_count // 16)
+
+    return {
+        "fsid": "00000000-0000-0000-0000-000000000000",
+        "health": {"status": "HEALTH_OK", "checks": {}},
+        "osdmap": {
+            "epoch": osd_count,
+            "osds": [
+                {
+                    "osd": osd_id,
+                    "uuid": "{0:032x}".format(osd_id),
+                    "up": 1,
+                    "in": 1,
+                    "weight": 1.0,
+                    "primary_affinity": 1.0,
+                    "last_clean_begin": 0,
+                    "last_clean_end": 0,
+                    "up_from": osd_id,
+                    "up_thru": osd_id,
+                    "public_addrs": {
+                        "addrvec": [
+                            {
+                                "type": "v2",
+                                "addr": "10.0.{0:d}.{1:d}:6800".format(
+                                    osd_id // 250, osd_id % 250
+                                ),
+                                "nonce": osd_id,
+                            }
+                        ]
+                    },
+                    "state": ["exists", "up"],
+                }
+                for osd_id in range(osd_count)
+            ],
+        },
+        "osd_metadata": [
+            {
+                "id": osd_id,
+                "hostname": "node-{0:d}".format(osd_id % hosts_count),
+                "devices": "sd{0}".format(chr(97 + osd_id % 26)),
+                "bluestore_bdev_dev_node": "/dev/ceph-{0:d}/osd-block-{0:d}".format(
+                    osd_id
+                ),
+                "ceph_version": "ceph version 18.2.1 reef (stable)",
+                "kernel_version": "6.1.0",
+                "mem_total_kb": "263862792",
+            }
+            for osd_id in range(osd_count)
+        ],
+        "pgmap": {
+            "pg_stats": [
+                {
+                    "pgid": "1.{0:x}".format(pg_id),
+                    "state": "active+clean",
+                    "up": [pg_id % osd_count, (pg_id + 1) % osd_count],
+                    "acting": [pg_id % osd_count, (pg_id + 1) % osd_count],
+                    "stat_sum": {"num_bytes": pg_id * 4096, "num_objects": pg_id},
+                }
+                for pg_id in range(osd_count * 100)
+            ]
+        },
+    }
+
+
+def measure(rounds: int, func: Callable[[], Any]) -> float:
+    started_at = perf_counter()
+
+    for _ in range(rounds):
+        func()
+
+    return (perf_counter() - started_at) / rounds
+
+
+def main() -> None:
+    osd_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    report = get_synthetic_report(osd_count)
+    report_data = json.dumps(report).encode("utf-8")
+
+    print(
+        "Synthetic report of {0:d} OSDs: {1:.1f} MiB, codec backend: {2}".format(
+            osd_count, len(report_data) / 1048576, json_codec.get_backend_name()
+        )
+    )
+
+    results = {
+        "parse": (
+            measure(rounds, lambda: json.loads(report_data)),
+            measure(rounds, lambda: json_codec.loads(report_data)),
+        ),
+        "readable dump": (
+            measure(
+                rounds,
+                lambda: json.dumps(report, default=repr, sort_keys=True, indent="\t"),
+            ),
+            measure(rounds, lambda: json_codec.dumps(report, readable=True)),
+        ),
+    }
+
+    for name, (stdlib_duration, codec_duration) in results.items():
+        print(
+            "{0:<14} stdlib: {1:8.1f} ms, codec: {2:8.1f} ms, speedup: {3:5.1f}x".format(
+                name,
+                stdlib_duration * 1000,
+                codec_duration * 1000,
+                stdlib_duration / codec_duration,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
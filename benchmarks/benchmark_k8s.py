@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+Runs the rookify Kubernetes client against a local fake Kubernetes API server
+populated with many nodes and Rook custom resources.
+
+Usage: python benchmarks/benchmark_k8s.py [node count] [CR count] [latency ms]
+"""
+
+import os
+import sys
+import tempfile
+from time import perf_counter
+from typing import Any, Callable, Dict, Tuple
+
+# The fake Kubernetes API server is part of the test suite
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rookify.modules.k8s import K8s  # noqa: E402
+from tests.mock_k8s_server import (  # noqa: E402
+    MockK8sServer,
+    get_deployment_manifest,
+    get_node_manifest,
+    get_pod_manifest,
+)
+
+NAMESPACE = "rook-ceph"
+
+
+def get_pool_manifest(index: int) -> Dict[str, Any]:
+    return {
+        "apiVersion": "ceph.rook.io/v1",
+        "kind": "CephBlockPool",
+        "metadata": {"name": "pool-{0:d}".format(index), "namespace": NAMESPACE},
+        "spec": {"failureDomain": "host", "replicated": {"size": 3}},
+    }
+
+
+def populate(k8s_server: MockK8sServer, node_count: int, cr_count: int) -> None:
+    k8s_server.create_objects(
+        "v1",
+        "nodes",
+        [get_node_manifest("node-{0:d}".format(index)) for index in range(node_count)],
+    )
+
+    k8s_server.create_objects(
+        "apps/v1",
+        "deployments",
+        [
+            get_deployment_manifest(
+                "rook-ceph-osd-{0:d}".format(index), NAMESPACE, "rook-ceph-osd"
+            )
+            for index in range(node_count)
+        ],
+    )
+
+    k8s_server.create_objects(
+        "v1",
+        "pods",
+        [
+            get_pod_manifest(
+                "rook-ceph-osd-{0:d}".format(index),
+                NAMESPACE,
+                "rook-ceph-osd",
+                "node-{0:d}".format(index),
+            )
+            for index in range(node_count)
+        ],
+    )
+
+    # Half of the CRs exist already and are updated when applied
+    k8s_server.create_objects(
+        "ceph.rook.io/v1",
+        "cephblockpools",
+        [get_pool_manifest(index) for index in range(cr_count // 2)],
+    )
+
+
+def measure(
+    k8s_server: MockK8sServer, func: Callable[[], Any]
+) -> Tuple[float, Dict[str, int]]:
+    request_counts = k8s_server.request_counts
+    started_at = perf_counter()
+
+    func()
+
+    duration = perf_counter() - started_at
+
+    return duration, {
+        verb: count - request_counts.get(verb, 0)
+        for verb, count in k8s_server.request_counts.items()
+        if count != request_counts.get(verb, 0)
+    }
+
+
+def measure_watch_latency(k8s: K8s, k8s_server: MockK8sServer, rounds: int) -> float:
+    nodes_informer = k8s.nodes_informer
+    duration = 0.0
+
+    for index in range(rounds):
+        value = "round-{0:d}".format(index)
+        started_at = perf_counter()
+
+        k8s_server.patch_object(
+            "v1", "nodes", "node-0", {"metadata": {"labels": {"benchmark": value}}}
+        )
+
+        nodes_informer.wait_for(
+            lambda informer: (
+                (informer.get("node-0").metadata.labels or {}).get("benchmark") == value
+            ),
+            10,
+        )
+
+        duration += perf_counter() - started_at
+
+    return duration / rounds
+
+
+def main() -> None:
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cr_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.001
+
+    k8s_server = MockK8sServer(latency=latency)
+    populate(k8s_server, node_count, cr_count)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        kubeconfig = os.path.join(temp_dir, "kubeconfig")
+        k8s_server.write_kubeconfig(kubeconfig)
+
+        # Client side rate limiting would dominate all results
+        k8s = K8s(
+            {
+                "kubernetes": {
+                    "config": kubeconfig,
+                    "discovery_cache_file": os.path.join(temp_dir, "discovery.json"),
+                    "qps": 0,
+                },
+                "rook": {"cluster": {"name": "rook-ceph", "namespace": NAMESPACE}},
+            }
+        )
+
+        print(
+            "Fake Kubernetes API with {0:d} nodes and {1:d} CRs, latency: {2:.1f} ms".format(
+                node_count, cr_count, latency * 1000
+            )
+        )
+
+        results = {
+            "node informer": measure(k8s_server, lambda: k8s.nodes_informer),
+            "label check": measure(
+                k8s_server,
+                lambda: k8s.check_nodes_for_initial_label_state("benchmark"),
+            ),
+            "label nodes": measure(
+                k8s_server,
+                lambda: k8s.label_nodes(
+                    ["node-{0:d}".format(index) for index in range(node_count)],
+                    "benchmark-placement",
+                ),
+            ),
+            "100 daemon checks": measure(
+                k8s_server,
+                lambda: [
+                    k8s.check_rook_daemon("rook-ceph-osd", "node-{0:d}".format(index))
+                    for index in range(min(100, node_count))
+                ],
+            ),
+            "apply CRs": measure(
+                k8s_server,
+                lambda: list(
+                    k8s.crd_api_apply_many(
+                        {
+                            "pool-{0:d}".format(index): get_pool_manifest(index)
+                            for index in range(cr_count)
+                        }
+                    )
+                ),
+            ),
+        }
+
+        for name, (duration, request_counts) in results.items():
+            print(
+                "{0:<17} {1:10.1f} ms, requests: {2}".format(
+                    name,
+                    duration * 1000,
+                    ", ".join(
+                        "{0} {1:d}".format(verb, count)
+                        for verb, count in sorted(request_counts.items())
+                    )
+                    or "none",
+                )
+            )
+
+        print(
+            "{0:<17} {1:10.1f} ms".format(
+                "watch latency", measure_watch_latency(k8s, k8s_server, 20) * 1000
+            )
+        )
+
+        k8s.stop_informers()
+
+    k8s_server.close()
+
+
+if __name__ == "__main__":
+    main()
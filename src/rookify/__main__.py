@@ -68,7 +68,15 @@ def main() -> None:
     # Get Logger
     log = get_logger()
 
-    machine = Machine(config["general"].get("machine_pickle_file"))
+    machine = Machine(
+        config["general"].get("machine_pickle_file"),
+        state_timeout=config["general"].get("state_timeout"),
+        parallelism=config["general"].get("parallelism", 1),
+        preflight_parallelism=config["general"].get("preflight_parallelism"),
+        snapshot_compression=config["general"].get(
+            "machine_snapshot_compression", True
+        ),
+    )
 
     load_modules(machine, config)
 
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import json
+from types import ModuleType
+from typing import Any, Optional, Union
+
+orjson: Optional[ModuleType]
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson only supports an indentation of two spaces
+_READABLE_INDENT = 2
+
+
+def get_backend_name() -> str:
+    return "stdlib" if orjson is None else "orjson"
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserializes JSON with orjson if installed and the stdlib otherwise.
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects data the stdlib accepts, e.g. NaN or huge integers
+            pass
+
+    return json.loads(data)
+
+
+def _get_data_with_str_keys(data: Any) -> Any:
+    """
+    Converts all dictionary keys to strings like "orjson.OPT_NON_STR_KEYS" does
+    as sorting fails for keys of mixed types.
+    """
+
+    if isinstance(data, dict):
+        return {
+            _get_str_key(key): _get_data_with_str_keys(value)
+            for key, value in data.items()
+        }
+
+    if isinstance(data, (list, tuple)):
+        return [_get_data_with_str_keys(value) for value in data]
+
+    return data
+
+
+def _get_str_key(key: Any) -> str:
+    if key is None or isinstance(key, bool):
+        return str(json.dumps(key))
+
+    return str(key)
+
+
+def dumps(data: Any, readable: bool = False) -> str:
+    """
+    Serializes data to JSON with orjson if installed and the stdlib otherwise.
+
+    :param data: Data to serialize
+    :param readable: Sort keys, indent and represent unsupported types
+    :return: returns the JSON string
+    """
+
+    if orjson is not None:
+        options = 0
+
+        if readable:
+            options = (
+                orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+            )
+
+        try:
+            return str(
+                orjson.dumps(
+                    data, default=(repr if readable else None), option=options
+                ),
+                "utf-8",
+            )
+        except orjson.JSONEncodeError:
+            # orjson rejects data the stdlib accepts, e.g. huge integers
+            pass
+
+    if readable:
+        return json.dumps(
+            _get_data_with_str_keys(data),
+            default=repr,
+            sort_keys=True,
+            indent=_READABLE_INDENT,
+        )
+
+    return json.dumps(data)
@@ -44,13 +44,8 @@ def _load_module(
 
     global _modules_loaded
 
-    if "." in module_name:
-        absolute_module_name = module_name
-    else:
-        absolute_module_name = "rookify.modules.{0}".format(module_name)
-
     try:
-        module = importlib.import_module(absolute_module_name)
+        module = importlib.import_module(_get_absolute_module_name(module_name))
     except ModuleNotFoundError as e:
         raise ModuleLoadException(module_name, str(e))
 
@@ -73,6 +68,23 @@ def _load_module(
 
     module.ModuleHandler.register_states(machine, config)
 
+    machine.add_state_requirements(
+        module.ModuleHandler.get_state_name(),
+        [
+            importlib.import_module(
+                _get_absolute_module_name(additional_module_name)
+            ).ModuleHandler.get_state_name()
+            for additional_module_name in additional_module_names
+        ],
+    )
+
+
+def _get_absolute_module_name(module_name: str) -> str:
+    if "." in module_name:
+        return module_name
+
+    return "rookify.modules.{0}".format(module_name)
+
 
 def load_modules(machine: Machine, config: Dict[str, Any]) -> None:
     """
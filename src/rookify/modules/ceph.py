@@ -2,12 +2,48 @@
 
 import json
 import rados
-from typing import Any, Dict
+from copy import deepcopy
+from threading import Condition, Event, RLock, Thread, current_thread
+from time import monotonic
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .. import json_codec
+from ..logger import get_logger
 from .exception import ModuleException
 
 
 class Ceph:
+    # Read-only mon command prefixes allowed to be configured for caching
+    CACHEABLE_MON_COMMANDS = (
+        "fs ls",
+        "mon stat",
+        "node ls",
+        "osd dump",
+        "osd info",
+        "report",
+        "status",
+    )
+
+    # Sections of the Ceph status identifying changes of the cluster maps
+    MAPS = ("fsmap", "mgrmap", "monmap", "osdmap", "quorum", "servicemap")
+    MAP_EPOCHS_POLL_INTERVAL = 2.0
+
+    _sessions: Dict[Tuple[str, str], "Ceph"] = {}
+    _sessions_lock = RLock()
+
     def __init__(self, config: Dict[str, Any]):
+        self._command_cache: Dict[str, Tuple[float, Any]] = {}
+        self._command_cache_lock = RLock()
+        self._command_cache_statistics: Dict[str, Dict[str, int]] = {}
+        self._command_cache_ttls: Dict[str, float] = config.get(
+            "command_cache_ttls", {}
+        )
+
+        for command in self._command_cache_ttls:
+            if command not in self.__class__.CACHEABLE_MON_COMMANDS:
+                raise ModuleException(
+                    "Ceph command '{0}' is not supported to be cached".format(command)
+                )
+
         try:
             self.__ceph = rados.Rados(
                 conffile=config["config"], conf={"keyring": config["keyring"]}
@@ -16,10 +52,20 @@ class Ceph:
         except rados.ObjectNotFound as err:
             raise ModuleException(f"Could not connect to ceph: {err}")
 
-        status_data = self.mon_command("status")
+        self._map_epochs: Dict[str, Any] = {}
+        self._map_epochs_condition = Condition()
+        self._map_epochs_poll_interval: float = config.get(
+            "map_epochs_poll_interval", self.__class__.MAP_EPOCHS_POLL_INTERVAL
+        )
+        self._map_epochs_stop_event = Event()
+        self._map_epochs_thread: Optional[Thread] = None
+        self._map_epochs_waited = False
+        self._map_epochs_waiters = 0
+
+        self._status: Dict[str, Any] = self.mon_command("status")
 
         self._flags: Dict[str, bool] = config.get("flags", {})
-        self._fsid = status_data["fsid"]
+        self._fsid = self._status["fsid"]
 
         self._systemd_file_name_templates = config.get(
             "systemd_file_name_templates", {}
@@ -28,6 +74,52 @@ class Ceph:
     def __getattr__(self, name: str) -> Any:
         return getattr(self.__ceph, name)
 
+    @property
+    def fsid(self) -> str:
+        return str(self._fsid)
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the Ceph status queried while connecting.
+        """
+
+        return self._status
+
+    @classmethod
+    def get_session(cls, config: Dict[str, Any]) -> "Ceph":
+        """
+        Returns the process-wide shared session for the Ceph cluster configured.
+        The underlying librados handle is thread-safe and shared by all callers.
+        """
+
+        session_key = (config["config"], config["keyring"])
+
+        with cls._sessions_lock:
+            if session_key not in cls._sessions:
+                cls._sessions[session_key] = cls(config)
+
+            return cls._sessions[session_key]
+
+    @classmethod
+    def close_sessions(cls) -> None:
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                for (
+                    command,
+                    statistics,
+                ) in session.get_command_cache_statistics().items():
+                    get_logger().debug(
+                        "Ceph command cache statistics for '{0}': {1:d} hits, {2:d} misses".format(
+                            command, statistics["hits"], statistics["misses"]
+                        )
+                    )
+
+                session.stop_map_epochs_watcher()
+                session.shutdown()
+
+            cls._sessions.clear()
+
     def _json_command(self, handler: Any, *args: Any) -> Any:
         result = handler(*args)
         if result[0] != 0:
@@ -36,11 +128,143 @@ class Ceph:
         data = {}
 
         if len(result) > 0 and result[1] != b"":
-            data = json.loads(result[1])
+            data = json_codec.loads(result[1])
             assert isinstance(data, dict) or isinstance(data, list)
 
         return data
 
+    def _get_map_epochs_of_status(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        map_epochs = {}
+
+        for map_name in self.__class__.MAPS:
+            map_data = status.get(map_name)
+
+            # Not all maps expose an epoch in the Ceph status
+            if isinstance(map_data, dict) and "epoch" in map_data:
+                map_epochs[map_name] = map_data["epoch"]
+            else:
+                map_epochs[map_name] = json.dumps(map_data, sort_keys=True)
+
+        return map_epochs
+
+    def _update_map_epochs(self) -> None:
+        # Queried directly to not invalidate the command cache
+        status = self._json_command(
+            self.__ceph.mon_command,
+            json.dumps({"prefix": "status", "format": "json"}),
+            b"",
+        )
+
+        map_epochs = self._get_map_epochs_of_status(status)
+
+        with self._map_epochs_condition:
+            if map_epochs != self._map_epochs:
+                get_logger().debug("Ceph map epochs changed: {0!r}".format(map_epochs))
+
+                self._map_epochs = map_epochs
+                self._map_epochs_condition.notify_all()
+
+    def _watch_map_epochs(self) -> None:
+        while not self._map_epochs_stop_event.wait(self._map_epochs_poll_interval):
+            with self._map_epochs_condition:
+                # Stop polling once no caller waited for a whole poll interval
+                if self._map_epochs_waiters < 1 and not self._map_epochs_waited:
+                    if self._map_epochs_thread is current_thread():
+                        self._map_epochs_thread = None
+
+                    return
+
+                self._map_epochs_waited = False
+
+            try:
+                self._update_map_epochs()
+            except Exception as exc:
+                get_logger().warn("Failed to query Ceph map epochs: {0!s}".format(exc))
+
+    def start_map_epochs_watcher(self) -> None:
+        """
+        Starts watching the Ceph map epochs in the background. All waiting
+        callers share a single status query per poll interval. The watcher
+        stops again after a poll interval without any waiting caller.
+        """
+
+        with self._map_epochs_condition:
+            if self._map_epochs_thread is not None:
+                return
+
+            self._update_map_epochs()
+
+            self._map_epochs_stop_event.clear()
+
+            self._map_epochs_thread = Thread(
+                target=self._watch_map_epochs,
+                name="rookify-ceph-map-epochs",
+                daemon=True,
+            )
+
+            self._map_epochs_thread.start()
+
+    def stop_map_epochs_watcher(self) -> None:
+        with self._map_epochs_condition:
+            thread = self._map_epochs_thread
+            self._map_epochs_thread = None
+
+        if thread is not None:
+            self._map_epochs_stop_event.set()
+            thread.join()
+
+    def get_map_epochs(self) -> Dict[str, Any]:
+        """
+        Returns the latest epochs of the Ceph maps watched.
+        """
+
+        with self._map_epochs_condition:
+            if self._map_epochs_thread is None:
+                self._update_map_epochs()
+
+            return self._map_epochs.copy()
+
+    def wait_for_map_change(
+        self,
+        maps: Iterable[str],
+        map_epochs: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Blocks until one of the Ceph maps given changed compared to the epochs
+        given or the timeout expired.
+
+        :param maps: Names of the Ceph maps to watch
+        :param map_epochs: Epochs previously returned by "get_map_epochs()"
+        :param timeout: Timeout in seconds
+        :return: returns true if a map changed
+        """
+
+        maps = list(maps)
+
+        for map_name in maps:
+            if map_name not in self.__class__.MAPS:
+                raise ModuleException(
+                    "Ceph map '{0}' is not supported to be watched".format(map_name)
+                )
+
+        with self._map_epochs_condition:
+            self._map_epochs_waited = True
+            self._map_epochs_waiters += 1
+
+            try:
+                self.start_map_epochs_watcher()
+
+                return self._map_epochs_condition.wait_for(
+                    lambda: any(
+                        self._map_epochs.get(map_name) != map_epochs.get(map_name)
+                        for map_name in maps
+                    ),
+                    timeout,
+                )
+            finally:
+                self._map_epochs_waiters -= 1
+
     def get_flag(self, name: str, default_value: bool = False) -> bool:
         return self._flags.get(name, default_value)
 
@@ -101,17 +325,97 @@ class Ceph:
 
         return osd_pools
 
+    def get_command_cache_statistics(self) -> Dict[str, Dict[str, int]]:
+        with self._command_cache_lock:
+            return {
+                command: statistics.copy()
+                for command, statistics in self._command_cache_statistics.items()
+            }
+
+    def invalidate_command_cache(self, command: Optional[str] = None) -> None:
+        """
+        Removes cached results of the given command prefix or of all commands.
+        """
+
+        with self._command_cache_lock:
+            if command is None:
+                self._command_cache.clear()
+                return
+
+            for cache_key in list(self._command_cache.keys()):
+                if json.loads(cache_key)["prefix"] == command:
+                    del self._command_cache[cache_key]
+
+    def get_osds_state(self, osd_ids: Iterable[int]) -> Dict[int, Dict[str, bool]]:
+        """
+        Returns the up and in state of all Ceph OSD IDs given based on a single
+        osdmap query.
+        """
+
+        osd_map = self.mon_command("osd dump")
+
+        osds_state = {
+            osd_data["osd"]: {"up": osd_data["up"] != 0, "in": osd_data["in"] != 0}
+            for osd_data in osd_map["osds"]
+        }
+
+        for osd_id in osd_ids:
+            if osd_id not in osds_state:
+                raise ModuleException(
+                    "Ceph OSD ID {0} not found in osdmap".format(osd_id)
+                )
+
+        return {osd_id: osds_state[osd_id] for osd_id in osd_ids}
+
     def mon_command(self, command: str, **kwargs: Any) -> Any:
         cmd = {"prefix": command, "format": "json"}
         cmd.update(**kwargs)
-        return self._json_command(self.__ceph.mon_command, json.dumps(cmd), b"")
+
+        ttl = self._command_cache_ttls.get(command)
+
+        if ttl is None:
+            # Commands not known to be read-only may change the cluster state
+            if (
+                command not in self.__class__.CACHEABLE_MON_COMMANDS
+                and len(self._command_cache) > 0
+            ):
+                self.invalidate_command_cache()
+
+            return self._json_command(self.__ceph.mon_command, json.dumps(cmd), b"")
+
+        cache_key = json.dumps(cmd, sort_keys=True)
+
+        with self._command_cache_lock:
+            statistics = self._command_cache_statistics.setdefault(
+                command, {"hits": 0, "misses": 0}
+            )
+
+            cache_entry = self._command_cache.get(cache_key)
+
+            if cache_entry is not None and cache_entry[0] > monotonic():
+                statistics["hits"] += 1
+                return deepcopy(cache_entry[1])
+
+            statistics["misses"] += 1
+
+        data = self._json_command(self.__ceph.mon_command, json.dumps(cmd), b"")
+
+        with self._command_cache_lock:
+            self._command_cache[cache_key] = (monotonic() + ttl, data)
+
+        # Callers may modify the result returned
+        return deepcopy(data)
 
     def mgr_command(self, command: str, **kwargs: Any) -> Any:
         cmd = {"prefix": command, "format": "json"}
         cmd.update(**kwargs)
+
+        self.invalidate_command_cache()
         return self._json_command(self.__ceph.mgr_command, json.dumps(cmd), b"")
 
     def osd_command(self, osd_id: int, command: str, **kwargs: Any) -> Any:
         cmd = {"prefix": command, "format": "json"}
         cmd.update(**kwargs)
+
+        self.invalidate_command_cache()
         return self._json_command(self.__ceph.osd_command, osd_id, json.dumps(cmd), b"")
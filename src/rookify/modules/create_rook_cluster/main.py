@@ -3,8 +3,10 @@
 from collections import OrderedDict
 from typing import Any, Dict
 from ..exception import ModuleException
+from ..k8s_informer import K8sInformer
 from ..machine import Machine
 from ..module import ModuleHandler
+from ..wait import WaitTimeoutException
 
 
 class CreateRookClusterHandler(ModuleHandler):
@@ -128,33 +130,25 @@ class CreateRookClusterHandler(ModuleHandler):
         # Wait for CephCluster to get into Progressing phase
         self.logger.info("Waiting for Rook cluster created")
 
-        result = self.k8s.watch_events(
-            self._watch_cluster_phase_callback,
-            self.k8s.custom_objects_api.list_namespaced_custom_object,
-            "ceph.rook.io",
-            "v1",
-            self._config["rook"]["cluster"]["namespace"],
-            "cephclusters",
-            timeout_seconds=60,
-        )
-
-        if result is None:
+        try:
+            self.k8s.ceph_clusters_informer.wait_for(
+                self._is_cluster_progressing, timeout=60
+            )
+        except WaitTimeoutException:
             raise ModuleException("CephCluster did not come up")
 
         self.machine.get_execution_state("CreateRookClusterHandler").generated = True
 
-    def _watch_cluster_phase_callback(self, event_object: Any) -> Any:
+    def _is_cluster_progressing(self, informer: K8sInformer) -> bool:
+        cluster = informer.get(
+            self._config["rook"]["cluster"]["name"],
+            self._config["rook"]["cluster"]["namespace"],
+        )
+
         try:
-            if (
-                event_object["metadata"]["name"]
-                == self._config["rook"]["cluster"]["name"]
-                and event_object["status"]["phase"] == "Progressing"
-            ):
-                return event_object
+            return cluster is not None and cluster["status"]["phase"] == "Progressing"
         except KeyError:
-            pass
-
-        return None
+            return False
 
     def get_readable_key_value_state(self) -> Dict[str, str]:
         kv_state_data = OrderedDict()
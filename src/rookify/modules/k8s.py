@@ -1,44 +1,344 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import kubernetes
-from typing import Any, Callable, Dict, Optional
+import os
+import socket
+import tempfile
+import urllib3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import RLock
+from time import sleep, time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..logger import get_logger
 from .exception import ModuleException
+from .k8s_informer import K8sInformer, strip_managed_fields
+from .token_bucket import TokenBucket
+from .wait import WaitTimeoutException
+
+
+class _RateLimitedApiClient(kubernetes.client.ApiClient):  # type: ignore
+    """
+    ApiClient limiting the rate of all API calls with a token bucket and
+    retrying calls throttled by the API server with "429 Too Many Requests".
+    """
+
+    MAX_THROTTLED_RETRIES = 5
+
+    def __init__(
+        self,
+        configuration: kubernetes.client.Configuration,
+        token_bucket: Optional[TokenBucket],
+    ):
+        kubernetes.client.ApiClient.__init__(self, configuration)
+        self._token_bucket = token_bucket
+
+    def call_api(self, *args: Any, **kwargs: Any) -> Any:
+        retry = 0
+
+        while True:
+            if self._token_bucket is not None:
+                self._token_bucket.acquire()
+
+            try:
+                return kubernetes.client.ApiClient.call_api(self, *args, **kwargs)
+            except kubernetes.client.exceptions.ApiException as exc:
+                if exc.status != 429 or retry >= self.__class__.MAX_THROTTLED_RETRIES:
+                    raise
+
+                retry += 1
+                retry_after = self._get_retry_after(exc, 2**retry)
+
+                get_logger().debug(
+                    "Kubernetes API request throttled, retrying in {0:d}s".format(
+                        retry_after
+                    )
+                )
+
+                sleep(retry_after)
+
+    def _get_retry_after(
+        self, exc: kubernetes.client.exceptions.ApiException, default_value: int
+    ) -> int:
+        try:
+            return int((exc.headers or {}).get("Retry-After", default_value))
+        except ValueError:
+            return default_value
+
+
+class K8sNodeLabelResult:
+    """
+    Result of labeling one node as part of a bulk labeling operation.
+    """
+
+    def __init__(self, name: str, exception: Optional[BaseException] = None):
+        self.name = name
+        self.exception = exception
+
+    @property
+    def failed(self) -> bool:
+        return self.exception is not None
 
 
 class K8s:
+    BURST = 40
+    CONCURRENCY = 8
+    DISCOVERY_CACHE_TTL = 600
+    FIELD_MANAGER = "rookify"
+    NODE_LABEL_TIMEOUT = 60
+    QPS = 20
+    ROOK_DAEMONS = (
+        "rook-ceph-mds",
+        "rook-ceph-mgr",
+        "rook-ceph-mon",
+        "rook-ceph-osd",
+        "rook-ceph-rgw",
+    )
+    ROOK_DAEMON_FAILURE_REASONS = (
+        "CrashLoopBackOff",
+        "CreateContainerConfigError",
+        "ErrImagePull",
+        "ImagePullBackOff",
+        "InvalidImageName",
+    )
+
+    _sessions: Dict[str, "K8s"] = {}
+    _sessions_lock = RLock()
+
     def __init__(self, config: Dict[str, Any]):
-        k8s_config = kubernetes.config.load_kube_config(
-            config_file=config["kubernetes"]["config"]
+        self._concurrency = config["kubernetes"].get(
+            "concurrency", self.__class__.CONCURRENCY
         )
 
+        k8s_config = kubernetes.client.Configuration()
+
+        kubernetes.config.load_kube_config(
+            config_file=config["kubernetes"]["config"],
+            client_configuration=k8s_config,
+        )
+
+        if "connection_pool_maxsize" in config["kubernetes"]:
+            k8s_config.connection_pool_maxsize = config["kubernetes"][
+                "connection_pool_maxsize"
+            ]
+
+        qps = config["kubernetes"].get("qps", self.__class__.QPS)
+
+        token_bucket = (
+            None
+            if qps == 0
+            else TokenBucket(
+                qps, config["kubernetes"].get("burst", self.__class__.BURST)
+            )
+        )
         self._flags: Dict[str, bool] = config["kubernetes"].get("flags", {})
+        self._list_page_limit = config["kubernetes"].get(
+            "list_page_limit", K8sInformer.LIST_PAGE_LIMIT
+        )
         self._rook_config = config["rook"]
         self._rook_flags: Dict[str, bool] = config["rook"].get("flags", {})
 
-        self.__client = kubernetes.client.ApiClient(k8s_config)
+        self.__client = _RateLimitedApiClient(k8s_config, token_bucket)
+
+        if "tcp_keepalive" in config["kubernetes"]:
+            self._set_tcp_keepalive(config["kubernetes"]["tcp_keepalive"])
         self.__dynamic_client: Optional[kubernetes.dynamic.DynamicClient] = None
+        self.__dynamic_client_lock = RLock()
+
+        self._apis: Dict[str, Any] = {}
+        self._crd_apis: Dict[Tuple[str, str], kubernetes.dynamic.resource.Resource] = {}
+
+        self._discovery_cache_file = config["kubernetes"].get(
+            "discovery_cache_file",
+            os.path.join(
+                tempfile.gettempdir(),
+                "rookify-discovery-{0}.json".format(
+                    hashlib.sha256(
+                        self.__client.configuration.host.encode("utf-8")
+                    ).hexdigest()
+                ),
+            ),
+        )
+
+        self._discovery_cache_ttl = config["kubernetes"].get(
+            "discovery_cache_ttl", self.__class__.DISCOVERY_CACHE_TTL
+        )
+
+        self._informers: Dict[str, K8sInformer] = {}
+        self._informers_lock = RLock()
+        self._is_server_side_apply_supported = True
+
+    def _set_tcp_keepalive(self, idle: int) -> None:
+        """
+        Enables TCP keepalive probes for API server connections after "idle"
+        seconds without traffic.
+        """
+
+        socket_options = list(
+            urllib3.connection.HTTPConnection.default_socket_options
+        ) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+        # Not all platforms support tuning the keepalive probes
+        for option_name, value in (
+            ("TCP_KEEPIDLE", idle),
+            ("TCP_KEEPINTVL", idle),
+            ("TCP_KEEPCNT", 3),
+        ):
+            if hasattr(socket, option_name):
+                socket_options.append(
+                    (socket.IPPROTO_TCP, getattr(socket, option_name), value)
+                )
+
+        self.__client.rest_client.pool_manager.connection_pool_kw["socket_options"] = (
+            socket_options
+        )
+
+    @classmethod
+    def get_session(cls, config: Dict[str, Any]) -> "K8s":
+        """
+        Returns the process-wide shared session for the Kubernetes cluster
+        configured. Informer caches are shared by all callers.
+        """
+
+        session_key = config["kubernetes"]["config"]
+
+        with cls._sessions_lock:
+            if session_key not in cls._sessions:
+                cls._sessions[session_key] = cls(config)
+
+            return cls._sessions[session_key]
+
+    @classmethod
+    def close_sessions(cls) -> None:
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.stop_informers()
+
+            cls._sessions.clear()
+
+    @property
+    def ceph_clusters_informer(self) -> K8sInformer:
+        return self._get_informer(
+            "cephclusters",
+            self.custom_objects_api.list_namespaced_custom_object,
+            "ceph.rook.io",
+            "v1",
+            self._rook_config["cluster"]["namespace"],
+            "cephclusters",
+        )
+
+    @property
+    def nodes_informer(self) -> K8sInformer:
+        return self._get_informer(
+            "nodes", self.core_v1_api.list_node, transform_func=self._strip_node
+        )
+
+    @property
+    def rook_deployments_informer(self) -> K8sInformer:
+        return self._get_informer(
+            "deployments",
+            self.apps_v1_api.list_namespaced_deployment,
+            self._rook_config["cluster"]["namespace"],
+            label_selector=self._get_rook_daemons_label_selector(),
+        )
+
+    @property
+    def rook_pods_informer(self) -> K8sInformer:
+        return self._get_informer(
+            "pods",
+            self.core_v1_api.list_namespaced_pod,
+            self._rook_config["cluster"]["namespace"],
+            label_selector=self._get_rook_daemons_label_selector(),
+        )
+
+    def _get_rook_daemons_label_selector(self) -> str:
+        return "app in ({0})".format(",".join(self.__class__.ROOK_DAEMONS))
+
+    def _get_informer(
+        self, name: str, list_func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> K8sInformer:
+        with self._informers_lock:
+            if name not in self._informers:
+                self._informers[name] = K8sInformer(
+                    name,
+                    list_func,
+                    *args,
+                    page_limit=self._list_page_limit,
+                    **kwargs,
+                )
+
+            informer = self._informers[name]
+
+        informer.start()
+        return informer
+
+    @staticmethod
+    def _strip_node(node: Any) -> Any:
+        # Container images are the largest part of a node status
+        if node.status is not None:
+            node.status.images = None
+
+        return strip_managed_fields(node)
+
+    def stop_informers(self) -> None:
+        with self._informers_lock:
+            for informer in self._informers.values():
+                informer.stop()
+
+            self._informers.clear()
 
     @property
     def core_v1_api(self) -> kubernetes.client.CoreV1Api:
-        return kubernetes.client.CoreV1Api(self.__client)
+        return self._get_api(kubernetes.client.CoreV1Api)
 
     @property
     def apps_v1_api(self) -> kubernetes.client.AppsV1Api:
-        return kubernetes.client.AppsV1Api(self.__client)
+        return self._get_api(kubernetes.client.AppsV1Api)
 
     @property
     def node_v1_api(self) -> kubernetes.client.NodeV1Api:
-        return kubernetes.client.NodeV1Api(self.__client)
+        return self._get_api(kubernetes.client.NodeV1Api)
 
     @property
     def custom_objects_api(self) -> kubernetes.client.CustomObjectsApi:
-        return kubernetes.client.CustomObjectsApi(self.__client)
+        return self._get_api(kubernetes.client.CustomObjectsApi)
+
+    def _get_api(self, api_class: Any) -> Any:
+        api = self._apis.get(api_class.__name__)
+
+        # API objects are stateless and shared; a racing creation is harmless
+        if api is None:
+            api = api_class(self.__client)
+            self._apis[api_class.__name__] = api
+
+        return api
 
     @property
     def dynamic_client(self) -> kubernetes.dynamic.DynamicClient:
-        if not self.__dynamic_client:
-            self.__dynamic_client = kubernetes.dynamic.DynamicClient(self.__client)
-        return self.__dynamic_client
+        with self.__dynamic_client_lock:
+            if not self.__dynamic_client:
+                self._expire_discovery_cache()
+
+                self.__dynamic_client = kubernetes.dynamic.DynamicClient(
+                    self.__client, cache_file=self._discovery_cache_file
+                )
+
+            return self.__dynamic_client
+
+    def _expire_discovery_cache(self) -> None:
+        """
+        Removes the discovery cache file if it is older than
+        "kubernetes.discovery_cache_ttl" seconds.
+        """
+
+        try:
+            if (
+                time() - os.path.getmtime(self._discovery_cache_file)
+                >= self._discovery_cache_ttl
+            ):
+                os.remove(self._discovery_cache_file)
+        except FileNotFoundError:
+            pass
 
     @property
     def mds_placement_label(self) -> str:
@@ -81,35 +381,290 @@ class K8s:
         )
 
     def check_nodes_for_initial_label_state(self, label: str) -> None:
-        nodes = self.core_v1_api.list_node().items
+        for node in self.nodes_informer.list(label, "true"):
+            raise ModuleException(
+                "Label {0} is set on node {1}".format(label, node.metadata.name)
+            )
+
+    def _has_node_label(self, node: Any, label: str, value: str) -> bool:
+        return node is not None and (node.metadata.labels or {}).get(label) == value
+
+    def label_nodes(
+        self,
+        names: Iterable[str],
+        label: str,
+        value: str = "true",
+        timeout: Optional[float] = None,
+    ) -> Dict[str, K8sNodeLabelResult]:
+        """
+        Sets the label given on all nodes concurrently with at most
+        "kubernetes.concurrency" requests at a time. Labels are verified with
+        the node informer instead of reading each node again. Failures are
+        reported per node instead of being raised.
+
+        :param names: Names of the nodes to label
+        :param label: Label to set
+        :param value: Value of the label
+        :param timeout: Timeout in seconds to wait for the labels to be observed
+        :return: returns the result per node
+        """
+
+        names = list(names)
+
+        if len(names) < 1:
+            return {}
+
+        node_patch = {"metadata": {"labels": {label: value}}}
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._concurrency, len(names)),
+            thread_name_prefix="rookify-k8s",
+        ) as executor:
+            futures = {
+                name: executor.submit(self.core_v1_api.patch_node, name, node_patch)
+                for name in names
+            }
 
-        for node in nodes:
-            node_labels = node.metadata.labels
+        exceptions = {name: future.exception() for name, future in futures.items()}
+        patched_names = [name for name in names if exceptions[name] is None]
 
-            if label in node_labels and node_labels[label] == "true":
-                raise ModuleException(
-                    "Label {0} is set on node {1}".format(label, node.metadata.name)
+        if len(patched_names) > 0:
+            nodes_informer = self.nodes_informer
+
+            try:
+                nodes_informer.wait_for(
+                    lambda informer: all(
+                        self._has_node_label(informer.get(name), label, value)
+                        for name in patched_names
+                    ),
+                    self.__class__.NODE_LABEL_TIMEOUT if timeout is None else timeout,
                 )
+            except WaitTimeoutException:
+                for name in patched_names:
+                    if not self._has_node_label(nodes_informer.get(name), label, value):
+                        exceptions[name] = ModuleException(
+                            "Label {0} was not observed on node {1}".format(label, name)
+                        )
+
+        return {name: K8sNodeLabelResult(name, exceptions[name]) for name in names}
+
+    def get_rook_deployments(self) -> List[Any]:
+        """
+        Returns the deployments of the Rook Ceph daemons.
+        """
+
+        return self.rook_deployments_informer.list()
+
+    def get_rook_pods(self) -> List[Any]:
+        """
+        Returns the pods of the Rook Ceph daemons.
+        """
+
+        return self.rook_pods_informer.list()
+
+    def get_rook_daemon_pods(
+        self, app: str, node_name: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Returns the pods of the Rook daemon given, e.g. "rook-ceph-osd".
+
+        :param app: Value of the "app" label of the Rook daemon
+        :param node_name: Name of the node the pods must be scheduled on
+        :return: returns the pods
+        """
+
+        return [
+            pod
+            for pod in self.rook_pods_informer.list("app", app)
+            if node_name is None or pod.spec.node_name == node_name
+        ]
+
+    def check_rook_daemon(self, app: str, node_name: Optional[str] = None) -> bool:
+        """
+        Checks the deployments and pods of the Rook daemon given. An exception
+        is raised as soon as Kubernetes reports that the daemon can not start.
+
+        :param app: Value of the "app" label of the Rook daemon
+        :param node_name: Name of the node the pods must be scheduled on
+        :return: returns true if at least one pod is ready
+        """
+
+        pods = self.get_rook_daemon_pods(app, node_name)
+
+        for deployment in self.rook_deployments_informer.list("app", app):
+            if node_name is not None and not self._is_rook_daemon_deployment_of_node(
+                deployment, node_name, pods
+            ):
+                continue
+
+            for condition in deployment.status.conditions or []:
+                if (
+                    condition.type == "ReplicaFailure" and condition.status == "True"
+                ) or (
+                    condition.type == "Progressing"
+                    and condition.reason == "ProgressDeadlineExceeded"
+                ):
+                    raise ModuleException(
+                        "Rook deployment '{0}' failed: {1}".format(
+                            deployment.metadata.name, condition.message
+                        )
+                    )
+
+        is_ready = False
+
+        for pod in pods:
+            container_statuses = (pod.status.init_container_statuses or []) + (
+                pod.status.container_statuses or []
+            )
+
+            for container_status in container_statuses:
+                waiting_state = container_status.state.waiting
+
+                if (
+                    waiting_state is not None
+                    and waiting_state.reason
+                    in self.__class__.ROOK_DAEMON_FAILURE_REASONS
+                ):
+                    raise ModuleException(
+                        "Rook pod '{0}' failed with {1}: {2}".format(
+                            pod.metadata.name,
+                            waiting_state.reason,
+                            waiting_state.message,
+                        )
+                    )
+
+            for condition in pod.status.conditions or []:
+                if condition.type == "Ready" and condition.status == "True":
+                    is_ready = True
+
+        return is_ready
+
+    def _is_rook_daemon_deployment_of_node(
+        self, deployment: Any, node_name: str, pods: List[Any]
+    ) -> bool:
+        """
+        Returns true if the deployment given belongs to the node given. Rook
+        labels node specific deployments with the host they are placed on,
+        deployments without pods are matched by their node selector.
+        """
+
+        labels = deployment.metadata.labels or {}
+
+        if labels.get("topology-location-host") == node_name:
+            return True
+
+        template_spec = deployment.spec.template.spec
+
+        if (template_spec.node_selector or {}).get(
+            "kubernetes.io/hostname"
+        ) == node_name:
+            return True
+
+        # Pods are owned by a ReplicaSet named after the deployment
+        for pod in pods:
+            pod_template_hash = (pod.metadata.labels or {}).get("pod-template-hash")
+
+            for owner_reference in pod.metadata.owner_references or []:
+                if (
+                    owner_reference.kind == "ReplicaSet"
+                    and owner_reference.name
+                    == "{0}-{1}".format(deployment.metadata.name, pod_template_hash)
+                ):
+                    return True
+
+        return False
 
     def crd_api(
         self, api_version: str, kind: str
     ) -> kubernetes.dynamic.resource.Resource:
-        return self.dynamic_client.resources.get(api_version=api_version, kind=kind)
+        with self.__dynamic_client_lock:
+            if (api_version, kind) not in self._crd_apis:
+                self._crd_apis[(api_version, kind)] = self.dynamic_client.resources.get(
+                    api_version=api_version, kind=kind
+                )
+
+            return self._crd_apis[(api_version, kind)]
 
     def crd_api_apply(
         self, manifest: Dict[Any, Any]
     ) -> kubernetes.dynamic.resource.ResourceInstance:
         """
-        This applies a manifest for custom CRDs
+        This applies a manifest for custom CRDs with server-side apply. API
+        servers not supporting it are handled with a get-then-patch fallback.
         See https://github.com/kubernetes-client/python/issues/1792 for more information
         :param manifest: Dict of the kubernetes manifest
         """
         api_version = manifest["apiVersion"]
         kind = manifest["kind"]
-        resource_name = manifest["metadata"]["name"]
         namespace = manifest["metadata"]["namespace"]
         crd_api = self.crd_api(api_version=api_version, kind=kind)
 
+        if self._is_server_side_apply_supported:
+            try:
+                return crd_api.server_side_apply(
+                    body=manifest,
+                    namespace=namespace,
+                    field_manager=self.__class__.FIELD_MANAGER,
+                    force_conflicts=True,
+                )
+            except kubernetes.dynamic.exceptions.DynamicApiError as exc:
+                # "415 Unsupported Media Type" is returned by API servers
+                # without server-side apply support
+                if exc.status != 415:
+                    raise
+
+                self._is_server_side_apply_supported = False
+
+        return self._crd_api_apply_with_patch(crd_api, manifest)
+
+    def crd_api_apply_many(
+        self, manifests: Dict[str, Dict[Any, Any]]
+    ) -> Iterator[
+        Tuple[
+            str,
+            Optional[kubernetes.dynamic.resource.ResourceInstance],
+            Optional[Exception],
+        ]
+    ]:
+        """
+        Applies the manifests given concurrently with at most
+        "kubernetes.concurrency" requests at a time. Results are yielded in
+        the order they complete as tuples of the manifest key, the applied
+        object and the exception raised. Failures are not raised.
+
+        :param manifests: Dict of the kubernetes manifests to apply
+        """
+
+        if len(manifests) < 1:
+            return
+
+        # Resolve the API resources once before they are used concurrently
+        for manifest in manifests.values():
+            self.crd_api(api_version=manifest["apiVersion"], kind=manifest["kind"])
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._concurrency, len(manifests)),
+            thread_name_prefix="rookify-k8s",
+        ) as executor:
+            futures = {
+                executor.submit(self.crd_api_apply, manifest): key
+                for key, manifest in manifests.items()
+            }
+
+            for future in as_completed(futures):
+                exception = future.exception()
+
+                if exception is None:
+                    yield futures[future], future.result(), None
+                else:
+                    yield futures[future], None, exception  # type: ignore
+
+    def _crd_api_apply_with_patch(
+        self, crd_api: kubernetes.dynamic.resource.Resource, manifest: Dict[Any, Any]
+    ) -> kubernetes.dynamic.resource.ResourceInstance:
+        resource_name = manifest["metadata"]["name"]
+        namespace = manifest["metadata"]["namespace"]
+
         try:
             crd_api.get(namespace=namespace, name=resource_name)
             return crd_api.patch(
@@ -128,26 +683,3 @@ class K8s:
 
     def get_rook_flag(self, name: str, default_value: bool = False) -> bool:
         return self._get_flag(self._rook_flags, name, default_value)
-
-    def watch_events(
-        self,
-        callback_func: Callable[[Any], Any],
-        func: Callable[[Any], Any],
-        *args: Any,
-        **kwargs: Any,
-    ) -> Any:
-        watcher = kubernetes.watch.Watch()
-
-        stream = watcher.stream(func, *args, **kwargs)
-
-        try:
-            for event in stream:
-                try:
-                    result = callback_func(event["object"])
-                except StopIteration:
-                    continue
-
-                if result is not None:
-                    return result
-        finally:
-            watcher.stop()
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+import kubernetes
+from threading import Condition, Event, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from ..logger import get_logger
+from .wait import WaitTimeoutException
+
+
+def get_list_pages(
+    list_func: Callable[..., Any], *args: Any, limit: int = 500, **kwargs: Any
+) -> Iterator[Any]:
+    """
+    Calls the Kubernetes API list function given and yields each page of at
+    most "limit" objects returned until the list is complete.
+    """
+
+    _continue = None
+
+    while True:
+        if _continue is not None:
+            kwargs["_continue"] = _continue
+
+        result = list_func(*args, limit=limit, **kwargs)
+        yield result
+
+        if isinstance(result, dict):
+            _continue = result["metadata"].get("continue")
+        else:
+            _continue = result.metadata._continue
+
+        if not _continue:
+            break
+
+
+def strip_managed_fields(obj: Any) -> Any:
+    """
+    Removes the managed fields of the object given as they are never used by
+    rookify but take a large share of the memory of each object.
+    """
+
+    if isinstance(obj, dict):
+        obj["metadata"].pop("managedFields", None)
+    else:
+        obj.metadata.managed_fields = None
+
+    return obj
+
+
+class K8sInformer:
+    """
+    K8sInformer keeps an in-memory copy of Kubernetes resources. The resources
+    are listed once and kept up to date by watching them afterwards. The
+    objects are indexed by name and label.
+    """
+
+    LIST_PAGE_LIMIT = 500
+    WATCH_TIMEOUT_SECONDS = 300
+    WATCH_RETRY_INTERVAL = 2.0
+
+    def __init__(
+        self,
+        name: str,
+        list_func: Callable[..., Any],
+        *args: Any,
+        page_limit: Optional[int] = None,
+        transform_func: Callable[[Any], Any] = strip_managed_fields,
+        **kwargs: Any,
+    ):
+        """
+        Construct a new 'K8sInformer' object.
+
+        :param name: Human readable name of the resources watched
+        :param list_func: Kubernetes API list function of the resources
+        :param args: Positional arguments for the list function
+        :param page_limit: Maximum number of objects listed per request
+        :param transform_func: Callable to reduce each object before caching it
+        :param kwargs: Keyword arguments for the list function
+        :return: returns nothing
+        """
+
+        self._name = name
+        self._list_func = list_func
+        self._page_limit = (
+            self.__class__.LIST_PAGE_LIMIT if page_limit is None else page_limit
+        )
+        self._transform_func = transform_func
+        self._list_args = args
+        self._list_kwargs = kwargs
+
+        self._condition = Condition()
+        self._label_index: Dict[str, Set[Tuple[str, str]]] = {}
+        self._objects: Dict[Tuple[str, str], Any] = {}
+        self._resource_version: Optional[str] = None
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        self._watcher: Optional[kubernetes.watch.Watch] = None
+
+    @property
+    def resource_version(self) -> Optional[str]:
+        with self._condition:
+            return self._resource_version
+
+    @staticmethod
+    def _get_metadata_value(obj: Any, name: str, attr_name: str) -> Any:
+        metadata = obj["metadata"] if isinstance(obj, dict) else obj.metadata
+
+        if isinstance(metadata, dict):
+            return metadata.get(name)
+
+        return getattr(metadata, attr_name)
+
+    def _get_key(self, obj: Any) -> Tuple[str, str]:
+        return (
+            self._get_metadata_value(obj, "namespace", "namespace") or "",
+            self._get_metadata_value(obj, "name", "name"),
+        )
+
+    def _get_labels(self, obj: Any) -> Dict[str, str]:
+        return self._get_metadata_value(obj, "labels", "labels") or {}
+
+    def _add_object(self, obj: Any) -> None:
+        key = self._get_key(obj)
+
+        self._remove_object(key)
+        self._index_object(self._objects, self._label_index, key, obj)
+
+    def _index_object(
+        self,
+        objects: Dict[Tuple[str, str], Any],
+        label_index: Dict[str, Set[Tuple[str, str]]],
+        key: Tuple[str, str],
+        obj: Any,
+    ) -> None:
+        objects[key] = obj
+
+        for label in self._get_labels(obj):
+            label_index.setdefault(label, set()).add(key)
+
+    def _remove_object(self, key: Tuple[str, str]) -> None:
+        obj = self._objects.pop(key, None)
+
+        if obj is None:
+            return
+
+        for label in self._get_labels(obj):
+            self._label_index[label].discard(key)
+
+    def _list(self) -> None:
+        # Each page is indexed and released before the next one is requested
+        label_index: Dict[str, Set[Tuple[str, str]]] = {}
+        objects: Dict[Tuple[str, str], Any] = {}
+        resource_version = None
+
+        for result in get_list_pages(
+            self._list_func,
+            *self._list_args,
+            limit=self._page_limit,
+            **self._list_kwargs,
+        ):
+            if isinstance(result, dict):
+                items = result["items"]
+                resource_version = result["metadata"]["resourceVersion"]
+            else:
+                items = result.items
+                resource_version = result.metadata.resource_version
+
+            for obj in items:
+                obj = self._transform_func(obj)
+                self._index_object(objects, label_index, self._get_key(obj), obj)
+
+        with self._condition:
+            self._label_index = label_index
+            self._objects = objects
+            self._resource_version = resource_version
+            self._condition.notify_all()
+
+    def _handle_event(self, event: Dict[str, Any]) -> None:
+        # Bookmarks only carry the current resource version
+        obj = event["object"]
+
+        with self._condition:
+            if event["type"] == "DELETED":
+                self._remove_object(self._get_key(obj))
+            elif event["type"] in ("ADDED", "MODIFIED"):
+                self._add_object(self._transform_func(obj))
+
+            self._resource_version = self._get_metadata_value(
+                obj, "resourceVersion", "resource_version"
+            )
+
+            self._condition.notify_all()
+
+    def _watch(self) -> None:
+        while not self._stop_event.is_set():
+            self._watcher = kubernetes.watch.Watch()
+
+            try:
+                for event in self._watcher.stream(
+                    self._list_func,
+                    *self._list_args,
+                    allow_watch_bookmarks=True,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.__class__.WATCH_TIMEOUT_SECONDS,
+                    **self._list_kwargs,
+                ):
+                    self._handle_event(event)
+            except kubernetes.client.exceptions.ApiException as exc:
+                if exc.status != 410:
+                    get_logger().warn(
+                        "Watching Kubernetes {0} failed: {1!s}".format(self._name, exc)
+                    )
+
+                    self._stop_event.wait(self.__class__.WATCH_RETRY_INTERVAL)
+
+                if not self._stop_event.is_set():
+                    # The resource version may have expired; list again
+                    self._relist()
+            except Exception as exc:
+                get_logger().warn(
+                    "Watching Kubernetes {0} failed: {1!s}".format(self._name, exc)
+                )
+
+                self._stop_event.wait(self.__class__.WATCH_RETRY_INTERVAL)
+
+    def _relist(self) -> None:
+        try:
+            self._list()
+        except Exception as exc:
+            get_logger().warn(
+                "Listing Kubernetes {0} failed: {1!s}".format(self._name, exc)
+            )
+
+    def start(self) -> None:
+        """
+        Lists the resources and starts watching them in the background.
+        """
+
+        with self._condition:
+            if self._thread is not None:
+                return
+
+            self._list()
+
+            self._stop_event.clear()
+
+            self._thread = Thread(
+                target=self._watch,
+                name="rookify-k8s-informer-{0}".format(self._name),
+                daemon=True,
+            )
+
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._thread = None
+            self._stop_event.set()
+
+            if self._watcher is not None:
+                self._watcher.stop()
+
+    def get(self, name: str, namespace: str = "") -> Any:
+        """
+        Returns the object with the given name or None if it does not exist.
+        """
+
+        with self._condition:
+            return self._objects.get((namespace, name))
+
+    def list(
+        self, label: Optional[str] = None, label_value: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Returns all objects or those having the label given.
+
+        :param label: Label the objects must have
+        :param label_value: Value the label must have
+        :return: returns the objects
+        """
+
+        with self._condition:
+            if label is None:
+                return list(self._objects.values())
+
+            objects = [
+                self._objects[key] for key in self._label_index.get(label, set())
+            ]
+
+        if label_value is not None:
+            objects = [
+                obj for obj in objects if self._get_labels(obj)[label] == label_value
+            ]
+
+        return objects
+
+    def wait_for_change(
+        self, resource_version: Optional[str], timeout: Optional[float]
+    ) -> bool:
+        """
+        Blocks until the cached objects changed compared to the resource
+        version given or the timeout expired.
+
+        :param resource_version: Resource version previously returned
+        :param timeout: Timeout in seconds
+        :return: returns true if the objects changed
+        """
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._resource_version != resource_version, timeout
+            )
+
+    def wait_for(
+        self, predicate: Callable[["K8sInformer"], Any], timeout: Optional[float]
+    ) -> Any:
+        """
+        Waits until the predicate given returns a truthy value for the objects
+        cached. The predicate is evaluated each time the cache changed.
+
+        :param predicate: Callable evaluating the condition for this informer
+        :param timeout: Timeout in seconds
+        :return: returns the predicate result
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+
+        with self._condition:
+            while True:
+                result = predicate(self)
+
+                if result:
+                    return result
+
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - monotonic()
+
+                    if remaining <= 0:
+                        raise WaitTimeoutException(
+                            "Timed out waiting for Kubernetes {0}".format(self._name)
+                        )
+
+                    self._condition.wait(remaining)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import kubernetes
 from ..exception import ModuleException
 from ..module import ModuleHandler
 
@@ -12,6 +13,7 @@ class K8sPrerequisitesCheckHandler(ModuleHandler):
         deployments = self.k8s.apps_v1_api.list_deployment_for_all_namespaces(
             field_selector="metadata.name=rook-ceph-operator",
             label_selector="operator=rook",
+            limit=1,
         )
 
         if len(deployments.items) < 1:
@@ -19,10 +21,10 @@ class K8sPrerequisitesCheckHandler(ModuleHandler):
 
         namespace = self._config["rook"]["cluster"]["namespace"]
 
-        namespaces = [
-            namespace.metadata.name
-            for namespace in self.k8s.core_v1_api.list_namespace().items
-        ]
+        try:
+            self.k8s.core_v1_api.read_namespace(namespace)
+        except kubernetes.client.exceptions.ApiException as exc:
+            if exc.status != 404:
+                raise
 
-        if namespace not in namespaces:
             raise ModuleException("Namespace {0} does not exist".format(namespace))
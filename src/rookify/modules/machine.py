@@ -1,30 +1,217 @@
 # -*- coding: utf-8 -*-
 
-from dill import Pickler, Unpickler
-from transitions import MachineError, State
+import os
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dill import Unpickler
+from functools import partial
+from threading import RLock, local
+from time import monotonic
+from transitions import EventData, MachineError, State
 from transitions import Machine as _Machine
 from transitions.extensions.states import add_state_features, Tags, Timeout
-from typing import Any, Dict, IO, Optional, List
+from typing import Any, Callable, Dict, IO, Optional, List, Set, Tuple
 from ..logger import get_logger
+from .exception import ModuleException
+from .machine_journal import MachineJournal
+from .machine_progress import MachineProgressStore
+from .machine_snapshot import (
+    MachineSnapshotSection,
+    is_snapshot_file,
+    read_snapshot,
+    write_snapshot,
+)
+
+
+class Journaled(object):
+    """
+    State feature reporting each assignment of a tag to a callback.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.on_tag_change: Optional[Callable[[str, str, Any], Any]] = kwargs.pop(
+            "on_tag_change", None
+        )
+
+        super().__init__(*args, **kwargs)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+
+        if name in getattr(self, "tags", ()) and self.on_tag_change is not None:
+            self.on_tag_change(getattr(self, "name"), name, value)
+
+
+class Restorable(object):
+    """
+    State feature restoring the tags from a snapshot on first access.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.restore_tags: Optional[Callable[[], Any]] = None
+        super().__init__(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not set yet
+        restore_tags = self.__dict__.get("restore_tags")
+
+        if restore_tags is not None and name in self.__dict__.get("tags", ()):
+            restore_tags()
+
+            if name in self.__dict__:
+                return self.__dict__[name]
 
+        return super().__getattr__(name)  # type: ignore
 
-@add_state_features(Tags, Timeout)
+
+@add_state_features(Journaled, Restorable, Tags, Timeout)
 class Machine(_Machine):  # type: ignore
+    JOURNAL_COMPACTION_THRESHOLD = 1000
+    PREFLIGHT_PARALLELISM = 4
     STATE_NAME_EXECUTION_PREFIX = "Execution"
     STATE_NAME_PREFLIGHT_PREFIX = "Preflight"
 
-    def __init__(self, machine_pickle_file: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        machine_pickle_file: Optional[str] = None,
+        state_timeout: Optional[float] = None,
+        snapshot_compression: bool = True,
+        parallelism: int = 1,
+        preflight_parallelism: Optional[int] = None,
+    ) -> None:
+        self._cleanup_callbacks: List[Callable[[], Any]] = []
         self._machine_pickle_file = machine_pickle_file
         self._execution_states: List[State] = []
+        self._journal: Optional[MachineJournal] = None
+        self._journal_lock = RLock()
+        self._parallelism = parallelism
+        self._preflight_parallelism = (
+            self.__class__.PREFLIGHT_PARALLELISM
+            if preflight_parallelism is None
+            else preflight_parallelism
+        )
         self._preflight_states: List[State] = []
+        self._progress_imported: Set[Tuple[str, str]] = set()
+        self._progress_store: Optional[MachineProgressStore] = None
+        self._run_id: Optional[str] = None
+        self._run_id_created = False
+        self._snapshot_compression = snapshot_compression
+        self._snapshot_sections: Dict[str, MachineSnapshotSection] = {}
+        self._unregistered_states_data: Dict[str, Dict[str, Any]] = {}
+        # States entered concurrently are tracked per thread
+        self._state_entry = local()
+        self._state_requirements: Dict[str, List[str]] = {}
+        self._state_timeout = state_timeout
 
         _Machine.__init__(self, states=["uninitialized"], initial="uninitialized")
 
+    def add_cleanup_callback(self, callback: Callable[[], Any]) -> None:
+        """
+        Registers a callback to be called once execution finished.
+        """
+
+        if callback not in self._cleanup_callbacks:
+            self._cleanup_callbacks.append(callback)
+
     def add_execution_state(self, name: str, **kwargs: Any) -> None:
-        self._execution_states.append(self.__class__.state_cls(name, **kwargs))
+        self._execution_states.append(self._create_module_state(name, **kwargs))
 
     def add_preflight_state(self, name: str, **kwargs: Any) -> None:
-        self._preflight_states.append(self.__class__.state_cls(name, **kwargs))
+        self._preflight_states.append(self._create_module_state(name, **kwargs))
+
+    def add_state_requirements(self, name: str, requires: List[str]) -> None:
+        """
+        Registers the modules the module given depends on for parallel
+        execution.
+
+        :param name: State name of the module without prefix
+        :param requires: State names of the modules required without prefix
+        :return: returns nothing
+        """
+
+        self._state_requirements[name] = requires.copy()
+
+    def _create_module_state(self, name: str, **kwargs: Any) -> State:
+        if self._state_timeout is not None:
+            kwargs.setdefault("timeout", self._state_timeout)
+
+        if kwargs.get("timeout", 0) > 0:
+            kwargs.setdefault("on_timeout", partial(self._on_state_timeout, name))
+
+        kwargs.setdefault("on_tag_change", self._on_state_tag_change)
+
+        return self.__class__.state_cls(name, **kwargs)
+
+    def _on_state_tag_change(self, state_name: str, tag: str, value: Any) -> None:
+        with self._journal_lock:
+            if self._journal is None:
+                return
+
+            self._journal.append(state_name, tag, value)
+
+            if (
+                self._journal.records_count
+                >= self.__class__.JOURNAL_COMPACTION_THRESHOLD
+            ):
+                self._compact_journal()
+
+    def _on_state_timeout(self, name: str) -> None:
+        get_logger().warn("State '{0}' exceeded its timeout".format(name))
+
+    @property
+    def progress_store(self) -> MachineProgressStore:
+        with self._journal_lock:
+            if self._progress_store is None:
+                if self._machine_pickle_file is None:
+                    self._progress_store = MachineProgressStore()
+                else:
+                    progress_store = MachineProgressStore(
+                        "{0}.progress".format(self._machine_pickle_file)
+                    )
+
+                    # Progress of previous runs is removed once for a new run
+                    progress_store.open_run(self._get_run_id(), self._run_id_created)
+                    self._run_id_created = False
+
+                    self._progress_store = progress_store
+
+            return self._progress_store
+
+    def _get_run_id(self) -> str:
+        """
+        Returns the identifier of the run stored in the snapshot. A new run is
+        started if there is no snapshot of one.
+        """
+
+        with self._journal_lock:
+            if self._run_id is None:
+                self._run_id = uuid.uuid4().hex
+                self._run_id_created = True
+
+            return self._run_id
+
+    def get_state_deadline(self) -> Optional[float]:
+        """
+        Returns the monotonic time the timeout of the current state expires at.
+        """
+
+        entered_at = getattr(self._state_entry, "entered_at", None)
+
+        if entered_at is None:
+            return None
+
+        state_name = getattr(self._state_entry, "name", None)
+
+        timeout = getattr(
+            self.get_state(self.state if state_name is None else state_name),
+            "timeout",
+            0,
+        )
+
+        if timeout <= 0:
+            return None
+
+        return float(entered_at + timeout)
 
     def execute(self, dry_run_mode: bool = False) -> None:
         states = self._preflight_states
@@ -35,41 +222,321 @@ class Machine(_Machine):  # type: ignore
 
         logger = get_logger()
 
-        if self._machine_pickle_file is None:
-            logger.info("Execution started without machine pickle file")
-            self._execute()
-        else:
-            with open(self._machine_pickle_file, "ab+") as file:
+        try:
+            if self._machine_pickle_file is None:
+                logger.info("Execution started without machine pickle file")
+            else:
                 logger.info("Execution started with machine pickle file")
-                self._execute(file)
 
-    def _execute(self, pickle_file: Optional[IO[Any]] = None) -> None:
-        states_data = {}
+            self._execute(states)
+        finally:
+            self._run_cleanup_callbacks()
+
+    def _execute(self, states: List[State]) -> None:
+        if self._machine_pickle_file is not None:
+            self._load_state_data()
+            self._open_journal()
+
+        preflight_prefix = self.__class__.STATE_NAME_PREFLIGHT_PREFIX
+        preflight_states = [
+            state for state in states if state.name.startswith(preflight_prefix)
+        ]
+
+        execution_prefix = self.__class__.STATE_NAME_EXECUTION_PREFIX
+        execution_states = [
+            state for state in states if state.name.startswith(execution_prefix)
+        ]
+
+        try:
+            if len(preflight_states) > 0 and (
+                self._preflight_parallelism > 1 or self._parallelism > 1
+            ):
+                # Preflight states are read-only and report all failures at once
+                self._execute_parallel_phase(
+                    preflight_prefix,
+                    preflight_states,
+                    self._preflight_parallelism,
+                    collect_exceptions=True,
+                )
 
-        if pickle_file is not None:
-            self._restore_state_data(pickle_file)
+                self.set_state(preflight_states[-1].name)
 
+            if self._parallelism > 1:
+                if len(execution_states) > 0:
+                    self._execute_parallel_phase(
+                        execution_prefix, execution_states, self._parallelism
+                    )
+
+                self.set_state("migrated")
+            else:
+                self._execute_sequential()
+        finally:
+            if self._machine_pickle_file is not None:
+                self._close_journal()
+
+                if self._progress_store is not None:
+                    self._progress_store.close()
+                    self._progress_store = None
+
+    def _execute_sequential(self) -> None:
         try:
             while True:
                 try:
+                    self._state_entry.entered_at = monotonic()
                     self.next_state()
-                except:
-                    raise
                 finally:
-                    if pickle_file is not None:
-                        state_data = self._get_state_tags_data(self.state)
-
-                        if len(state_data) > 0:
-                            states_data[self.state] = state_data
+                    self._sync_journal()
         except MachineError:
             if self.state != "migrated":
                 raise
+
+    def _execute_parallel_phase(
+        self,
+        prefix: str,
+        states: List[State],
+        parallelism: int,
+        collect_exceptions: bool = False,
+    ) -> None:
+        """
+        Enters the states given as soon as the states of the modules they
+        require are finished.
+
+        :param prefix: State name prefix of the phase
+        :param states: States of the phase
+        :param parallelism: Maximum number of states entered concurrently
+        :param collect_exceptions: Continue with states not requiring a failed
+                                   one and report all failures at once
+        :return: returns nothing
+        """
+
+        logger = get_logger()
+        state_names = [state.name for state in states]
+
+        pending_states = {
+            state.name: self._get_required_state_names(prefix, state.name, state_names)
+            for state in states
+        }
+
+        exceptions: Dict[str, BaseException] = {}
+        running_states: Dict[Future[None], str] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=parallelism, thread_name_prefix="rookify-state"
+        ) as executor:
+            while len(pending_states) > 0 or len(running_states) > 0:
+                if collect_exceptions or len(exceptions) < 1:
+                    for state_name in state_names:
+                        if (
+                            state_name not in pending_states
+                            or len(pending_states[state_name]) > 0
+                        ):
+                            continue
+
+                        del pending_states[state_name]
+
+                        logger.debug("Entering state '{0}'".format(state_name))
+
+                        running_states[
+                            executor.submit(self._enter_state_parallel, state_name)
+                        ] = state_name
+
+                if len(running_states) < 1:
+                    if len(exceptions) < 1:
+                        raise ModuleException(
+                            "Cyclic requirements of states: {0}".format(
+                                ", ".join(pending_states.keys())
+                            )
+                        )
+
+                    break
+
+                finished, _ = wait(running_states.keys(), return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    state_name = running_states.pop(future)
+                    exception = future.exception()
+
+                    if exception is not None:
+                        exceptions[state_name] = exception
+
+                        if collect_exceptions:
+                            self._skip_required_state(state_name, pending_states)
+
+                        continue
+
+                    for required_state_names in pending_states.values():
+                        if state_name in required_state_names:
+                            required_state_names.remove(state_name)
+
+        if len(exceptions) == 1:
+            raise next(iter(exceptions.values()))
+
+        if len(exceptions) > 1:
+            for state_name, exception in exceptions.items():
+                logger.error("State '{0}' failed: {1!s}".format(state_name, exception))
+
+            raise ModuleException(
+                "{0:d} states failed: {1}".format(
+                    len(exceptions),
+                    "; ".join(
+                        "{0}: {1!s}".format(state_name, exception)
+                        for state_name, exception in exceptions.items()
+                    ),
+                )
+            )
+
+    def _skip_required_state(
+        self, state_name: str, pending_states: Dict[str, List[str]]
+    ) -> None:
+        """
+        Removes all pending states requiring the failed state given.
+        """
+
+        failed_state_names = [state_name]
+
+        while len(failed_state_names) > 0:
+            failed_state_name = failed_state_names.pop()
+
+            for pending_state_name, required_state_names in list(
+                pending_states.items()
+            ):
+                if failed_state_name in required_state_names:
+                    get_logger().warn(
+                        "Skipping state '{0}' requiring failed state '{1}'".format(
+                            pending_state_name, failed_state_name
+                        )
+                    )
+
+                    del pending_states[pending_state_name]
+                    failed_state_names.append(pending_state_name)
+
+    def _enter_state_parallel(self, state_name: str) -> None:
+        state = self.get_state(state_name)
+        event_data = EventData(state, None, self, self, (), {})
+
+        self._state_entry.entered_at = monotonic()
+        self._state_entry.name = state_name
+
+        try:
+            state.enter(event_data)
         finally:
-            if pickle_file is not None:
-                get_logger().debug("Storing state data: {0}".format(states_data))
-                pickle_file.truncate(0)
+            state.exit(event_data)
 
-                Pickler(pickle_file).dump(states_data)
+            self._state_entry.entered_at = None
+            self._state_entry.name = None
+
+            self._sync_journal()
+
+    def _get_required_state_names(
+        self, prefix: str, state_name: str, state_names: List[str]
+    ) -> List[str]:
+        """
+        Returns the states of the phase given the state depends on. Modules
+        without a state in the phase are resolved to their requirements.
+        """
+
+        required_state_names: List[str] = []
+        names = list(self._state_requirements.get(state_name[len(prefix) :], []))
+        visited_names = set()
+
+        while len(names) > 0:
+            name = names.pop(0)
+
+            if name in visited_names:
+                continue
+
+            visited_names.add(name)
+
+            if prefix + name in state_names:
+                required_state_names.append(prefix + name)
+            else:
+                names.extend(self._state_requirements.get(name, []))
+
+        return required_state_names
+
+    def _sync_journal(self) -> None:
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.sync()
+
+    def _get_journal_file(self) -> str:
+        return "{0}.journal".format(self._machine_pickle_file)
+
+    def _open_journal(self) -> None:
+        """
+        Applies the records of a previous run, compacts them into the pickle
+        file and starts journaling tag changes.
+        """
+
+        journal = MachineJournal(self._get_journal_file())
+
+        for state_name, tag, value in journal.read():
+            self._set_state_data(state_name, {tag: value})
+
+        with self._journal_lock:
+            self._write_state_data()
+            journal.truncate()
+
+            journal.open()
+            self._journal = journal
+
+    def _close_journal(self) -> None:
+        with self._journal_lock:
+            # Tag values modified in-place are only stored by the final snapshot
+            self._write_state_data()
+
+            if self._journal is not None:
+                self._journal.truncate()
+                self._journal.close()
+                self._journal = None
+
+    def _compact_journal(self) -> None:
+        with self._journal_lock:
+            if self._journal is not None:
+                self._write_state_data()
+                self._journal.truncate()
+
+    def _write_state_data(self) -> None:
+        if self._machine_pickle_file is None:
+            return
+
+        # Sections not accessed since they were read are written unchanged
+        sections = dict(self._snapshot_sections)
+
+        for state_name, state_data in self._unregistered_states_data.items():
+            sections[state_name] = MachineSnapshotSection.encode(
+                state_data, self._snapshot_compression
+            )
+
+        for state_name in self.states:
+            state: Any = self.get_state(state_name)
+
+            if state_name in sections and not any(
+                tag in state.__dict__ for tag in state.tags
+            ):
+                continue
+
+            state_data = self._get_state_tags_data(state_name)
+
+            if len(state_data) > 0:
+                sections[state_name] = MachineSnapshotSection.encode(
+                    state_data, self._snapshot_compression
+                )
+
+        get_logger().debug(
+            "Storing state data of: {0}".format(", ".join(sections.keys()))
+        )
+
+        write_snapshot(self._machine_pickle_file, sections, self._get_run_id())
+
+    def _run_cleanup_callbacks(self) -> None:
+        while len(self._cleanup_callbacks) > 0:
+            callback = self._cleanup_callbacks.pop()
+
+            try:
+                callback()
+            except Exception as exc:
+                get_logger().warn("Cleanup failed: {0!r}".format(exc))
 
     def _get_state_tags_data(self, name: str) -> Dict[str, Any]:
         data = {}
@@ -95,6 +562,66 @@ class Machine(_Machine):  # type: ignore
     ) -> Any:
         return getattr(self.get_execution_state(name), tag, default_value)
 
+    def add_execution_progress(self, name: str, tag: str, *items: Any) -> None:
+        """
+        Records the items given as progress of the execution state. The
+        progress is durable once this method returns.
+
+        :param name: Name of the execution state without prefix
+        :param tag: Name of the progress tag
+        :param items: Items completed
+        :return: returns nothing
+        """
+
+        state_name = self._get_execution_progress_state_name(name, tag)
+        self.progress_store.add(state_name, tag, items)
+
+    def count_execution_progress(self, name: str, tag: str) -> int:
+        state_name = self._get_execution_progress_state_name(name, tag)
+        return self.progress_store.count(state_name, tag)
+
+    def get_execution_progress(self, name: str, tag: str) -> List[Any]:
+        state_name = self._get_execution_progress_state_name(name, tag)
+        return self.progress_store.get(state_name, tag)
+
+    def has_execution_progress(self, name: str, tag: str, item: Any) -> bool:
+        state_name = self._get_execution_progress_state_name(name, tag)
+        return self.progress_store.contains(state_name, tag, item)
+
+    def _get_execution_progress_state_name(self, name: str, tag: str) -> str:
+        state_name = self.__class__.STATE_NAME_EXECUTION_PREFIX + name
+
+        with self._journal_lock:
+            if (state_name, tag) not in self._progress_imported:
+                self._import_execution_progress(state_name, tag)
+                self._progress_imported.add((state_name, tag))
+
+        return state_name
+
+    def _import_execution_progress(self, state_name: str, tag: str) -> None:
+        """
+        Imports progress stored as a list tag by previous versions of rookify.
+        """
+
+        if state_name in self.states:
+            items = getattr(self.get_state(state_name), tag, None)
+        else:
+            if state_name in self._snapshot_sections:
+                self._unregistered_states_data[state_name] = (
+                    self._snapshot_sections.pop(state_name).decode()
+                )
+
+            items = self._unregistered_states_data.get(state_name, {}).get(tag)
+
+        if isinstance(items, list) and len(items) > 0:
+            get_logger().debug(
+                "Importing {0:d} progress items of '{1}' tag '{2}'".format(
+                    len(items), state_name, tag
+                )
+            )
+
+            self.progress_store.add(state_name, tag, items)
+
     def get_preflight_state(self, name: str) -> Any:
         state_name = self.__class__.STATE_NAME_PREFLIGHT_PREFIX + name
 
@@ -112,10 +639,55 @@ class Machine(_Machine):  # type: ignore
         self._register_states(self._preflight_states + self._execution_states)
 
         if self._machine_pickle_file is not None:
+            self._load_state_data()
+
+            for state_name, tag, value in MachineJournal(
+                self._get_journal_file()
+            ).read():
+                self._set_state_data(state_name, {tag: value})
+
+    def _load_state_data(self) -> None:
+        if self._machine_pickle_file is None or not os.path.exists(
+            self._machine_pickle_file
+        ):
+            return
+
+        if not is_snapshot_file(self._machine_pickle_file):
+            # Pickle files of previous versions are converted once written again
             with open(self._machine_pickle_file, "rb") as file:
-                file.seek(1)
+                file.seek(0, os.SEEK_END)
                 self._restore_state_data(file)
 
+            return
+
+        sections, run_id = read_snapshot(self._machine_pickle_file)
+
+        # Snapshots without one start a new run
+        if run_id is not None:
+            self._run_id = run_id
+
+        for state_name, section in sections.items():
+            self._snapshot_sections[state_name] = section
+
+            if state_name in self.states:
+                state: Any = self.get_state(state_name)
+                state.restore_tags = partial(self._restore_snapshot_section, state_name)
+
+    def _restore_snapshot_section(self, state_name: str) -> None:
+        with self._journal_lock:
+            section = self._snapshot_sections.pop(state_name, None)
+
+            if section is None:
+                return
+
+            state: Any = self.get_state(state_name)
+            state.restore_tags = None
+
+            for tag, value in section.decode().items():
+                # Values set since the snapshot was written are newer
+                if tag not in state.__dict__:
+                    object.__setattr__(state, tag, value)
+
     def _register_states(self, states: List[State]) -> None:
         logger = get_logger()
 
@@ -142,14 +714,23 @@ at the start.
         data = Unpickler(pickle_file).load()
 
         for state_name in data:
-            try:
-                state = self.get_state(state_name)
+            self._set_state_data(state_name, data[state_name])
 
-                for tag in data[state_name]:
-                    setattr(state, tag, data[state_name][tag])
-            except Exception as exc:
-                get_logger().debug(
-                    "Restoring state data failed for '{0}': {1!r}".format(
-                        state_name, exc
-                    )
-                )
+    def _set_state_data(self, state_name: str, state_data: Dict[str, Any]) -> None:
+        if state_name not in self.states and state_name in self._snapshot_sections:
+            self._unregistered_states_data[state_name] = self._snapshot_sections.pop(
+                state_name
+            ).decode()
+
+        try:
+            state = self.get_state(state_name)
+
+            for tag in state_data:
+                setattr(state, tag, state_data[tag])
+        except Exception as exc:
+            get_logger().debug(
+                "Restoring state data failed for '{0}': {1!r}".format(state_name, exc)
+            )
+
+            # Keep data of states not registered in this run, e.g. in dry-run mode
+            self._unregistered_states_data.setdefault(state_name, {}).update(state_data)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import os
+from dill import Pickler, Unpickler
+from pickle import UnpicklingError
+from threading import RLock
+from time import monotonic
+from typing import Any, IO, Iterator, Optional, Tuple
+from ..logger import get_logger
+
+
+class MachineJournal:
+    """
+    MachineJournal appends each change of a state tag as a small record to a
+    journal file. Records are flushed to the operating system immediately and
+    synced to disk in batches.
+    """
+
+    FSYNC_BATCH_SIZE = 16
+    FSYNC_INTERVAL = 1.0
+
+    def __init__(self, journal_file: str):
+        """
+        Construct a new 'MachineJournal' object.
+
+        :param journal_file: Path of the journal file
+        :return: returns nothing
+        """
+
+        self._file: Optional[IO[bytes]] = None
+        self._journal_file = journal_file
+        self._lock = RLock()
+        self._records_count = 0
+        self._synced_at = monotonic()
+        self._unsynced_records_count = 0
+
+    @property
+    def records_count(self) -> int:
+        """
+        Returns the number of records appended since the journal was truncated.
+        """
+
+        with self._lock:
+            return self._records_count
+
+    def open(self) -> None:
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._journal_file, "ab")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+
+                self._file.close()
+                self._file = None
+
+    def append(self, state_name: str, tag: str, value: Any) -> None:
+        """
+        Appends the value of the state tag given to the journal.
+
+        :param state_name: Name of the state
+        :param tag: Name of the tag
+        :param value: Value of the tag
+        :return: returns nothing
+        """
+
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Journal is not open")
+
+            Pickler(self._file).dump((state_name, tag, value))
+            self._file.flush()
+
+            self._records_count += 1
+            self._unsynced_records_count += 1
+
+            if (
+                self._unsynced_records_count >= self.__class__.FSYNC_BATCH_SIZE
+                or monotonic() - self._synced_at >= self.__class__.FSYNC_INTERVAL
+            ):
+                self.sync()
+
+    def read(self) -> Iterator[Tuple[str, str, Any]]:
+        """
+        Yields all records of the journal file in the order they were written.
+        A record torn by an interrupted write ends the journal.
+        """
+
+        if not os.path.exists(self._journal_file):
+            return
+
+        with open(self._journal_file, "rb") as file:
+            while True:
+                try:
+                    yield Unpickler(file).load()
+                except EOFError:
+                    break
+                except (UnpicklingError, ValueError) as exc:
+                    get_logger().warn(
+                        "Ignoring incomplete journal record: {0!r}".format(exc)
+                    )
+
+                    break
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._file is not None and self._unsynced_records_count > 0:
+                os.fsync(self._file.fileno())
+
+            self._synced_at = monotonic()
+            self._unsynced_records_count = 0
+
+    def truncate(self) -> None:
+        """
+        Removes all records, e.g. after they were compacted into a snapshot.
+        """
+
+        with self._lock:
+            if self._file is None:
+                with open(self._journal_file, "wb") as file:
+                    os.fsync(file.fileno())
+            else:
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+
+            self._records_count = 0
+            self._synced_at = monotonic()
+            self._unsynced_records_count = 0
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sqlite3
+from threading import RLock
+from time import time
+from typing import Any, Iterable, List, Optional
+from .exception import ModuleException
+
+SCHEMA_VERSION = 2
+
+
+class MachineProgressStore:
+    """
+    MachineProgressStore records each migrated item of a state tag as a row of
+    a local SQLite database. Every update is committed durably on its own.
+    """
+
+    def __init__(self, database_file: Optional[str] = None):
+        """
+        Construct a new 'MachineProgressStore' object.
+
+        :param database_file: Path of the SQLite database; defaults to an
+                              in-memory database
+        :return: returns nothing
+        """
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._database_file = database_file
+        self._lock = RLock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+
+            return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            ":memory:" if self._database_file is None else self._database_file,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = FULL")
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            connection.execute(
+                """
+CREATE TABLE IF NOT EXISTS progress (
+    state_name TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    item TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (state_name, tag, item)
+)
+                """
+            )
+
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS run (run_id TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+            connection.execute("PRAGMA user_version = {0:d}".format(SCHEMA_VERSION))
+
+        return connection
+
+    def add(self, state_name: str, tag: str, items: Iterable[Any]) -> None:
+        """
+        Records the items given in one transaction. Items already recorded are
+        ignored.
+
+        :param state_name: Name of the state
+        :param tag: Name of the tag
+        :param items: JSON serializable items
+        :return: returns nothing
+        """
+
+        created_at = time()
+
+        with self._lock, self.connection as connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            connection.executemany(
+                "INSERT OR IGNORE INTO progress VALUES (?, ?, ?, ?)",
+                [
+                    (state_name, tag, self._get_item_key(item), created_at)
+                    for item in items
+                ],
+            )
+
+    def open_run(self, run_id: str, reset: bool = False) -> None:
+        """
+        Binds the database to the migration run given. Progress of another run
+        is never used.
+
+        :param run_id: Identifier of the migration run
+        :param reset: Remove all progress recorded, e.g. for a new run
+        :return: returns nothing
+        """
+
+        with self._lock, self.connection as connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            row = connection.execute("SELECT run_id FROM run").fetchone()
+
+            if not reset and row is not None and row[0] != run_id:
+                raise ModuleException(
+                    "Progress database {0} belongs to the run '{1}' instead of '{2}'; remove it to start over".format(
+                        self._database_file, row[0], run_id
+                    )
+                )
+
+            if reset or row is None:
+                if reset:
+                    connection.execute("DELETE FROM progress")
+
+                connection.execute("DELETE FROM run")
+                connection.execute("INSERT INTO run VALUES (?, ?)", (run_id, time()))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def contains(self, state_name: str, tag: str, item: Any) -> bool:
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT 1 FROM progress WHERE state_name = ? AND tag = ? AND item = ?",
+                (state_name, tag, self._get_item_key(item)),
+            )
+
+            return cursor.fetchone() is not None
+
+    def count(self, state_name: str, tag: str) -> int:
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT COUNT(*) FROM progress WHERE state_name = ? AND tag = ?",
+                (state_name, tag),
+            )
+
+            count: int = cursor.fetchone()[0]
+            return count
+
+    def get(self, state_name: str, tag: str) -> List[Any]:
+        """
+        Returns the items recorded in the order they were added.
+
+        :param state_name: Name of the state
+        :param tag: Name of the tag
+        :return: returns the items
+        """
+
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT item FROM progress WHERE state_name = ? AND tag = ? ORDER BY rowid",
+                (state_name, tag),
+            )
+
+            return [json.loads(row[0]) for row in cursor]
+
+    @staticmethod
+    def _get_item_key(item: Any) -> str:
+        # Keys persist across runs and must not depend on the JSON backend
+        return json.dumps(item, sort_keys=True, ensure_ascii=True)
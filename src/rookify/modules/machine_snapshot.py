@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+import dill
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from .. import json_codec
+from .exception import ModuleException
+
+FORMAT_VERSION = 1
+MAGIC = b"RKFYSNAP"
+
+# Magic, format version and length of the JSON encoded index
+_HEADER = struct.Struct(">8sHI")
+
+
+class MachineSnapshotSection:
+    """
+    Encoded tag data of one state. Sections are only decoded on demand.
+    """
+
+    def __init__(self, data: bytes, encoding: str, compression: Optional[str]):
+        self.compression = compression
+        self.data = data
+        self.encoding = encoding
+
+    @classmethod
+    def encode(
+        cls, state_data: Dict[str, Any], compression: bool = True
+    ) -> "MachineSnapshotSection":
+        """
+        Encodes the tag data given with the stdlib pickle protocol. Data not
+        supported by it is encoded with dill instead.
+
+        :param state_data: Tag data of the state
+        :param compression: Compress the encoded data with zlib
+        :return: returns the section
+        """
+
+        try:
+            data = pickle.dumps(state_data, protocol=pickle.HIGHEST_PROTOCOL)
+            encoding = "pickle"
+        except (AttributeError, pickle.PicklingError, TypeError):
+            data = dill.dumps(state_data)
+            encoding = "dill"
+
+        if compression:
+            # The fastest level already shrinks Ceph reports considerably
+            return cls(zlib.compress(data, 1), encoding, "zlib")
+
+        return cls(data, encoding, None)
+
+    def decode(self) -> Dict[str, Any]:
+        data = self.data
+
+        if self.compression == "zlib":
+            data = zlib.decompress(data)
+        elif self.compression is not None:
+            raise ModuleException(
+                "Unsupported snapshot section compression: {0}".format(self.compression)
+            )
+
+        if self.encoding == "pickle":
+            state_data: Dict[str, Any] = pickle.loads(data)
+        elif self.encoding == "dill":
+            state_data = dill.loads(data)
+        else:
+            raise ModuleException(
+                "Unsupported snapshot section encoding: {0}".format(self.encoding)
+            )
+
+        return state_data
+
+
+def is_snapshot_file(file_name: str) -> bool:
+    with open(file_name, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_snapshot(
+    file_name: str,
+) -> Tuple[Dict[str, MachineSnapshotSection], Optional[str]]:
+    """
+    Reads the sections of the snapshot file given without decoding them.
+
+    :param file_name: Path of the snapshot file
+    :return: returns the sections by state name and the run identifier
+    """
+
+    with open(file_name, "rb") as file:
+        magic, version, index_length = _HEADER.unpack(file.read(_HEADER.size))
+
+        if magic != MAGIC:
+            raise ModuleException("{0} is not a snapshot file".format(file_name))
+
+        if version > FORMAT_VERSION:
+            raise ModuleException(
+                "Snapshot file {0} has the unsupported format version {1:d}".format(
+                    file_name, version
+                )
+            )
+
+        index = json_codec.loads(file.read(index_length))
+        sections = {}
+
+        for section_index in index["sections"]:
+            sections[section_index["name"]] = MachineSnapshotSection(
+                file.read(section_index["length"]),
+                section_index["encoding"],
+                section_index["compression"],
+            )
+
+        return sections, index.get("run_id")
+
+
+def write_snapshot(
+    file_name: str,
+    sections: Dict[str, MachineSnapshotSection],
+    run_id: Optional[str] = None,
+) -> None:
+    """
+    Replaces the snapshot file given atomically with the sections given.
+
+    :param file_name: Path of the snapshot file
+    :param sections: Sections by state name
+    :param run_id: Identifier of the migration run the snapshot belongs to
+    :return: returns nothing
+    """
+
+    index = {
+        "run_id": run_id,
+        "sections": [
+            {
+                "name": state_name,
+                "compression": section.compression,
+                "encoding": section.encoding,
+                "length": len(section.data),
+            }
+            for state_name, section in sections.items()
+        ],
+    }
+
+    index_data = json_codec.dumps(index).encode("utf-8")
+    temp_file_name = "{0}.tmp".format(file_name)
+
+    with open(temp_file_name, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index_data)))
+        file.write(index_data)
+
+        for section in sections.values():
+            file.write(section.data)
+
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temp_file_name, file_name)
+
+
+def convert_pickle_file(
+    pickle_file_name: str,
+    snapshot_file_name: Optional[str] = None,
+    compression: bool = True,
+) -> None:
+    """
+    Converts a machine pickle file written by previous versions of rookify.
+
+    :param pickle_file_name: Path of the dill pickle file
+    :param snapshot_file_name: Path of the snapshot file; defaults to replace
+                               the pickle file
+    :param compression: Compress the sections with zlib
+    :return: returns nothing
+    """
+
+    with open(pickle_file_name, "rb") as file:
+        states_data = dill.Unpickler(file).load()
+
+    write_snapshot(
+        pickle_file_name if snapshot_file_name is None else snapshot_file_name,
+        {
+            state_name: MachineSnapshotSection.encode(state_data, compression)
+            for state_name, state_data in states_data.items()
+        },
+    )
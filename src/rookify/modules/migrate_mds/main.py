@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from time import sleep
-from typing import Any, Dict
+from typing import Any, Dict, List
 from ..exception import ModuleException
 from ..machine import Machine
 from ..module import ModuleHandler
@@ -11,11 +10,10 @@ class MigrateMdsHandler(ModuleHandler):
     REQUIRES = ["migrate_mds_pools"]
 
     def preflight(self) -> None:
-        migrated_mds = self.machine.get_execution_state_data(
-            "MigrateMdsHandler", "migrated_mds", default_value=[]
-        )
-
-        if len(migrated_mds) > 0:
+        if (
+            self.machine.count_execution_progress("MigrateMdsHandler", "migrated_mds")
+            > 0
+        ):
             return
 
         self.k8s.check_nodes_for_initial_label_state(self.k8s.mds_placement_label)
@@ -33,14 +31,12 @@ class MigrateMdsHandler(ModuleHandler):
     def execute(self) -> None:
         state_data = self.machine.get_preflight_state("AnalyzeCephHandler").data
 
-        migrated_mds = self.machine.get_execution_state_data(
-            "MigrateMdsHandler", "migrated_mds", default_value=[]
-        )
-
-        migrated_mds_pools = self.machine.get_execution_state_data(
-            "MigrateMdsPoolsHandler", "migrated_mds_pools", default_value=[]
+        is_migration_required = (
+            self.machine.count_execution_progress(
+                "MigrateMdsPoolsHandler", "migrated_mds_pools"
+            )
+            > 0
         )
-        is_migration_required = len(migrated_mds_pools) > 0
 
         mds_hosts = list(state_data["node"]["ls"]["mds"].keys())
 
@@ -48,7 +44,7 @@ class MigrateMdsHandler(ModuleHandler):
         has_mds_standby_daemons = len(mds_hosts) > 1
 
         for mds_host in mds_hosts:
-            if mds_host in migrated_mds:
+            if self._is_mds_migrated(mds_host):
                 continue
 
             self.logger.info("Migrating ceph-mds daemon at host '{0}'".format(mds_host))
@@ -60,26 +56,29 @@ class MigrateMdsHandler(ModuleHandler):
             ):
                 self._disable_mds(mds_host)
 
+        if not is_migration_required:
+            # Without daemons to replace all nodes are labeled at once
+            self._set_mds_labels(
+                [
+                    mds_host
+                    for mds_host in mds_hosts
+                    if not self._is_mds_migrated(mds_host)
+                ]
+            )
+
+            return
+
         for mds_host in mds_hosts:
-            if mds_host in migrated_mds:
+            if self._is_mds_migrated(mds_host):
                 continue
 
-            if is_migration_required and (
-                mds_host == mds_hosts[0]
-                or (has_mds_standby_daemons and mds_host == mds_hosts[1])
+            if mds_host == mds_hosts[0] or (
+                has_mds_standby_daemons and mds_host == mds_hosts[1]
             ):
                 self._disable_mds(mds_host)
 
-            self._set_mds_label(mds_host)
-
-            migrated_mds.append(mds_host)
-
-            self.machine.get_execution_state(
-                "MigrateMdsHandler"
-            ).migrated_mds = migrated_mds
-
-            if is_migration_required:
-                self._enable_rook_based_mds(mds_host)
+            self._set_mds_labels([mds_host])
+            self._enable_rook_based_mds(mds_host)
 
     def _disable_mds(self, mds_host: str) -> None:
         result = self.ssh.command(
@@ -102,25 +101,46 @@ class MigrateMdsHandler(ModuleHandler):
             )
         )
 
-        while True:
-            result = self.ceph.mon_command("node ls")
+        self.wait_for(
+            "ceph-mds daemon at host '{0}' to disconnect".format(mds_host),
+            lambda: mds_host not in self.ceph.mon_command("node ls")["mds"],
+            maps=("fsmap",),
+        )
 
-            if mds_host not in result["mds"]:
-                break
+        self.logger.info("Disabled ceph-mds daemon at host '{0}'".format(mds_host))
 
-            sleep(2)
+    def _is_mds_migrated(self, mds_host: str) -> bool:
+        return self.machine.has_execution_progress(
+            "MigrateMdsHandler", "migrated_mds", mds_host
+        )
 
-        self.logger.info("Disabled ceph-mds daemon at host '{0}'".format(mds_host))
+    def _set_mds_labels(self, mds_hosts: List[str]) -> None:
+        failed_mds_hosts = []
+        labeled_mds_hosts = []
+
+        for mds_host, result in self.k8s.label_nodes(
+            mds_hosts, self.k8s.mds_placement_label
+        ).items():
+            if result.failed:
+                self.logger.error(
+                    "Failed to patch k8s for ceph-mds daemon node '{0}': {1!s}".format(
+                        mds_host, result.exception
+                    )
+                )
 
-    def _set_mds_label(self, mds_host: str) -> None:
-        node_patch = {"metadata": {"labels": {self.k8s.mds_placement_label: "true"}}}
+                failed_mds_hosts.append(mds_host)
+            else:
+                labeled_mds_hosts.append(mds_host)
 
-        if (
-            self.k8s.mds_placement_label
-            not in self.k8s.core_v1_api.patch_node(mds_host, node_patch).metadata.labels
-        ):
+        self.machine.add_execution_progress(
+            "MigrateMdsHandler", "migrated_mds", *labeled_mds_hosts
+        )
+
+        if len(failed_mds_hosts) > 0:
             raise ModuleException(
-                "Failed to patch k8s for ceph-mds daemon node '{0}'".format(mds_host)
+                "Failed to patch k8s for ceph-mds daemon nodes: {0}".format(
+                    ", ".join(failed_mds_hosts)
+                )
             )
 
     def _enable_rook_based_mds(self, mds_host: str) -> None:
@@ -130,13 +150,13 @@ class MigrateMdsHandler(ModuleHandler):
             )
         )
 
-        while True:
-            result = self.ceph.mon_command("node ls")
-
-            if mds_host in result["mds"]:
-                break
-
-            sleep(2)
+        self.wait_for(
+            "Rook based ceph-mds daemon at host '{0}'".format(mds_host),
+            lambda: mds_host in self.ceph.mon_command("node ls")["mds"],
+            maps=("fsmap",),
+            rook_daemon="rook-ceph-mds",
+            node_name=mds_host,
+        )
 
         self.logger.info(
             "Rook based ceph-mds daemon node '{0}' available".format(mds_host)
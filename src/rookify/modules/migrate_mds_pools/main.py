@@ -2,6 +2,7 @@
 
 from collections import OrderedDict
 from typing import Any, Dict
+from ..exception import ModuleException
 from ..machine import Machine
 from ..module import ModuleHandler
 
@@ -16,6 +17,8 @@ class MigrateMdsPoolsHandler(ModuleHandler):
             "MigrateMdsPoolsHandler", "pools", default_value={}
         )
 
+        unsupported_pools = []
+
         osd_pools = self.ceph.get_osd_pool_configurations_from_map(
             state_data["report"]["osdmap"]
         )
@@ -35,7 +38,9 @@ class MigrateMdsPoolsHandler(ModuleHandler):
                     )
                 )
 
-                self._handle_mds_metadata_pool_not_supported(mds_fs_data)
+                # Pools of incompatible MDS filesystems are handled as migrated ones
+                unsupported_pools.append(mds_fs_data["metadata_pool"])
+                unsupported_pools.extend(mds_fs_data["data_pools"])
 
                 continue
 
@@ -59,17 +64,65 @@ class MigrateMdsPoolsHandler(ModuleHandler):
 
         self.machine.get_preflight_state("MigrateMdsPoolsHandler").pools = pools
 
+        self.machine.get_preflight_state(
+            "MigrateMdsPoolsHandler"
+        ).unsupported_pools = unsupported_pools
+
     def execute(self) -> None:
         pools = self.machine.get_preflight_state("MigrateMdsPoolsHandler").pools
 
+        unsupported_pools = self.machine.get_preflight_state_data(
+            "MigrateMdsPoolsHandler", "unsupported_pools", default_value=[]
+        )
+
+        if len(unsupported_pools) > 0:
+            self.machine.add_execution_progress(
+                "MigrateMdsPoolsHandler", "migrated_pools", *unsupported_pools
+            )
+
+        pool_definitions = {}
+
         for pool in pools.values():
-            self._migrate_pool(pool)
+            if not self.machine.has_execution_progress(
+                "MigrateMdsPoolsHandler", "migrated_mds_pools", pool["name"]
+            ):
+                self.logger.info("Migrating ceph-mds pool '{0}'".format(pool["name"]))
+                pool_definitions[pool["name"]] = self._get_pool_definition(pool)
 
-    def get_readable_key_value_state(self) -> Dict[str, str]:
-        migrated_mds_pools = self.machine.get_execution_state_data(
-            "MigrateMdsPoolsHandler", "migrated_mds_pools", default_value=[]
-        )
+        failed_pools = []
+
+        for pool_name, _, exception in self.k8s.crd_api_apply_many(pool_definitions):
+            if exception is not None:
+                self.logger.error(
+                    "Migrating ceph-mds pool '{0}' failed: {1!s}".format(
+                        pool_name, exception
+                    )
+                )
+
+                failed_pools.append(pool_name)
+                continue
+
+            pool = pools[pool_name]
+
+            self.machine.add_execution_progress(
+                "MigrateMdsPoolsHandler",
+                "migrated_pools",
+                pool["metadata"],
+                *pool["data"],
+            )
+
+            self.machine.add_execution_progress(
+                "MigrateMdsPoolsHandler", "migrated_mds_pools", pool_name
+            )
+
+            self.logger.info("Migrated ceph-mds pool '{0}'".format(pool_name))
+
+        if len(failed_pools) > 0:
+            raise ModuleException(
+                "Migrating ceph-mds pools failed: {0}".format(", ".join(failed_pools))
+            )
 
+    def get_readable_key_value_state(self) -> Dict[str, str]:
         pools = self.machine.get_preflight_state_data(
             "MigrateMdsPoolsHandler", "pools", default_value={}
         )
@@ -81,41 +134,15 @@ class MigrateMdsPoolsHandler(ModuleHandler):
             kv_state_data[key_name] = self._get_readable_json_dump(pool)
 
             key_name = "ceph MDS pool {0} is created".format(pool["name"])
-            kv_state_data[key_name] = pool["name"] in migrated_mds_pools
+            kv_state_data[key_name] = self.machine.has_execution_progress(
+                "MigrateMdsPoolsHandler", "migrated_mds_pools", pool["name"]
+            )
 
         return kv_state_data
 
-    def _handle_mds_metadata_pool_not_supported(self, mds_fs_data: Any) -> None:
-        # Store pools for incompatible MDS filesystem as migrated ones
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateMdsPoolsHandler", "migrated_pools", default_value=[]
-        )
-
-        if mds_fs_data["metadata_pool"] not in migrated_pools:
-            migrated_pools.append(mds_fs_data["metadata_pool"])
-
-        for pool_data_osd_name in mds_fs_data["data_pools"]:
-            if pool_data_osd_name not in migrated_pools:
-                migrated_pools.append(pool_data_osd_name)
-
-        state = self.machine.get_execution_state("MigrateMdsPoolsHandler")
-        if state is not None:
-            state.migrated_pools = migrated_pools
-
-    def _migrate_pool(self, pool: Dict[str, Any]) -> None:
-        migrated_mds_pools = self.machine.get_execution_state_data(
-            "MigrateMdsPoolsHandler", "migrated_mds_pools", default_value=[]
-        )
-        if pool["name"] in migrated_mds_pools:
-            return
-
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateMdsPoolsHandler", "migrated_pools", default_value=[]
-        )
-
+    def _get_pool_definition(self, pool: Dict[str, Any]) -> Any:
         state_data = self.machine.get_preflight_state("AnalyzeCephHandler").data
 
-        self.logger.info("Migrating ceph-mds pool '{0}'".format(pool["name"]))
         osd_pool_configurations = pool["osd_pool_configurations"]
 
         pool_metadata_osd_configuration = osd_pool_configurations[pool["metadata"]]
@@ -158,27 +185,7 @@ class MigrateMdsPoolsHandler(ModuleHandler):
             "filesystem.yaml.j2", **filesystem_definition_values
         )
 
-        self.k8s.crd_api_apply(pool_definition.yaml)
-
-        if pool["name"] not in migrated_mds_pools:
-            migrated_mds_pools.append(pool["name"])
-
-        self.machine.get_execution_state(
-            "MigrateMdsPoolsHandler"
-        ).migrated_mds_pools = migrated_mds_pools
-
-        if pool["metadata"] not in migrated_pools:
-            migrated_pools.append(pool["metadata"])
-
-        for pool_data_osd_name in pool["data"]:
-            if pool_data_osd_name not in migrated_pools:
-                migrated_pools.append(pool_data_osd_name)
-
-        self.machine.get_execution_state(
-            "MigrateMdsPoolsHandler"
-        ).migrated_pools = migrated_pools
-
-        self.logger.info("Migrated ceph-mds pool '{0}'".format(pool["name"]))
+        return pool_definition.yaml
 
     @staticmethod
     def register_execution_state(
@@ -193,5 +200,5 @@ class MigrateMdsPoolsHandler(ModuleHandler):
         machine: Machine, state_name: str, handler: ModuleHandler, **kwargs: Any
     ) -> None:
         ModuleHandler.register_preflight_state(
-            machine, state_name, handler, tags=["pools"]
+            machine, state_name, handler, tags=["pools", "unsupported_pools"]
         )
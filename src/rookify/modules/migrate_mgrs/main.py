@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-from time import sleep
 from typing import Any, Dict
 from ..exception import ModuleException
 from ..machine import Machine
@@ -11,10 +10,10 @@ class MigrateMgrsHandler(ModuleHandler):
     REQUIRES = ["migrate_mons"]
 
     def preflight(self) -> None:
-        migrated_mgrs = self.machine.get_execution_state_data(
-            "MigrateMgrsHandler", "migrated_mgrs", default_value=[]
-        )
-        if len(migrated_mgrs) > 0:
+        if (
+            self.machine.count_execution_progress("MigrateMgrsHandler", "migrated_mgrs")
+            > 0
+        ):
             return
 
         self.k8s.check_nodes_for_initial_label_state(self.k8s.mgr_placement_label)
@@ -35,10 +34,9 @@ class MigrateMgrsHandler(ModuleHandler):
         }
 
     def _migrate_mgr(self, mgr_host: str) -> None:
-        migrated_mgrs = self.machine.get_execution_state_data(
-            "MigrateMgrsHandler", "migrated_mgrs", default_value=[]
-        )
-        if mgr_host in migrated_mgrs:
+        if self.machine.has_execution_progress(
+            "MigrateMgrsHandler", "migrated_mgrs", mgr_host
+        ):
             return
 
         self.logger.info("Migrating ceph-mgr daemon at host'{0}'".format(mgr_host))
@@ -63,13 +61,11 @@ class MigrateMgrsHandler(ModuleHandler):
             )
         )
 
-        while True:
-            result = self.ceph.mon_command("node ls")
-
-            if mgr_host not in result["mgr"]:
-                break
-
-            sleep(2)
+        self.wait_for(
+            "ceph-mgr daemon '{0}' to disconnect".format(mgr_host),
+            lambda: mgr_host not in self.ceph.mon_command("node ls")["mgr"],
+            maps=("mgrmap",),
+        )
 
         self.logger.info(
             "Disabled ceph-mgr daemon '{0}' and enabling Rook based daemon".format(
@@ -77,21 +73,20 @@ class MigrateMgrsHandler(ModuleHandler):
             )
         )
 
-        node_patch = {"metadata": {"labels": {self.k8s.mgr_placement_label: "true"}}}
+        result = self.k8s.label_nodes([mgr_host], self.k8s.mgr_placement_label)[
+            mgr_host
+        ]
 
-        if (
-            self.k8s.mgr_placement_label
-            not in self.k8s.core_v1_api.patch_node(mgr_host, node_patch).metadata.labels
-        ):
+        if result.failed:
             raise ModuleException(
-                "Failed to patch k8s for ceph-mgr daemon node '{0}'".format(mgr_host)
+                "Failed to patch k8s for ceph-mgr daemon node '{0}': {1!s}".format(
+                    mgr_host, result.exception
+                )
             )
 
-        migrated_mgrs.append(mgr_host)
-
-        self.machine.get_execution_state(
-            "MigrateMgrsHandler"
-        ).migrated_mgrs = migrated_mgrs
+        self.machine.add_execution_progress(
+            "MigrateMgrsHandler", "migrated_mgrs", mgr_host
+        )
 
         mgr_count_expected = self.machine.get_preflight_state_data(
             "CreateRookClusterHandler", "mgr_count", default_value=3
@@ -103,12 +98,13 @@ class MigrateMgrsHandler(ModuleHandler):
             )
         )
 
-        while True:
-            result = self.ceph.mon_command("node ls")
-            if len(result["mgr"]) >= mgr_count_expected:
-                break
-
-            sleep(2)
+        self.wait_for(
+            "{0:d} ceph-mgr daemons".format(mgr_count_expected),
+            lambda: len(self.ceph.mon_command("node ls")["mgr"]) >= mgr_count_expected,
+            maps=("mgrmap",),
+            rook_daemon="rook-ceph-mgr",
+            node_name=mgr_host,
+        )
 
         self.logger.info(
             "{0:d} ceph-mgr daemons are available".format(mgr_count_expected)
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from time import sleep
-from typing import Any, Dict
+from typing import Any, Dict, List
 from ..exception import ModuleException
 from ..machine import Machine
 from ..module import ModuleHandler
@@ -11,10 +10,10 @@ class MigrateMonsHandler(ModuleHandler):
     REQUIRES = ["analyze_ceph", "create_rook_cluster"]
 
     def preflight(self) -> None:
-        migrated_mons = self.machine.get_execution_state_data(
-            "MigrateMonsHandler", "migrated_mons", default_value=[]
-        )
-        if len(migrated_mons) > 0:
+        if (
+            self.machine.count_execution_progress("MigrateMonsHandler", "migrated_mons")
+            > 0
+        ):
             return
 
         self.k8s.check_nodes_for_initial_label_state(self.k8s.mon_placement_label)
@@ -22,11 +21,11 @@ class MigrateMonsHandler(ModuleHandler):
     def execute(self) -> None:
         state_data = self.machine.get_preflight_state("AnalyzeCephHandler").data
 
-        migrated_mons = self.machine.get_execution_state_data(
-            "MigrateMonsHandler", "migrated_mons", default_value=[]
+        migrated_mons_count = self.machine.count_execution_progress(
+            "MigrateMonsHandler", "migrated_mons"
         )
 
-        if len(migrated_mons) >= len(state_data["report"]["monmap"]["mons"]):
+        if migrated_mons_count >= len(state_data["report"]["monmap"]["mons"]):
             return
 
         for mon in state_data["report"]["monmap"]["mons"]:
@@ -41,11 +40,14 @@ class MigrateMonsHandler(ModuleHandler):
             )
         }
 
+    def _get_quorum_names(self) -> List[str]:
+        result = self.ceph.mon_command("mon stat")
+        return [quorum_details["name"] for quorum_details in result["quorum"]]
+
     def _migrate_mon(self, mon: Dict[str, Any]) -> None:
-        migrated_mons = self.machine.get_execution_state_data(
-            "MigrateMonsHandler", "migrated_mons", default_value=[]
-        )
-        if mon["name"] in migrated_mons:
+        if self.machine.has_execution_progress(
+            "MigrateMonsHandler", "migrated_mons", mon["name"]
+        ):
             return
 
         self.logger.info("Migrating ceph-mon daemon '{0}'".format(mon["name"]))
@@ -70,16 +72,11 @@ class MigrateMonsHandler(ModuleHandler):
             )
         )
 
-        while True:
-            result = self.ceph.mon_command("mon stat")
-            quorum_names = [
-                quorum_details["name"] for quorum_details in result["quorum"]
-            ]
-
-            if mon["name"] not in quorum_names:
-                break
-
-            sleep(2)
+        self.wait_for(
+            "ceph-mon daemon '{0}' to leave the quorum".format(mon["name"]),
+            lambda: mon["name"] not in self._get_quorum_names(),
+            maps=("monmap", "quorum"),
+        )
 
         self.logger.info("Disabled ceph-mon daemon '{0}'".format(mon["name"]))
 
@@ -89,25 +86,20 @@ class MigrateMonsHandler(ModuleHandler):
             "Enabling Rook based ceph-mon daemon at node '{0}'".format(mon["name"])
         )
 
-        node_patch = {"metadata": {"labels": {self.k8s.mon_placement_label: "true"}}}
+        result = self.k8s.label_nodes([mon["name"]], self.k8s.mon_placement_label)[
+            mon["name"]
+        ]
 
-        if (
-            self.k8s.mon_placement_label
-            not in self.k8s.core_v1_api.patch_node(
-                mon["name"], node_patch
-            ).metadata.labels
-        ):
+        if result.failed:
             raise ModuleException(
-                "Failed to patch k8s for ceph-mon daemon at node '{0}'".format(
-                    mon["name"]
+                "Failed to patch k8s for ceph-mon daemon at node '{0}': {1!s}".format(
+                    mon["name"], result.exception
                 )
             )
 
-        migrated_mons.append(mon["name"])
-
-        self.machine.get_execution_state(
-            "MigrateMonsHandler",
-        ).migrated_mons = migrated_mons
+        self.machine.add_execution_progress(
+            "MigrateMonsHandler", "migrated_mons", mon["name"]
+        )
 
         mon_count_expected = self.machine.get_preflight_state_data(
             "CreateRookClusterHandler", "mon_count", default_value=3
@@ -117,12 +109,13 @@ class MigrateMonsHandler(ModuleHandler):
             "Waiting for a quorum of {0:d} ceph-mon daemons".format(mon_count_expected)
         )
 
-        while True:
-            result = self.ceph.mon_command("mon stat")
-            if len(result["quorum"]) >= mon_count_expected:
-                break
-
-            sleep(2)
+        self.wait_for(
+            "a quorum of {0:d} ceph-mon daemons".format(mon_count_expected),
+            lambda: len(self._get_quorum_names()) >= mon_count_expected,
+            maps=("monmap", "quorum"),
+            rook_daemon="rook-ceph-mon",
+            node_name=mon["name"],
+        )
 
         self.logger.info(
             "Quorum of {0:d} ceph-mon daemons successful".format(mon_count_expected)
@@ -2,6 +2,7 @@
 
 from collections import OrderedDict
 from typing import Any, Dict, List
+from ..exception import ModuleException
 from ..machine import Machine
 from ..module import ModuleHandler
 
@@ -15,21 +16,43 @@ class MigrateOSDPoolsHandler(ModuleHandler):
     ]
 
     def execute(self) -> None:
-        pools = self._get_filtered_osd_pools_list()
+        pool_definitions = {}
 
-        for pool in pools:
-            self._migrate_pool(pool)
+        for pool in self._get_filtered_osd_pools_list():
+            if not self.machine.has_execution_progress(
+                "MigrateOSDPoolsHandler", "migrated_pools", pool["pool_name"]
+            ):
+                self.logger.info(
+                    "Migrating ceph-osd pool '{0}'".format(pool["pool_name"])
+                )
 
-    def _get_filtered_osd_pools_list(self) -> List[Dict[str, Any]]:
-        migrated_mds_pools = self.machine.get_execution_state_data(
-            name="MigrateMdsPoolsHandler", tag="migrated_pools", default_value=[]
-        )
-        migrated_rgw_pools = self.machine.get_execution_state_data(
-            name="MigrateRgwPoolsHandler", tag="migrated_pools", default_value=[]
-        )
+                pool_definitions[pool["pool_name"]] = self._get_pool_definition(pool)
+
+        failed_pools = []
+
+        for pool_name, _, exception in self.k8s.crd_api_apply_many(pool_definitions):
+            if exception is not None:
+                self.logger.error(
+                    "Migrating ceph-osd pool '{0}' failed: {1!s}".format(
+                        pool_name, exception
+                    )
+                )
+
+                failed_pools.append(pool_name)
+                continue
+
+            self.machine.add_execution_progress(
+                "MigrateOSDPoolsHandler", "migrated_pools", pool_name
+            )
 
-        migrated_pools = migrated_mds_pools + migrated_rgw_pools
+            self.logger.info("Migrated ceph-osd pool '{0}'".format(pool_name))
 
+        if len(failed_pools) > 0:
+            raise ModuleException(
+                "Migrating ceph-osd pools failed: {0}".format(", ".join(failed_pools))
+            )
+
+    def _get_filtered_osd_pools_list(self) -> List[Dict[str, Any]]:
         state_data = self.machine.get_preflight_state("AnalyzeCephHandler").data
 
         osd_pool_configurations = self.ceph.get_osd_pool_configurations_from_map(
@@ -39,19 +62,20 @@ class MigrateOSDPoolsHandler(ModuleHandler):
         pools = []
 
         for pool in osd_pool_configurations.values():
-            if (
-                not pool["pool_name"].startswith(".")
-                and pool["pool_name"] not in migrated_pools
+            if not (
+                pool["pool_name"].startswith(".")
+                or self.machine.has_execution_progress(
+                    "MigrateMdsPoolsHandler", "migrated_pools", pool["pool_name"]
+                )
+                or self.machine.has_execution_progress(
+                    "MigrateRgwPoolsHandler", "migrated_pools", pool["pool_name"]
+                )
             ):
                 pools.append(pool)
 
         return pools
 
     def get_readable_key_value_state(self) -> Dict[str, str]:
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateOSDPoolsHandler", "migrated_pools", default_value=[]
-        )
-
         pools = self._get_filtered_osd_pools_list()
 
         kv_state_data = OrderedDict()
@@ -61,20 +85,13 @@ class MigrateOSDPoolsHandler(ModuleHandler):
             kv_state_data[key_name] = self._get_readable_json_dump(pool)
 
             key_name = "ceph OSD pool {0} is created".format(pool["pool_name"])
-            kv_state_data[key_name] = pool["pool_name"] in migrated_pools
+            kv_state_data[key_name] = self.machine.has_execution_progress(
+                "MigrateOSDPoolsHandler", "migrated_pools", pool["pool_name"]
+            )
 
         return kv_state_data
 
-    def _migrate_pool(self, pool: Dict[str, Any]) -> None:
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateOSDPoolsHandler", "migrated_pools", default_value=[]
-        )
-
-        if pool["pool_name"] in migrated_pools:
-            return
-
-        self.logger.info("Migrating ceph-osd pool '{0}'".format(pool["pool_name"]))
-
+    def _get_pool_definition(self, pool: Dict[str, Any]) -> Any:
         pool_definition_values = {
             "cluster_namespace": self._config["rook"]["cluster"]["namespace"],
             "name": pool["pool_name"],
@@ -92,14 +109,7 @@ class MigrateOSDPoolsHandler(ModuleHandler):
         # Render cluster config from template
         pool_definition = self.load_template("pool.yaml.j2", **pool_definition_values)
 
-        self.k8s.crd_api_apply(pool_definition.yaml)
-        migrated_pools.append(pool["pool_name"])
-
-        self.machine.get_execution_state(
-            "MigrateOSDPoolsHandler"
-        ).migrated_pools = migrated_pools
-
-        self.logger.info("Migrated ceph-osd pool '{0}'".format(pool["pool_name"]))
+        return pool_definition.yaml
 
     @staticmethod
     def register_execution_state(
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from collections import OrderedDict
-from time import sleep
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+from ... import json_codec
 from ..exception import ModuleException
 from ..machine import Machine
 from ..module import ModuleHandler
@@ -20,38 +20,67 @@ class MigrateOSDsHandler(ModuleHandler):
             for osd_data in state_data["report"]["osd_metadata"]
         }
 
+        unresolved_osd_hosts = []
+
         for osd_host, osds in state_data["node"]["ls"]["osd"].items():
             osd_devices[osd_host] = {}
 
-            """
-            Read OSD metadata to get OSD fsid UUID.
-            From there we try to get the encrypted volume partition UUID for later use in Rook.
-            """
             for osd_id in osds:
                 if osd_id not in osd_metadata:
                     raise ModuleException(
                         "Found Ceph OSD ID {0} without metadata".format(osd_id)
                     )
 
-                osd_data = osd_metadata[osd_id]
+                osd_device_path = self._get_osd_device_path_of_metadata(
+                    osd_metadata[osd_id]
+                )
+
+                if osd_device_path is None:
+                    if osd_host not in unresolved_osd_hosts:
+                        unresolved_osd_hosts.append(osd_host)
+                else:
+                    osd_devices[osd_host][osd_id] = osd_device_path
+
+        # Only hosts with OSDs of ambiguous metadata need to be queried via SSH
+        host_inventories = self._get_host_inventories(unresolved_osd_hosts)
 
-                result = self.ssh.command(
-                    osd_host,
-                    "sudo pvdisplay -c /dev/{0}".format(osd_data["devices"]),
+        for osd_host, osds in state_data["node"]["ls"]["osd"].items():
+            if osd_host not in unresolved_osd_hosts:
+                self.logger.debug(
+                    "Analyzed {0:d} Ceph OSD(s) on host '{1}' based on metadata".format(
+                        len(osds), osd_host
+                    )
                 )
 
-                if result.failed:
-                    raise ModuleException("")
+                continue
 
-                osd_vg_name = result.stdout.split(":")[1]
+            physical_volumes = host_inventories[osd_host]["physical_volumes"]
+
+            """
+            Read OSD metadata to get OSD fsid UUID.
+            From there we try to get the encrypted volume partition UUID for later use in Rook.
+            """
+            for osd_id in osds:
+                if osd_id in osd_devices[osd_host]:
+                    continue
+
+                pv_path = "/dev/{0}".format(osd_metadata[osd_id]["devices"])
+
+                if pv_path not in physical_volumes:
+                    raise ModuleException(
+                        "Physical volume {0} of Ceph OSD ID {1} not found on host '{2}'".format(
+                            pv_path, osd_id, osd_host
+                        )
+                    )
+
+                osd_vg_name = physical_volumes[pv_path]["vg_name"]
 
                 if osd_vg_name.startswith("ceph-"):
                     osd_vg_name = osd_vg_name[5:]
 
                 osd_device_path = "/dev/ceph-{0}/osd-block-{0}".format(osd_vg_name)
 
-                if osd_id not in osd_devices[osd_host]:
-                    osd_devices[osd_host][osd_id] = osd_device_path
+                osd_devices[osd_host][osd_id] = osd_device_path
 
             self.logger.debug(
                 "Analyzed {0:d} Ceph OSD(s) on host '{1}'".format(len(osds), osd_host)
@@ -59,6 +88,116 @@ class MigrateOSDsHandler(ModuleHandler):
 
         return osd_devices
 
+    def _get_osd_device_path_of_metadata(
+        self, osd_data: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Returns the logical volume path of a Ceph OSD based on its metadata only.
+        None is returned if the metadata does not name the OSD block device
+        unambiguously.
+        """
+
+        if "," in osd_data.get("devices", ""):
+            return None
+
+        for key in ("bluestore_bdev_partition_path", "bluestore_bdev_dev_node"):
+            device_path = str(osd_data.get(key, ""))
+
+            if device_path.startswith("/dev/mapper/"):
+                # Device mapper names escape "-" of the VG and LV names as "--"
+                dm_name_parts = device_path[12:].replace("--", "\0").split("-", 1)
+
+                if len(dm_name_parts) != 2:
+                    continue
+
+                device_path = "/dev/{0}/{1}".format(
+                    *[part.replace("\0", "-") for part in dm_name_parts]
+                )
+
+            device_path_parts = device_path.split("/")
+
+            if (
+                len(device_path_parts) == 4
+                and device_path_parts[2].startswith("ceph-")
+                and device_path_parts[3].startswith("osd-block-")
+            ):
+                return device_path
+
+        return None
+
+    def _get_host_inventories(
+        self, osd_hosts: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the LVM, ceph-volume and systemd inventory of the Ceph OSD hosts
+        given or all of them. Each host is queried once with a single remote
+        script and the result is cached in the preflight state.
+        """
+
+        state = self.machine.get_preflight_state("MigrateOSDsHandler")
+        host_inventories: Dict[str, Dict[str, Any]] = getattr(
+            state, "osd_host_inventories", {}
+        )
+
+        state_data = self.machine.get_preflight_state("AnalyzeCephHandler").data
+
+        commands = {}
+
+        for osd_host, osds in state_data["node"]["ls"]["osd"].items():
+            if osd_host in host_inventories or (
+                osd_hosts is not None and osd_host not in osd_hosts
+            ):
+                continue
+
+            script = self.load_template(
+                "host_inventory.py.j2",
+                osd_systemd_units=[
+                    self.ceph.get_systemd_osd_file_name(osd_host, osd_id)
+                    for osd_id in osds
+                ],
+            )
+
+            commands[osd_host] = (
+                "sudo python3 - <<'ROOKIFY_EOF'\n{0}\nROOKIFY_EOF".format(script.raw)
+            )
+
+        # Collecting the inventory is read-only and safe to retry
+        results = self.ssh.commands_on_hosts(commands, retry=True)
+
+        for osd_host, result in results.items():
+            if result.failed:
+                raise ModuleException(
+                    "Collecting inventory of host '{0}' failed: {1}".format(
+                        osd_host, result.stderr
+                    )
+                )
+
+            try:
+                host_inventory = json_codec.loads(result.stdout)
+            except ValueError as exc:
+                raise ModuleException(
+                    "Inventory of host '{0}' is invalid: {1}".format(osd_host, exc)
+                )
+
+            for inventory_name, error in host_inventory["errors"].items():
+                self.logger.debug(
+                    "Inventory of host '{0}' is missing {1}: {2}".format(
+                        osd_host, inventory_name, error
+                    )
+                )
+
+            self.logger.debug(
+                "Collected inventory of host '{0}' in {1:.2f}s".format(
+                    osd_host, result.duration
+                )
+            )
+
+            host_inventories[osd_host] = host_inventory
+
+        state.osd_host_inventories = host_inventories
+
+        return host_inventories
+
     def _get_nodes_osd_devices(self, osd_ids: List[str]) -> List[Dict[str, Any]]:
         osd_host_devices = self.machine.get_preflight_state(
             "MigrateOSDsHandler"
@@ -132,64 +271,72 @@ class MigrateOSDsHandler(ModuleHandler):
         return kv_state_data
 
     def migrate_osds(self, host: str, osd_ids: List[int]) -> None:
-        migrated_osd_ids = self.machine.get_execution_state_data(
-            "MigrateOSDsHandler", "migrated_osd_ids", default_value=[]
-        )
-
         self.logger.info("Migrating ceph-osd host '{0}'".format(host))
 
-        node_patch = {"metadata": {"labels": {self.k8s.osd_placement_label: "true"}}}
+        label_result = self.k8s.label_nodes([host], self.k8s.osd_placement_label)[host]
 
-        if (
-            self.k8s.osd_placement_label
-            not in self.k8s.core_v1_api.patch_node(host, node_patch).metadata.labels
-        ):
+        if label_result.failed:
             raise ModuleException(
-                "Failed to patch k8s for ceph-osd node '{0}'".format(host)
+                "Failed to patch k8s for ceph-osd node '{0}': {1!s}".format(
+                    host, label_result.exception
+                )
             )
 
         for osd_id in osd_ids:
-            if osd_id in migrated_osd_ids:
+            if self.machine.has_execution_progress(
+                "MigrateOSDsHandler", "migrated_osd_ids", osd_id
+            ):
                 return
 
-            self.logger.debug(
-                "Migrating ceph-osd daemon '{0}@{1:d}'".format(host, osd_id)
+        self.logger.debug(
+            "Migrating ceph-osd daemons '{0}@{1}'".format(
+                host, ",".join(str(osd_id) for osd_id in osd_ids)
             )
+        )
 
-            result = self.ssh.command(
-                host,
-                "sudo systemctl disable --now {0}".format(
+        result = self.ssh.command(
+            host,
+            "sudo systemctl disable --now {0}".format(
+                " ".join(
                     self.ceph.get_systemd_osd_file_name(host, osd_id)
-                ),
-            )
-
-            if result.failed:
-                raise ModuleException(
-                    "Disabling original ceph-osd daemon '{0}@{1:d}' failed: {2}".format(
-                        host, osd_id, result.stderr
-                    )
+                    for osd_id in osd_ids
                 )
+            ),
+        )
 
-            self.logger.debug(
-                "Waiting for disabled original ceph-osd daemon '{0}@{1:d}' to disconnect".format(
-                    host, osd_id
+        if result.failed:
+            raise ModuleException(
+                "Disabling original ceph-osd daemons at host '{0}' failed: {1}".format(
+                    host, result.stderr
                 )
             )
 
-            while True:
-                osd_status = self.ceph.mon_command("osd info", id=osd_id)
-
-                if osd_status["up"] == 0:
-                    break
+        self.logger.debug(
+            "Waiting for disabled original ceph-osd daemons at host '{0}' to disconnect".format(
+                host
+            )
+        )
 
-                sleep(2)
+        self.wait_for(
+            "ceph-osd daemons at host '{0}' to disconnect".format(host),
+            lambda: not any(
+                osd_state["up"]
+                for osd_state in self.ceph.get_osds_state(osd_ids).values()
+            ),
+            maps=("osdmap",),
+        )
 
+        for osd_id in osd_ids:
             self.logger.info(
                 "Disabled ceph-osd daemon '{0}@{1:d}'".format(host, osd_id)
             )
 
         self.logger.info("Enabling Rook based ceph-osd node '{0}'".format(host))
 
+        migrated_osd_ids = self.machine.get_execution_progress(
+            "MigrateOSDsHandler", "migrated_osd_ids"
+        )
+
         nodes_osd_devices = self._get_nodes_osd_devices(migrated_osd_ids + osd_ids)
 
         cluster_patch_templated = self.load_template(
@@ -206,28 +353,26 @@ class MigrateOSDsHandler(ModuleHandler):
             body=cluster_patch_templated.yaml,
         )
 
-        for osd_id in osd_ids:
-            migrated_osd_ids.append(osd_id)
-
-        self.machine.get_execution_state(
-            "MigrateOSDsHandler"
-        ).migrated_osd_ids = migrated_osd_ids
-
-        for osd_id in osd_ids:
-            self.logger.debug(
-                "Waiting for Rook based ceph-osd daemon '{0}@{1:d}'".format(
-                    host, osd_id
-                )
-            )
-
-            while True:
-                osd_status = self.ceph.mon_command("osd info", id=osd_id)
+        self.machine.add_execution_progress(
+            "MigrateOSDsHandler", "migrated_osd_ids", *osd_ids
+        )
 
-                if osd_status["up"] != 0:
-                    break
+        self.logger.debug(
+            "Waiting for Rook based ceph-osd daemons at host '{0}'".format(host)
+        )
 
-                sleep(2)
+        self.wait_for(
+            "Rook based ceph-osd daemons at host '{0}'".format(host),
+            lambda: all(
+                osd_state["up"]
+                for osd_state in self.ceph.get_osds_state(osd_ids).values()
+            ),
+            maps=("osdmap",),
+            rook_daemon="rook-ceph-osd",
+            node_name=host,
+        )
 
+        for osd_id in osd_ids:
             self.logger.info(
                 "Rook based ceph-osd daemon '{0}@{1:d}' available".format(host, osd_id)
             )
@@ -245,5 +390,8 @@ class MigrateOSDsHandler(ModuleHandler):
         machine: Machine, state_name: str, handler: ModuleHandler, **kwargs: Any
     ) -> None:
         ModuleHandler.register_preflight_state(
-            machine, state_name, handler, tags=["osd_host_devices"]
+            machine,
+            state_name,
+            handler,
+            tags=["osd_host_devices", "osd_host_inventories"],
         )
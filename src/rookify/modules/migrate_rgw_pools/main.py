@@ -70,14 +70,49 @@ class MigrateRgwPoolsHandler(ModuleHandler):
     def execute(self) -> None:
         zones = self.machine.get_preflight_state("MigrateRgwPoolsHandler").zones
 
+        zone_definitions = {}
+
         for zone_name, zone_data in zones.items():
-            self._migrate_zone(zone_name, zone_data)
+            if not self.machine.has_execution_progress(
+                "MigrateRgwPoolsHandler", "migrated_zones", zone_name
+            ):
+                self.logger.info("Migrating ceph-rgw zone '{0}'".format(zone_name))
 
-    def get_readable_key_value_state(self) -> Dict[str, str]:
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateRgwPoolsHandler", "migrated_pools", default_value=[]
-        )
+                zone_definitions[zone_name] = self._get_zone_definition(
+                    zone_name, zone_data
+                )
+
+        failed_zones = []
+
+        for zone_name, _, exception in self.k8s.crd_api_apply_many(zone_definitions):
+            if exception is not None:
+                self.logger.error(
+                    "Migrating ceph-rgw zone '{0}' failed: {1!s}".format(
+                        zone_name, exception
+                    )
+                )
+
+                failed_zones.append(zone_name)
+                continue
+
+            self.machine.add_execution_progress(
+                "MigrateRgwPoolsHandler",
+                "migrated_pools",
+                *zones[zone_name]["osd_pools"].keys(),
+            )
+
+            self.machine.add_execution_progress(
+                "MigrateRgwPoolsHandler", "migrated_zones", zone_name
+            )
+
+            self.logger.info("Migrated ceph-rgw zone '{0}'".format(zone_name))
 
+        if len(failed_zones) > 0:
+            raise ModuleException(
+                "Migrating ceph-rgw zones failed: {0}".format(", ".join(failed_zones))
+            )
+
+    def get_readable_key_value_state(self) -> Dict[str, str]:
         zones = self.machine.get_preflight_state_data(
             "MigrateRgwPoolsHandler", "zones", default_value={}
         )
@@ -90,23 +125,13 @@ class MigrateRgwPoolsHandler(ModuleHandler):
                 kv_state_data[key_name] = self._get_readable_json_dump(osd_pool)
 
                 key_name = "ceph RGW pool {0} is created".format(osd_pool["pool_name"])
-                kv_state_data[key_name] = osd_pool["pool_name"] in migrated_pools
+                kv_state_data[key_name] = self.machine.has_execution_progress(
+                    "MigrateRgwPoolsHandler", "migrated_pools", osd_pool["pool_name"]
+                )
 
         return kv_state_data
 
-    def _migrate_zone(self, zone_name: str, zone_data: Dict[str, Any]) -> None:
-        migrated_zones = self.machine.get_execution_state_data(
-            "MigrateRgwPoolsHandler", "migrated_zones", default_value=[]
-        )
-        if zone_name in migrated_zones:
-            return
-
-        migrated_pools = self.machine.get_execution_state_data(
-            "MigrateRgwPoolsHandler", "migrated_pools", default_value=[]
-        )
-
-        self.logger.info("Migrating ceph-rgw zone '{0}'".format(zone_name))
-
+    def _get_zone_definition(self, zone_name: str, zone_data: Dict[str, Any]) -> Any:
         osd_pools = zone_data["osd_pools"]
 
         pool_metadata_osd_configuration = osd_pools["{0}.rgw.meta".format(zone_name)]
@@ -137,23 +162,7 @@ class MigrateRgwPoolsHandler(ModuleHandler):
         # Render cluster config from template
         pool_definition = self.load_template("pool.yaml.j2", **pool_definition_values)
 
-        self.k8s.crd_api_apply(pool_definition.yaml)
-
-        migrated_zones.append(zone_name)
-
-        self.machine.get_execution_state(
-            "MigrateRgwPoolsHandler"
-        ).migrated_zones = migrated_zones
-
-        for osd_pool_name in osd_pools:
-            if osd_pool_name not in migrated_pools:
-                migrated_pools.append(osd_pool_name)
-
-        self.machine.get_execution_state(
-            "MigrateRgwPoolsHandler"
-        ).migrated_pools = migrated_pools
-
-        self.logger.info("Migrated ceph-rgw zone '{0}'".format(zone_name))
+        return pool_definition.yaml
 
     @staticmethod
     def register_execution_state(
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-from time import sleep
 from typing import Any, Dict, List
 from ..exception import ModuleException
 from ..machine import Machine
@@ -19,6 +18,13 @@ class MigrateRgwsHandler(ModuleHandler):
             .get("daemons", {})
         )
 
+    def _get_current_rgw_daemon_hosts(self) -> List[str]:
+        ceph_status = self.ceph.mon_command("status")
+
+        return self._get_rgw_daemon_hosts_of_map(
+            ceph_status["servicemap"]["services"].get("rgw", {}).get("daemons", {})
+        )
+
     def _get_rgw_daemon_hosts_of_map(
         self, rgw_daemons_map: Dict[str, Any]
     ) -> List[str]:
@@ -39,11 +45,10 @@ class MigrateRgwsHandler(ModuleHandler):
         return rgw_daemon_hosts
 
     def preflight(self) -> None:
-        migrated_rgws = self.machine.get_execution_state_data(
-            "MigrateRgwsHandler", "migrated_rgws", default_value=[]
-        )
-
-        if len(migrated_rgws) > 0:
+        if (
+            self.machine.count_execution_progress("MigrateRgwsHandler", "migrated_rgws")
+            > 0
+        ):
             return
 
         self.k8s.check_nodes_for_initial_label_state(self.k8s.rgw_placement_label)
@@ -65,18 +70,19 @@ class MigrateRgwsHandler(ModuleHandler):
             self._migrate_rgw(rgw_daemon_host)
 
     def _migrate_rgw(self, rgw_host: str) -> None:
-        migrated_rgws = self.machine.get_execution_state_data(
-            "MigrateRgwsHandler", "migrated_rgws", default_value=[]
-        )
-        if rgw_host in migrated_rgws:
+        if self.machine.has_execution_progress(
+            "MigrateRgwsHandler", "migrated_rgws", rgw_host
+        ):
             return
 
         self.logger.info("Migrating ceph-rgw daemon at host '{0}'".format(rgw_host))
 
-        migrated_zones = self.machine.get_execution_state_data(
-            "MigrateRgwPoolsHandler", "migrated_zones", default_value=[]
+        is_migration_required = (
+            self.machine.count_execution_progress(
+                "MigrateRgwPoolsHandler", "migrated_zones"
+            )
+            > 0
         )
-        is_migration_required = len(migrated_zones) > 0
 
         if is_migration_required:
             result = self.ssh.command(
@@ -99,39 +105,30 @@ class MigrateRgwsHandler(ModuleHandler):
                 )
             )
 
-            while True:
-                ceph_status = self.ceph.mon_command("status")
-
-                rgw_daemon_hosts = self._get_rgw_daemon_hosts_of_map(
-                    ceph_status["servicemap"]["services"]
-                    .get("rgw", {})
-                    .get("daemons", {})
-                )
-
-                if rgw_host not in rgw_daemon_hosts:
-                    break
-
-                sleep(2)
+            self.wait_for(
+                "ceph-rgw host '{0}' to disconnect".format(rgw_host),
+                lambda: rgw_host not in self._get_current_rgw_daemon_hosts(),
+                maps=("servicemap",),
+            )
 
             self.logger.info("Disabled ceph-rgw host '{0}'".format(rgw_host))
 
         self.logger.debug("Enabling Rook based ceph-rgw node '{0}'".format(rgw_host))
 
-        node_patch = {"metadata": {"labels": {self.k8s.rgw_placement_label: "true"}}}
+        result = self.k8s.label_nodes([rgw_host], self.k8s.rgw_placement_label)[
+            rgw_host
+        ]
 
-        if (
-            self.k8s.rgw_placement_label
-            not in self.k8s.core_v1_api.patch_node(rgw_host, node_patch).metadata.labels
-        ):
+        if result.failed:
             raise ModuleException(
-                "Failed to patch k8s node for ceph-rgw node '{0}'".format(rgw_host)
+                "Failed to patch k8s node for ceph-rgw node '{0}': {1!s}".format(
+                    rgw_host, result.exception
+                )
             )
 
-        migrated_rgws.append(rgw_host)
-
-        self.machine.get_execution_state(
-            "MigrateRgwsHandler"
-        ).migrated_rgws = migrated_rgws
+        self.machine.add_execution_progress(
+            "MigrateRgwsHandler", "migrated_rgws", rgw_host
+        )
 
         if is_migration_required:
             self.logger.debug(
@@ -140,19 +137,13 @@ class MigrateRgwsHandler(ModuleHandler):
                 )
             )
 
-            while True:
-                ceph_status = self.ceph.mon_command("status")
-
-                rgw_daemon_hosts = self._get_rgw_daemon_hosts_of_map(
-                    ceph_status["servicemap"]["services"]
-                    .get("rgw", {})
-                    .get("daemons", {})
-                )
-
-                if rgw_host in rgw_daemon_hosts:
-                    break
-
-                sleep(2)
+            self.wait_for(
+                "Rook based ceph-rgw daemon for node '{0}'".format(rgw_host),
+                lambda: rgw_host in self._get_current_rgw_daemon_hosts(),
+                maps=("servicemap",),
+                rook_daemon="rook-ceph-rgw",
+                node_name=rgw_host,
+            )
 
             self.logger.info(
                 "Rook based RGW daemon for node '{0}' available".format(rgw_host)
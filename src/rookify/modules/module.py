@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import abc
-import json
 import os
 import structlog
-from typing import Any, Dict, Optional
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, Optional
+from .. import json_codec
 from ..logger import get_logger
 from . import get_modules
 from .ceph import Ceph
@@ -12,6 +13,7 @@ from .k8s import K8s
 from .machine import Machine
 from .ssh import SSH
 from .template import Template
+from .wait import Wait
 
 
 class ModuleHandler(object):
@@ -33,12 +35,14 @@ class ModuleHandler(object):
         self._ceph: Optional[Ceph] = None
         self._k8s: Optional[K8s] = None
         self._ssh: Optional[SSH] = None
+        self._wait: Optional[Wait] = None
         self._logger = get_logger()
 
     @property
     def ceph(self) -> Ceph:
         if self._ceph is None:
-            self._ceph = Ceph(self._config["ceph"])
+            self._ceph = Ceph.get_session(self._config["ceph"])
+            self._machine.add_cleanup_callback(Ceph.close_sessions)
         return self._ceph
 
     @property
@@ -48,7 +52,8 @@ class ModuleHandler(object):
     @property
     def k8s(self) -> K8s:
         if self._k8s is None:
-            self._k8s = K8s(self._config)
+            self._k8s = K8s.get_session(self._config)
+            self._machine.add_cleanup_callback(K8s.close_sessions)
         return self._k8s
 
     @property
@@ -58,11 +63,135 @@ class ModuleHandler(object):
     @property
     def ssh(self) -> SSH:
         if self._ssh is None:
-            self._ssh = SSH(self._config["ssh"])
+            self._ssh = SSH.get_session(self._config["ssh"])
+            self._machine.add_cleanup_callback(SSH.close_sessions)
         return self._ssh
 
+    @property
+    def wait(self) -> Wait:
+        if self._wait is None:
+            self._wait = Wait()
+        return self._wait
+
+    def wait_for(
+        self,
+        name: str,
+        predicate: Callable[[], Any],
+        timeout: Optional[float] = None,
+        maps: Optional[Iterable[str]] = None,
+        rook_daemon: Optional[str] = None,
+        node_name: Optional[str] = None,
+    ) -> Any:
+        """
+        Waits until the predicate given returns a truthy value. Waiting is
+        aborted once the timeout given or the one of the current state expires.
+
+        If Ceph maps are given the predicate is only evaluated again after one
+        of them changed. Polling continues at the maximum interval as fallback.
+
+        If a Rook daemon is given its Kubernetes pods are watched as well. The
+        predicate is evaluated again as soon as they changed and waiting fails
+        immediately if Kubernetes reports that the daemon can not start.
+
+        :param name: Human readable name of the condition
+        :param predicate: Callable evaluating the condition
+        :param timeout: Timeout in seconds
+        :param maps: Names of Ceph maps the condition depends on
+        :param rook_daemon: Value of the "app" label of the Rook daemon expected
+        :param node_name: Name of the node the Rook daemon is expected on
+        :return: returns the predicate result
+        """
+
+        deadline = self.machine.get_state_deadline()
+
+        if timeout is not None:
+            timeout_deadline = monotonic() + timeout
+
+            if deadline is None or timeout_deadline < deadline:
+                deadline = timeout_deadline
+
+        if rook_daemon is not None:
+            return self._wait_for_rook_daemon(
+                name, predicate, deadline, maps, rook_daemon, node_name
+            )
+
+        if maps is None:
+            return self.wait.until(name, predicate, deadline)
+
+        watched_maps = list(maps)
+        map_epochs = self.ceph.get_map_epochs()
+
+        def _wait_for_map_change(interval: float) -> None:
+            nonlocal map_epochs
+
+            self.ceph.wait_for_map_change(watched_maps, map_epochs, interval)
+            map_epochs = self.ceph.get_map_epochs()
+
+        return self.wait.until(
+            name,
+            predicate,
+            deadline,
+            sleep_func=_wait_for_map_change,
+            initial_interval=Wait.MAX_INTERVAL,
+        )
+
+    def _wait_for_rook_daemon(
+        self,
+        name: str,
+        predicate: Callable[[], Any],
+        deadline: Optional[float],
+        maps: Optional[Iterable[str]],
+        rook_daemon: str,
+        node_name: Optional[str],
+    ) -> Any:
+        watched_maps = [] if maps is None else list(maps)
+        map_epochs = self.ceph.get_map_epochs() if len(watched_maps) > 0 else {}
+
+        pods_informer = self.k8s.rook_pods_informer
+        pods_resource_version = pods_informer.resource_version
+
+        def _predicate() -> Any:
+            if self.k8s.check_rook_daemon(rook_daemon, node_name):
+                self.logger.debug(
+                    "Rook {0} pod is ready, checking Ceph".format(rook_daemon)
+                )
+
+            return predicate()
+
+        def _wait_for_change(interval: float) -> None:
+            nonlocal map_epochs, pods_resource_version
+
+            wait_deadline = monotonic() + interval
+
+            # Pod changes wake up immediately, Ceph maps are checked in between
+            while True:
+                remaining = wait_deadline - monotonic()
+
+                if remaining <= 0 or pods_informer.wait_for_change(
+                    pods_resource_version, min(remaining, Wait.INITIAL_INTERVAL)
+                ):
+                    break
+
+                if len(watched_maps) > 0 and self.ceph.wait_for_map_change(
+                    watched_maps, map_epochs, 0
+                ):
+                    break
+
+            pods_resource_version = pods_informer.resource_version
+
+            if len(watched_maps) > 0:
+                map_epochs = self.ceph.get_map_epochs()
+
+        return self.wait.until(
+            name,
+            _predicate,
+            deadline,
+            sleep_func=_wait_for_change,
+            initial_interval=Wait.MAX_INTERVAL,
+        )
+
     def _get_readable_json_dump(self, data: Any) -> Any:
-        return json.dumps(data, default=repr, sort_keys=True, indent="\t")
+        return json_codec.dumps(data, readable=True)
 
     def get_readable_key_value_state(self) -> Optional[Dict[str, str]]:
         """
@@ -97,6 +226,14 @@ class ModuleHandler(object):
         template.render(**variables)
         return template
 
+    @classmethod
+    def get_state_name(cls) -> str:
+        """
+        Returns the state name of the module without prefix
+        """
+
+        return cls.STATE_NAME if hasattr(cls, "STATE_NAME") else cls.__name__  # type: ignore
+
     @classmethod
     def register_states(
         cls,
@@ -108,7 +245,7 @@ class ModuleHandler(object):
         Register states for transitions
         """
 
-        state_name = cls.STATE_NAME if hasattr(cls, "STATE_NAME") else cls.__name__
+        state_name = cls.get_state_name()
 
         handler = cls(machine, config)
         preflight_state_name = None
@@ -1,15 +1,141 @@
 # -*- coding: utf-8 -*-
 
 import fabric
-from typing import Any, Dict
+import json
+import invoke
+import paramiko
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from time import monotonic
+from typing import Any, Dict, Iterable, Optional, Tuple
+from ..logger import get_logger
 from .exception import ModuleException
 
 
+class SSHHostResult:
+    """
+    Result of a command executed on one host as part of a multi-host execution.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        command: str,
+        result: Optional[fabric.runners.Result] = None,
+        exception: Optional[Exception] = None,
+        duration: float = 0.0,
+    ):
+        self.host = host
+        self.command = command
+        self.result = result
+        self.exception = exception
+        self.duration = duration
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return None if self.result is None else int(self.result.exited)
+
+    @property
+    def failed(self) -> bool:
+        return self.result is None or bool(self.result.failed)
+
+    @property
+    def stderr(self) -> str:
+        if self.result is None:
+            return "{0!s}".format(self.exception)
+
+        return str(self.result.stderr)
+
+    @property
+    def stdout(self) -> str:
+        return "" if self.result is None else str(self.result.stdout)
+
+
 class SSH:
+    CONCURRENCY = 8
+    CONNECTION_IDLE_TIMEOUT = 300
+
+    _sessions: Dict[Tuple[str, str], "SSH"] = {}
+    _sessions_lock = RLock()
+
     def __init__(self, config: Dict[str, Any]):
         self.__config = config
 
-    def command(self, host: str, command: str) -> fabric.runners.Result:
+        self.__connections: Dict[str, fabric.Connection] = {}
+        self.__connections_last_used: Dict[str, float] = {}
+        self.__connections_lock = RLock()
+        self.__host_locks: Dict[str, RLock] = {}
+        self.__statistics: Dict[str, Dict[str, int]] = {}
+
+        self._concurrency = config.get("concurrency", self.__class__.CONCURRENCY)
+        self._connection_idle_timeout = config.get(
+            "connection_idle_timeout", self.__class__.CONNECTION_IDLE_TIMEOUT
+        )
+
+    @classmethod
+    def get_session(cls, config: Dict[str, Any]) -> "SSH":
+        """
+        Returns the process-wide shared session for the SSH hosts configured.
+        Pooled connections are shared by all callers.
+        """
+
+        session_key = (
+            config["private_key"],
+            json.dumps(config["hosts"], sort_keys=True),
+        )
+
+        with cls._sessions_lock:
+            if session_key not in cls._sessions:
+                cls._sessions[session_key] = cls(config)
+
+            return cls._sessions[session_key]
+
+    @classmethod
+    def close_sessions(cls) -> None:
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.close()
+
+            cls._sessions.clear()
+
+    def _get_host_lock(self, host: str) -> RLock:
+        with self.__connections_lock:
+            if host not in self.__host_locks:
+                self.__host_locks[host] = RLock()
+                self.__statistics[host] = {"reused": 0, "missed": 0}
+
+            return self.__host_locks[host]
+
+    def _get_connection(self, host: str) -> fabric.Connection:
+        """
+        Returns a pooled connection for the given host. Idle or dead connections
+        are replaced with a newly established one. The caller is expected to
+        hold the host lock.
+        """
+
+        self._evict_idle_connections()
+
+        connection = self.__connections.get(host)
+
+        if connection is not None and self._is_connection_alive(connection):
+            self.__statistics[host]["reused"] += 1
+        else:
+            if connection is not None:
+                get_logger().debug(
+                    "Discarding dead SSH connection to host '{0}'".format(host)
+                )
+
+                self._close_connection(host)
+
+            connection = self._open_connection(host)
+            self.__statistics[host]["missed"] += 1
+
+            with self.__connections_lock:
+                self.__connections[host] = connection
+
+        return connection
+
+    def _open_connection(self, host: str) -> fabric.Connection:
         try:
             address = self.__config["hosts"][host]["address"]
             user = self.__config["hosts"][host]["user"]
@@ -24,7 +150,154 @@ class SSH:
                 f"Could not find settings for {host} in config: {err}"
             )
         connect_kwargs = {"key_filename": private_key}
-        result = fabric.Connection(
+
+        connection = fabric.Connection(
             address, user=user, port=port, connect_kwargs=connect_kwargs
-        ).run(command, hide=True)
-        return result
+        )
+
+        connection.open()
+
+        return connection
+
+    def _is_connection_alive(self, connection: fabric.Connection) -> bool:
+        transport: Optional[paramiko.Transport] = connection.transport
+
+        return (
+            transport is not None
+            and transport.is_active()
+            and transport.is_authenticated()
+        )
+
+    def _evict_idle_connections(self) -> None:
+        with self.__connections_lock:
+            idle_since = monotonic() - self._connection_idle_timeout
+
+            for host, last_used in list(self.__connections_last_used.items()):
+                host_lock = self.__host_locks[host]
+
+                # Connections currently in use are never idle
+                if last_used >= idle_since or not host_lock.acquire(blocking=False):
+                    continue
+
+                try:
+                    get_logger().debug(
+                        "Closing idle SSH connection to host '{0}'".format(host)
+                    )
+
+                    self._close_connection(host)
+                finally:
+                    host_lock.release()
+
+    def _close_connection(self, host: str) -> None:
+        with self.__connections_lock:
+            connection = self.__connections.pop(host, None)
+            self.__connections_last_used.pop(host, None)
+
+        if connection is not None:
+            connection.close()
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections and logs the pool statistics per host.
+        """
+
+        with self.__connections_lock:
+            for host in list(self.__connections.keys()):
+                self._close_connection(host)
+
+            for host, statistics in self.__statistics.items():
+                get_logger().info(
+                    "SSH connection pool statistics for host '{0}': {1:d} reused, {2:d} missed".format(
+                        host, statistics["reused"], statistics["missed"]
+                    )
+                )
+
+    def get_statistics(self) -> Dict[str, Dict[str, int]]:
+        with self.__connections_lock:
+            return {
+                host: statistics.copy()
+                for host, statistics in self.__statistics.items()
+            }
+
+    def command(
+        self, host: str, command: str, retry: bool = False
+    ) -> fabric.runners.Result:
+        """
+        Executes the command given on the host given.
+
+        :param host: Name of the host
+        :param command: Command to execute
+        :param retry: Retry once if the connection broke; only safe for
+                      commands that may be executed twice
+        :return: returns the result
+        """
+
+        with self._get_host_lock(host):
+            try:
+                try:
+                    return self._get_connection(host).run(command, hide=True)
+                except (EOFError, OSError, paramiko.SSHException):
+                    # Connection broke after passing the liveness check
+                    self._close_connection(host)
+
+                    # The command may have been executed already
+                    if not retry:
+                        raise
+
+                    return self._get_connection(host).run(command, hide=True)
+            finally:
+                with self.__connections_lock:
+                    if host in self.__connections:
+                        self.__connections_last_used[host] = monotonic()
+
+    def command_on_hosts(
+        self, hosts: Iterable[str], command: str, retry: bool = False
+    ) -> Dict[str, SSHHostResult]:
+        """
+        Executes the same command on all hosts given concurrently.
+        """
+
+        return self.commands_on_hosts({host: command for host in hosts}, retry)
+
+    def commands_on_hosts(
+        self, commands: Dict[str, str], retry: bool = False
+    ) -> Dict[str, SSHHostResult]:
+        """
+        Executes the command mapped to each host concurrently with at most
+        "ssh.concurrency" hosts at a time. Failures are reported per host
+        instead of being raised.
+        """
+
+        if len(commands) < 1:
+            return {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._concurrency, len(commands)),
+            thread_name_prefix="rookify-ssh",
+        ) as executor:
+            futures = {
+                host: executor.submit(self._command_on_host, host, command, retry)
+                for host, command in commands.items()
+            }
+
+        return {host: future.result() for host, future in futures.items()}
+
+    def _command_on_host(
+        self, host: str, command: str, retry: bool = False
+    ) -> SSHHostResult:
+        started_at = monotonic()
+
+        exception: Optional[Exception]
+        result: Optional[fabric.runners.Result]
+
+        try:
+            result = self.command(host, command, retry)
+            exception = None
+        except invoke.exceptions.UnexpectedExit as exc:
+            result = exc.result
+            exception = exc
+        except Exception as exc:
+            result = None
+            exception = exc
+
+        return SSHHostResult(host, command, result, exception, monotonic() - started_at)
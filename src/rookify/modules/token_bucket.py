@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    """
+    TokenBucket limits the rate of operations to "qps" per second on average
+    while allowing up to "burst" operations at once.
+    """
+
+    def __init__(self, qps: float, burst: int):
+        if qps <= 0 or burst < 1:
+            raise ValueError("Token bucket requires a positive rate and burst")
+
+        self._burst = burst
+        self._lock = Lock()
+        self._qps = qps
+        self._tokens = float(burst)
+        self._updated_at = monotonic()
+
+    def acquire(self) -> float:
+        """
+        Takes one token and blocks until it is available.
+
+        :return: returns the seconds waited
+        """
+
+        with self._lock:
+            now = monotonic()
+
+            self._tokens = min(
+                float(self._burst), self._tokens + (now - self._updated_at) * self._qps
+            )
+
+            self._updated_at = now
+
+            # Tokens are reserved in advance so that waiting happens unlocked
+            self._tokens -= 1
+            wait_duration = 0.0 if self._tokens >= 0 else -self._tokens / self._qps
+
+        if wait_duration > 0:
+            sleep(wait_duration)
+
+        return wait_duration
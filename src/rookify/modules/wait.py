@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from threading import RLock
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, List, Optional
+from ..logger import get_logger
+from .exception import ModuleException
+
+
+class WaitTimeoutException(ModuleException):
+    pass
+
+
+class Wait:
+    """
+    Wait polls a condition until it is met. Polling starts fast and backs off
+    exponentially up to a maximum interval. The time each condition took to
+    converge is recorded.
+    """
+
+    BACKOFF_FACTOR = 1.5
+    INITIAL_INTERVAL = 0.5
+    MAX_INTERVAL = 10.0
+
+    def __init__(
+        self,
+        initial_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff_factor: Optional[float] = None,
+    ):
+        self._backoff_factor = (
+            self.__class__.BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        )
+
+        self._initial_interval = (
+            self.__class__.INITIAL_INTERVAL
+            if initial_interval is None
+            else initial_interval
+        )
+
+        self._max_interval = (
+            self.__class__.MAX_INTERVAL if max_interval is None else max_interval
+        )
+
+        self._statistics: Dict[str, List[float]] = {}
+        self._statistics_lock = RLock()
+
+    def get_statistics(self) -> Dict[str, List[float]]:
+        """
+        Returns the seconds each condition took to converge.
+        """
+
+        with self._statistics_lock:
+            return {name: list(values) for name, values in self._statistics.items()}
+
+    def until(
+        self,
+        name: str,
+        predicate: Callable[[], Any],
+        deadline: Optional[float] = None,
+        sleep_func: Optional[Callable[[float], Any]] = None,
+        initial_interval: Optional[float] = None,
+    ) -> Any:
+        """
+        Waits until the predicate given returns a truthy value and returns it.
+
+        :param name: Human readable name of the condition
+        :param predicate: Callable evaluating the condition
+        :param deadline: Monotonic time after which waiting is aborted
+        :param sleep_func: Callable to wait for the interval given
+        :param initial_interval: Interval to start polling with
+        :return: returns the predicate result
+        """
+
+        if sleep_func is None:
+            sleep_func = sleep
+
+        started_at = monotonic()
+        interval = (
+            self._initial_interval if initial_interval is None else initial_interval
+        )
+
+        while True:
+            result = predicate()
+
+            if result:
+                break
+
+            now = monotonic()
+
+            if deadline is not None and now >= deadline:
+                raise WaitTimeoutException(
+                    "Timed out waiting for {0} after {1:.1f}s".format(
+                        name, now - started_at
+                    )
+                )
+
+            sleep_func(interval if deadline is None else min(interval, deadline - now))
+            interval = min(interval * self._backoff_factor, self._max_interval)
+
+        duration = monotonic() - started_at
+
+        with self._statistics_lock:
+            if name not in self._statistics:
+                self._statistics[name] = []
+
+            self._statistics[name].append(duration)
+
+        get_logger().debug("Waited {0:.2f}s for {1}".format(duration, name))
+
+        return result
@@ -0,0 +1,965 @@
+# -*- coding: utf-8 -*-
+
+import json
+import re
+import yaml
+from collections import deque
+from copy import deepcopy
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Event, Thread
+from time import monotonic, sleep
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+
+class MockK8sError(Exception):
+    def __init__(self, status: int, reason: str, message: str):
+        Exception.__init__(self, message)
+
+        self.message = message
+        self.reason = reason
+        self.status = status
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "apiVersion": "v1",
+            "kind": "Status",
+            "code": self.status,
+            "message": self.message,
+            "metadata": {},
+            "reason": self.reason,
+            "status": "Failure",
+        }
+
+
+class MockK8sResource(object):
+    def __init__(
+        self, group: str, version: str, plural: str, kind: str, namespaced: bool
+    ):
+        self.group = group
+        self.kind = kind
+        self.namespaced = namespaced
+        self.plural = plural
+        self.version = version
+
+    @property
+    def api_version(self) -> str:
+        return (
+            self.version
+            if self.group == ""
+            else "{0}/{1}".format(self.group, self.version)
+        )
+
+    def get_discovery(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "name": self.plural,
+            "namespaced": self.namespaced,
+            "singularName": self.kind.lower(),
+            "verbs": [
+                "create",
+                "delete",
+                "get",
+                "list",
+                "patch",
+                "update",
+                "watch",
+            ],
+        }
+
+
+def get_node_manifest(
+    name: str, labels: Optional[Dict[str, str]] = None, images_count: int = 20
+) -> Dict[str, Any]:
+    """
+    Returns a node with a status of realistic size.
+    """
+
+    return {
+        "apiVersion": "v1",
+        "kind": "Node",
+        "metadata": {
+            "name": name,
+            "labels": {"kubernetes.io/hostname": name, **(labels or {})},
+        },
+        "status": {
+            "conditions": [{"type": "Ready", "status": "True"}],
+            "images": [
+                {
+                    "names": ["registry.example.com/image-{0:d}:latest".format(index)],
+                    "sizeBytes": 104857600,
+                }
+                for index in range(images_count)
+            ],
+        },
+    }
+
+
+def get_pod_manifest(
+    name: str, namespace: str, app: str, node_name: str, ready: bool = True
+) -> Dict[str, Any]:
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": namespace, "labels": {"app": app}},
+        "spec": {
+            "containers": [{"name": app, "image": "quay.io/ceph/ceph:v18"}],
+            "nodeName": node_name,
+        },
+        "status": {
+            "conditions": [{"type": "Ready", "status": "True" if ready else "False"}],
+        },
+    }
+
+
+def get_deployment_manifest(name: str, namespace: str, app: str) -> Dict[str, Any]:
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": name, "namespace": namespace, "labels": {"app": app}},
+        "spec": {
+            "selector": {"matchLabels": {"app": app}},
+            "template": {
+                "metadata": {"labels": {"app": app}},
+                "spec": {
+                    "containers": [{"name": app, "image": "quay.io/ceph/ceph:v18"}]
+                },
+            },
+        },
+        "status": {"conditions": []},
+    }
+
+
+class _MockK8sHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, mock_k8s_server: "MockK8sServer"):
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", 0), _MockK8sRequestHandler)
+        self.mock_k8s_server = mock_k8s_server
+
+
+class _MockK8sRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _MockK8sHTTPServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_DELETE(self) -> None:
+        self._handle_request("DELETE")
+
+    def do_GET(self) -> None:
+        self._handle_request("GET")
+
+    def do_PATCH(self) -> None:
+        self._handle_request("PATCH")
+
+    def do_POST(self) -> None:
+        self._handle_request("POST")
+
+    def do_PUT(self) -> None:
+        self._handle_request("PUT")
+
+    def _handle_request(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        body = None
+        content_length = int(self.headers.get("Content-Length", 0))
+
+        if content_length > 0:
+            body = self.rfile.read(content_length)
+
+        try:
+            status, data = self.server.mock_k8s_server.handle_request(
+                method,
+                url.path,
+                query,
+                self.headers.get("Content-Type", "application/json"),
+                body,
+                self._send_watch_events,
+            )
+        except MockK8sError as exc:
+            status, data = exc.status, exc.get_status()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed a watch stream
+            return
+
+        if data is not None:
+            self._send_json(status, data)
+
+    def _send_json(self, status: int, data: Any) -> None:
+        response = json.dumps(data).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+
+        self.wfile.write(response)
+
+    def _send_watch_events(self, events: Optional[List[Dict[str, Any]]]) -> None:
+        if events is None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            return
+
+        data = b"".join(json.dumps(event).encode("utf-8") + b"\n" for event in events)
+
+        # An empty list of events terminates the chunked response
+        self.wfile.write("{0:x}\r\n".format(len(data)).encode("ascii"))
+        self.wfile.write(data + b"\r\n" if len(data) > 0 else b"\r\n")
+        self.wfile.flush()
+
+
+class MockK8sServer(object):
+    """
+    In-process HTTP stand-in for the Kubernetes API. Objects are kept in
+    memory and support list pagination, label selectors, server-side apply,
+    merge patches and watch streams.
+    """
+
+    MAX_EVENTS = 10000
+    RESOURCES = (
+        MockK8sResource("", "v1", "configmaps", "ConfigMap", True),
+        MockK8sResource("", "v1", "namespaces", "Namespace", False),
+        MockK8sResource("", "v1", "nodes", "Node", False),
+        MockK8sResource("", "v1", "pods", "Pod", True),
+        MockK8sResource("", "v1", "secrets", "Secret", True),
+        MockK8sResource("apps", "v1", "deployments", "Deployment", True),
+        MockK8sResource("ceph.rook.io", "v1", "cephblockpools", "CephBlockPool", True),
+        MockK8sResource("ceph.rook.io", "v1", "cephclusters", "CephCluster", True),
+        MockK8sResource(
+            "ceph.rook.io", "v1", "cephfilesystems", "CephFilesystem", True
+        ),
+        MockK8sResource(
+            "ceph.rook.io", "v1", "cephobjectstores", "CephObjectStore", True
+        ),
+    )
+
+    def __init__(self, latency: float = 0.0, max_events: Optional[int] = None):
+        """
+        Construct a new 'MockK8sServer' object and start serving requests.
+
+        :param latency: Seconds each request is delayed
+        :param max_events: Number of watch events kept before they expire
+        :return: returns nothing
+        """
+
+        self.latency = latency
+
+        self._compacted_resource_version = 0
+        self._condition = Condition()
+        self._events: Deque[Tuple[int, MockK8sResource, str, Dict[str, Any]]] = deque(
+            maxlen=(self.__class__.MAX_EVENTS if max_events is None else max_events)
+        )
+        self._objects: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {
+            resource.api_version + "/" + resource.plural: {}
+            for resource in self.__class__.RESOURCES
+        }
+        self._request_counts: Dict[str, int] = {}
+        self._resource_version = 0
+        self._stop_event = Event()
+
+        self._http_server = _MockK8sHTTPServer(self)
+
+        self._thread = Thread(
+            target=self._http_server.serve_forever,
+            name="mock-k8s-server",
+            daemon=True,
+        )
+
+        self._thread.start()
+
+    @property
+    def host(self) -> str:
+        return "http://{0}:{1:d}".format(*self._http_server.server_address[:2])
+
+    @property
+    def request_counts(self) -> Dict[str, int]:
+        with self._condition:
+            return dict(self._request_counts)
+
+    def close(self) -> None:
+        with self._condition:
+            self._stop_event.set()
+            self._condition.notify_all()
+
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+    def write_kubeconfig(self, path: str) -> None:
+        # JSON is valid YAML
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "apiVersion": "v1",
+                    "kind": "Config",
+                    "clusters": [{"name": "mock", "cluster": {"server": self.host}}],
+                    "contexts": [
+                        {"name": "mock", "context": {"cluster": "mock", "user": "mock"}}
+                    ],
+                    "current-context": "mock",
+                    "users": [{"name": "mock", "user": {"token": "pytest"}}],
+                },
+                file,
+            )
+
+    def get_resource(self, api_version: str, plural: str) -> MockK8sResource:
+        for resource in self.__class__.RESOURCES:
+            if resource.api_version == api_version and resource.plural == plural:
+                return resource
+
+        raise MockK8sError(
+            404,
+            "NotFound",
+            "the server could not find the requested resource {0}/{1}".format(
+                api_version, plural
+            ),
+        )
+
+    def _get_objects(
+        self, resource: MockK8sResource
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        return self._objects[resource.api_version + "/" + resource.plural]
+
+    def _add_event(
+        self, resource: MockK8sResource, event_type: str, obj: Dict[str, Any]
+    ) -> None:
+        if len(self._events) == self._events.maxlen:
+            self._compacted_resource_version = self._events[0][0]
+
+        self._events.append((self._resource_version, resource, event_type, obj))
+        self._condition.notify_all()
+
+    def _store_object(
+        self,
+        resource: MockK8sResource,
+        obj: Dict[str, Any],
+        namespace: str,
+        event_type: str,
+    ) -> Dict[str, Any]:
+        self._resource_version += 1
+
+        metadata = obj["metadata"]
+        metadata["resourceVersion"] = str(self._resource_version)
+
+        if resource.namespaced:
+            metadata["namespace"] = namespace
+        else:
+            metadata.pop("namespace", None)
+
+        metadata.setdefault("uid", str(uuid4()))
+        metadata.setdefault(
+            "creationTimestamp",
+            datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        )
+
+        obj["apiVersion"] = resource.api_version
+        obj["kind"] = resource.kind
+
+        self._get_objects(resource)[(namespace, metadata["name"])] = obj
+        self._add_event(resource, event_type, obj)
+
+        return obj
+
+    def create_object(
+        self,
+        api_version: str,
+        plural: str,
+        obj: Dict[str, Any],
+        namespace: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        resource = self.get_resource(api_version, plural)
+        obj = deepcopy(obj)
+
+        if namespace is None:
+            namespace = obj["metadata"].get("namespace", "")
+
+        if not resource.namespaced:
+            namespace = ""
+
+        with self._condition:
+            if (namespace, obj["metadata"]["name"]) in self._get_objects(resource):
+                raise MockK8sError(
+                    409,
+                    "AlreadyExists",
+                    '{0} "{1}" already exists'.format(
+                        resource.plural, obj["metadata"]["name"]
+                    ),
+                )
+
+            return self._store_object(resource, obj, namespace, "ADDED")
+
+    def create_objects(
+        self, api_version: str, plural: str, objects: List[Dict[str, Any]]
+    ) -> None:
+        for obj in objects:
+            self.create_object(api_version, plural, obj)
+
+    def get_object(
+        self, api_version: str, plural: str, name: str, namespace: str = ""
+    ) -> Dict[str, Any]:
+        resource = self.get_resource(api_version, plural)
+
+        with self._condition:
+            obj = self._get_objects(resource).get((namespace, name))
+
+            if obj is None:
+                raise MockK8sError(
+                    404,
+                    "NotFound",
+                    '{0} "{1}" not found'.format(resource.plural, name),
+                )
+
+            return deepcopy(obj)
+
+    def patch_object(
+        self,
+        api_version: str,
+        plural: str,
+        name: str,
+        patch: Dict[str, Any],
+        namespace: str = "",
+        create: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Merges the patch given into the object. Keys set to None are removed.
+        """
+
+        resource = self.get_resource(api_version, plural)
+
+        if not resource.namespaced:
+            namespace = ""
+
+        with self._condition:
+            obj = self._get_objects(resource).get((namespace, name))
+
+            if obj is None:
+                if not create:
+                    raise MockK8sError(
+                        404,
+                        "NotFound",
+                        '{0} "{1}" not found'.format(resource.plural, name),
+                    )
+
+                obj = {"metadata": {"name": name}}
+                event_type = "ADDED"
+            else:
+                event_type = "MODIFIED"
+
+            return self._store_object(
+                resource, self._merge(obj, patch), namespace, event_type
+            )
+
+    def replace_object(
+        self,
+        api_version: str,
+        plural: str,
+        name: str,
+        obj: Dict[str, Any],
+        namespace: str = "",
+    ) -> Dict[str, Any]:
+        resource = self.get_resource(api_version, plural)
+
+        if not resource.namespaced:
+            namespace = ""
+
+        with self._condition:
+            current_obj = self._get_objects(resource).get((namespace, name))
+
+            if current_obj is None:
+                raise MockK8sError(
+                    404,
+                    "NotFound",
+                    '{0} "{1}" not found'.format(resource.plural, name),
+                )
+
+            obj = deepcopy(obj)
+            obj["metadata"]["uid"] = current_obj["metadata"]["uid"]
+
+            return self._store_object(resource, obj, namespace, "MODIFIED")
+
+    def delete_object(
+        self, api_version: str, plural: str, name: str, namespace: str = ""
+    ) -> Dict[str, Any]:
+        resource = self.get_resource(api_version, plural)
+
+        if not resource.namespaced:
+            namespace = ""
+
+        with self._condition:
+            obj = self._get_objects(resource).pop((namespace, name), None)
+
+            if obj is None:
+                raise MockK8sError(
+                    404,
+                    "NotFound",
+                    '{0} "{1}" not found'.format(resource.plural, name),
+                )
+
+            self._resource_version += 1
+
+            obj = deepcopy(obj)
+            obj["metadata"]["resourceVersion"] = str(self._resource_version)
+
+            self._add_event(resource, "DELETED", obj)
+
+            return obj
+
+    def expire_events(self) -> None:
+        """
+        Drops all watch events so that resuming a watch fails with 410 Gone.
+        """
+
+        with self._condition:
+            self._compacted_resource_version = self._resource_version
+            self._events.clear()
+
+    def list_objects(
+        self,
+        api_version: str,
+        plural: str,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        resource = self.get_resource(api_version, plural)
+        selector = self._parse_selector(label_selector)
+        fields = self._parse_selector(field_selector)
+
+        with self._condition:
+            objects = [
+                obj
+                for key, obj in sorted(self._get_objects(resource).items())
+                if self._is_object_matching(obj, namespace, selector, fields)
+            ]
+
+            return objects, self._resource_version
+
+    @staticmethod
+    def _merge(obj: Any, patch: Any) -> Any:
+        if not isinstance(obj, dict) or not isinstance(patch, dict):
+            return deepcopy(patch)
+
+        result = dict(obj)
+
+        for key, value in patch.items():
+            if value is None:
+                result.pop(key, None)
+            else:
+                result[key] = MockK8sServer._merge(obj.get(key), value)
+
+        return result
+
+    @staticmethod
+    def _parse_selector(
+        selector: Optional[str],
+    ) -> List[Tuple[str, str, Optional[str]]]:
+        requirements: List[Tuple[str, str, Optional[str]]] = []
+
+        # Commas separate requirements outside of value sets only
+        for requirement in re.findall(r"[^,(]+(?:\([^)]*\))?", selector or ""):
+            requirement = requirement.strip()
+
+            if requirement == "":
+                continue
+
+            match = re.fullmatch(r"(\S+)\s+(in|notin)\s+\((.*)\)", requirement)
+
+            if match is not None:
+                requirements.append(
+                    (match.group(1), match.group(2), match.group(3).replace(" ", ""))
+                )
+
+                continue
+
+            for operator in ("!=", "==", "="):
+                if operator in requirement:
+                    key, value = requirement.split(operator, 1)
+                    requirements.append((key.strip(), operator, value.strip()))
+                    break
+            else:
+                requirements.append((requirement, "exists", None))
+
+        return requirements
+
+    @staticmethod
+    def _is_object_matching(
+        obj: Dict[str, Any],
+        namespace: Optional[str],
+        selector: List[Tuple[str, str, Optional[str]]],
+        fields: List[Tuple[str, str, Optional[str]]],
+    ) -> bool:
+        metadata = obj["metadata"]
+
+        if namespace is not None and metadata.get("namespace", "") != namespace:
+            return False
+
+        labels = metadata.get("labels") or {}
+
+        for key, operator, value in selector:
+            if operator == "exists":
+                if key not in labels:
+                    return False
+            elif operator in ("in", "notin"):
+                assert value is not None
+
+                if (labels.get(key) in value.split(",")) != (operator == "in"):
+                    return False
+            elif (labels.get(key) == value) != (operator != "!="):
+                return False
+
+        field_values = {
+            "metadata.name": metadata["name"],
+            "metadata.namespace": metadata.get("namespace", ""),
+        }
+
+        for key, operator, value in fields:
+            if (field_values.get(key) == value) != (operator != "!="):
+                return False
+
+        return True
+
+    def handle_request(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        content_type: str,
+        body: Optional[bytes],
+        send_watch_events: Any,
+    ) -> Tuple[int, Any]:
+        """
+        Handles one HTTP request and returns the status and JSON response.
+        """
+
+        if self.latency > 0:
+            sleep(self.latency)
+
+        path_parts = [part for part in path.split("/") if part != ""]
+
+        if path_parts == ["version"]:
+            self._count_request("discovery")
+            return 200, {"major": "1", "minor": "29", "gitVersion": "v1.29.0"}
+
+        if path_parts == ["api"]:
+            self._count_request("discovery")
+            return 200, {"kind": "APIVersions", "versions": ["v1"]}
+
+        if path_parts == ["apis"]:
+            self._count_request("discovery")
+            return 200, self._get_api_group_list()
+
+        if len(path_parts) >= 2 and path_parts[0] == "api":
+            group, version, rest = "", path_parts[1], path_parts[2:]
+        elif len(path_parts) >= 3 and path_parts[0] == "apis":
+            group, version, rest = path_parts[1], path_parts[2], path_parts[3:]
+        else:
+            raise MockK8sError(404, "NotFound", "Path {0} not found".format(path))
+
+        api_version = version if group == "" else "{0}/{1}".format(group, version)
+
+        if len(rest) == 0:
+            self._count_request("discovery")
+            return 200, self._get_api_resource_list(api_version)
+
+        namespace: Optional[str] = None
+
+        if len(rest) >= 3 and rest[0] == "namespaces":
+            namespace, rest = rest[1], rest[2:]
+
+        resource = self.get_resource(api_version, rest[0])
+        name = rest[1] if len(rest) > 1 else None
+
+        if method == "GET" and name is None:
+            if self._is_query_flag_set(query, "watch"):
+                self._count_request("watch")
+                self._watch(resource, namespace, query, send_watch_events)
+                return 200, None
+
+            self._count_request("list")
+            return 200, self._list(resource, namespace, query)
+
+        if name is None:
+            if method != "POST":
+                raise MockK8sError(405, "MethodNotAllowed", "Method not allowed")
+
+            self._count_request("create")
+            return 201, self.create_object(
+                api_version, resource.plural, self._decode_body(body), namespace
+            )
+
+        namespace = namespace or ""
+
+        if method == "GET":
+            self._count_request("get")
+            return 200, self.get_object(api_version, resource.plural, name, namespace)
+        elif method == "PUT":
+            self._count_request("update")
+            return 200, self.replace_object(
+                api_version, resource.plural, name, self._decode_body(body), namespace
+            )
+        elif method == "PATCH":
+            self._count_request("patch")
+            return 200, self._patch(
+                resource, name, namespace, query, content_type, body
+            )
+        elif method == "DELETE":
+            self._count_request("delete")
+            return 200, self.delete_object(
+                api_version, resource.plural, name, namespace
+            )
+
+        raise MockK8sError(405, "MethodNotAllowed", "Method not allowed")
+
+    def _count_request(self, verb: str) -> None:
+        with self._condition:
+            self._request_counts[verb] = self._request_counts.get(verb, 0) + 1
+
+    @staticmethod
+    def _is_query_flag_set(query: Dict[str, str], name: str) -> bool:
+        # Boolean query parameters are parsed like Go's "strconv.ParseBool()"
+        return query.get(name, "").lower() in ("1", "t", "true")
+
+    @staticmethod
+    def _decode_body(body: Optional[bytes]) -> Any:
+        if body is None:
+            raise MockK8sError(400, "BadRequest", "Request body missing")
+
+        return json.loads(body)
+
+    def _get_api_group_list(self) -> Dict[str, Any]:
+        groups: Dict[str, List[str]] = {}
+
+        for resource in self.__class__.RESOURCES:
+            if resource.group != "" and resource.version not in groups.setdefault(
+                resource.group, []
+            ):
+                groups[resource.group].append(resource.version)
+
+        return {
+            "kind": "APIGroupList",
+            "apiVersion": "v1",
+            "groups": [
+                {
+                    "name": group,
+                    "versions": [
+                        {
+                            "groupVersion": "{0}/{1}".format(group, version),
+                            "version": version,
+                        }
+                        for version in versions
+                    ],
+                    "preferredVersion": {
+                        "groupVersion": "{0}/{1}".format(group, versions[0]),
+                        "version": versions[0],
+                    },
+                }
+                for group, versions in groups.items()
+            ],
+        }
+
+    def _get_api_resource_list(self, api_version: str) -> Dict[str, Any]:
+        resources = [
+            resource.get_discovery()
+            for resource in self.__class__.RESOURCES
+            if resource.api_version == api_version
+        ]
+
+        if len(resources) < 1:
+            raise MockK8sError(
+                404, "NotFound", "API version {0} not found".format(api_version)
+            )
+
+        return {
+            "kind": "APIResourceList",
+            "apiVersion": "v1",
+            "groupVersion": api_version,
+            "resources": resources,
+        }
+
+    def _list(
+        self,
+        resource: MockK8sResource,
+        namespace: Optional[str],
+        query: Dict[str, str],
+    ) -> Dict[str, Any]:
+        objects, resource_version = self.list_objects(
+            resource.api_version,
+            resource.plural,
+            namespace,
+            query.get("labelSelector"),
+            query.get("fieldSelector"),
+        )
+
+        # The continue token is the offset of the next page
+        offset = int(query.get("continue", 0))
+        limit = int(query.get("limit", 0))
+
+        if limit > 0 and offset + limit < len(objects):
+            items = objects[offset : offset + limit]
+            metadata = {
+                "continue": str(offset + limit),
+                "remainingItemCount": len(objects) - offset - limit,
+                "resourceVersion": str(resource_version),
+            }
+        else:
+            items = objects[offset:]
+            metadata = {"resourceVersion": str(resource_version)}
+
+        return {
+            "apiVersion": resource.api_version,
+            "kind": resource.kind + "List",
+            "items": items,
+            "metadata": metadata,
+        }
+
+    def _patch(
+        self,
+        resource: MockK8sResource,
+        name: str,
+        namespace: str,
+        query: Dict[str, str],
+        content_type: str,
+        body: Optional[bytes],
+    ) -> Dict[str, Any]:
+        if body is None:
+            raise MockK8sError(400, "BadRequest", "Request body missing")
+
+        if content_type.startswith("application/apply-patch+yaml"):
+            if "fieldManager" not in query:
+                raise MockK8sError(
+                    400,
+                    "BadRequest",
+                    "PATCH requests of type apply require a field manager",
+                )
+
+            return self.patch_object(
+                resource.api_version,
+                resource.plural,
+                name,
+                yaml.safe_load(body),
+                namespace,
+                create=True,
+            )
+
+        if content_type.startswith(
+            ("application/merge-patch+json", "application/strategic-merge-patch+json")
+        ):
+            return self.patch_object(
+                resource.api_version,
+                resource.plural,
+                name,
+                json.loads(body),
+                namespace,
+            )
+
+        raise MockK8sError(
+            415,
+            "UnsupportedMediaType",
+            "the body of the request was in an unknown format: {0}".format(
+                content_type
+            ),
+        )
+
+    def _watch(
+        self,
+        resource: MockK8sResource,
+        namespace: Optional[str],
+        query: Dict[str, str],
+        send_watch_events: Any,
+    ) -> None:
+        selector = self._parse_selector(query.get("labelSelector"))
+        fields = self._parse_selector(query.get("fieldSelector"))
+        deadline = monotonic() + float(query.get("timeoutSeconds", 1800))
+
+        send_watch_events(None)
+
+        resource_version = query.get("resourceVersion", "")
+
+        if resource_version in ("", "0"):
+            # Watching without a resource version starts with synthetic events
+            objects, last_resource_version = self.list_objects(
+                resource.api_version,
+                resource.plural,
+                namespace,
+                query.get("labelSelector"),
+                query.get("fieldSelector"),
+            )
+
+            if len(objects) > 0:
+                send_watch_events([{"type": "ADDED", "object": obj} for obj in objects])
+        else:
+            last_resource_version = int(resource_version)
+
+        with self._condition:
+            is_expired = last_resource_version < self._compacted_resource_version
+
+        if is_expired:
+            send_watch_events(
+                [
+                    {
+                        "type": "ERROR",
+                        "object": MockK8sError(
+                            410,
+                            "Expired",
+                            "too old resource version: {0:d}".format(
+                                last_resource_version
+                            ),
+                        ).get_status(),
+                    }
+                ]
+            )
+
+            send_watch_events([])
+            return
+
+        while not self._stop_event.is_set():
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stop_event.is_set()
+                    or self._resource_version > last_resource_version,
+                    max(0, deadline - monotonic()),
+                )
+
+                events = [
+                    {"type": event_type, "object": obj}
+                    for (event_resource_version, event_resource, event_type, obj) in (
+                        self._events
+                    )
+                    if event_resource_version > last_resource_version
+                    and event_resource is resource
+                    and self._is_object_matching(obj, namespace, selector, fields)
+                ]
+
+                last_resource_version = self._resource_version
+
+            if len(events) > 0:
+                send_watch_events(events)
+
+            if monotonic() >= deadline:
+                if self._is_query_flag_set(query, "allowWatchBookmarks"):
+                    send_watch_events(
+                        [
+                            {
+                                "type": "BOOKMARK",
+                                "object": {
+                                    "apiVersion": resource.api_version,
+                                    "kind": resource.kind,
+                                    "metadata": {
+                                        "resourceVersion": str(last_resource_version)
+                                    },
+                                },
+                            }
+                        ]
+                    )
+
+                break
+
+        send_watch_events([])
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import json
+import rados
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Tuple
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from rookify.modules.ceph import Ceph
+from rookify.modules.exception import ModuleException
+
+
+class TestCeph(TestCase):
+    def setUp(self) -> None:
+        self.config = {"config": "ceph.conf", "keyring": "ceph.keyring"}
+
+        self.rados_patcher = patch.object(rados, "Rados", create=True)
+        self.rados_class = self.rados_patcher.start()
+        self.rados_class.side_effect = self._create_rados
+
+        self.osdmap_epoch = 1
+
+    def tearDown(self) -> None:
+        Ceph.close_sessions()
+        self.rados_patcher.stop()
+
+    def _create_rados(self, *args: Any, **kwargs: Any) -> MagicMock:
+        handle = MagicMock()
+        handle.mon_command.side_effect = self._mon_command
+        return handle
+
+    def _mon_command(self, command: str, inbuf: bytes) -> Tuple[int, bytes, str]:
+        prefix = json.loads(command)["prefix"]
+
+        if prefix == "status":
+            return (
+                0,
+                json.dumps(
+                    {"fsid": "pytest", "osdmap": {"epoch": self.osdmap_epoch}}
+                ).encode(),
+                "",
+            )
+        elif prefix in ("mon remove", "mon stat"):
+            return 0, b'{"quorum": []}', ""
+        elif prefix == "osd dump":
+            return (
+                0,
+                b'{"osds": [{"osd": 0, "up": 1, "in": 1}, {"osd": 1, "up": 0, "in": 1}]}',
+                "",
+            )
+        return -1, b"", "Command not found"
+
+    def test_shared_session(self) -> None:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            sessions = list(
+                executor.map(lambda _: Ceph.get_session(self.config), range(8))
+            )
+
+        self.assertEqual(self.rados_class.call_count, 1)
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+        self.assertEqual(sessions[0].fsid, "pytest")
+        self.assertEqual(sessions[0].status["fsid"], "pytest")
+
+        Ceph.close_sessions()
+
+        sessions[0].shutdown.assert_called_once()
+        self.assertIsNot(Ceph.get_session(self.config), sessions[0])
+
+    def test_command_cache(self) -> None:
+        ceph = Ceph({**self.config, "command_cache_ttls": {"mon stat": 60}})
+
+        self.assertEqual(ceph.mon_command("mon stat"), {"quorum": []})
+        ceph.mon_command("mon stat")["quorum"].append("modified")
+        self.assertEqual(ceph.mon_command("mon stat"), {"quorum": []})
+
+        # Read-only commands not cached keep the cache
+        ceph.mon_command("osd dump")
+        ceph.mon_command("mon stat")
+
+        ceph.mon_command("mon remove", name="a")
+        ceph.mon_command("mon stat")
+
+        self.assertEqual(
+            ceph.get_command_cache_statistics(),
+            {"mon stat": {"hits": 3, "misses": 2}},
+        )
+
+    def test_osds_state(self) -> None:
+        ceph = Ceph(self.config)
+
+        self.assertEqual(
+            ceph.get_osds_state([0, 1]),
+            {0: {"up": True, "in": True}, 1: {"up": False, "in": True}},
+        )
+
+        with self.assertRaises(ModuleException):
+            ceph.get_osds_state([2])
+
+    def test_map_change(self) -> None:
+        ceph = Ceph({**self.config, "map_epochs_poll_interval": 0.01})
+
+        map_epochs = ceph.get_map_epochs()
+        self.assertEqual(map_epochs["osdmap"], 1)
+
+        self.assertFalse(ceph.wait_for_map_change(["osdmap"], map_epochs, 0.05))
+
+        self.osdmap_epoch = 2
+
+        self.assertTrue(ceph.wait_for_map_change(["osdmap"], map_epochs, 5))
+        self.assertFalse(ceph.wait_for_map_change(["monmap"], map_epochs, 0.05))
+        self.assertEqual(ceph.get_map_epochs()["osdmap"], 2)
+
+        with self.assertRaises(ModuleException):
+            ceph.wait_for_map_change(["pytest"], map_epochs)
+
+        ceph.stop_map_epochs_watcher()
+
+    def test_map_epochs_watcher_stopped_without_waiters(self) -> None:
+        ceph = Ceph({**self.config, "map_epochs_poll_interval": 0.01})
+
+        self.assertFalse(ceph.wait_for_map_change(["osdmap"], {"osdmap": 1}, 0.05))
+
+        thread = ceph._map_epochs_thread
+        assert thread is not None
+
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(ceph._map_epochs_thread)
+
+        self.osdmap_epoch = 2
+        self.assertEqual(ceph.get_map_epochs()["osdmap"], 2)
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+import kubernetes
+import os
+import tempfile
+from typing import Any, Dict
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from rookify.modules.exception import ModuleException
+from rookify.modules.k8s import K8s
+from .test_k8s_informer import MockWatch
+
+
+class TestK8s(TestCase):
+    def setUp(self) -> None:
+        self.config: Dict[str, Any] = {
+            "kubernetes": {"config": "kubeconfig"},
+            "rook": {"cluster": {"name": "rook-ceph", "namespace": "rook-ceph"}},
+        }
+
+        self.manifest = {
+            "apiVersion": "ceph.rook.io/v1",
+            "kind": "CephBlockPool",
+            "metadata": {"name": "pool", "namespace": "rook-ceph"},
+        }
+
+        self.kube_config_patcher = patch.object(
+            kubernetes.config, "load_kube_config", return_value=None
+        )
+
+        self.kube_config_patcher.start()
+
+        self.k8s = K8s(self.config)
+        self.crd_api = MagicMock()
+
+        self.crd_api_patcher = patch.object(
+            self.k8s, "crd_api", return_value=self.crd_api
+        )
+
+        self.crd_api_patcher.start()
+
+    def tearDown(self) -> None:
+        self.crd_api_patcher.stop()
+        self.kube_config_patcher.stop()
+
+    def _get_api_error(self, status: int) -> Any:
+        return kubernetes.dynamic.exceptions.api_exception(
+            kubernetes.client.exceptions.ApiException(status=status)
+        )
+
+    def test_crd_api_apply(self) -> None:
+        self.k8s.crd_api_apply(self.manifest)
+
+        self.crd_api.server_side_apply.assert_called_once_with(
+            body=self.manifest,
+            namespace="rook-ceph",
+            field_manager="rookify",
+            force_conflicts=True,
+        )
+
+        self.crd_api.get.assert_not_called()
+        self.crd_api.patch.assert_not_called()
+
+    def test_crd_api_apply_fallback(self) -> None:
+        self.crd_api.server_side_apply.side_effect = self._get_api_error(415)
+        self.crd_api.get.side_effect = self._get_api_error(404)
+
+        self.k8s.crd_api_apply(self.manifest)
+        self.k8s.crd_api_apply(self.manifest)
+
+        self.crd_api.server_side_apply.assert_called_once()
+        self.assertEqual(self.crd_api.create.call_count, 2)
+
+    def test_crd_api_apply_error(self) -> None:
+        self.crd_api.server_side_apply.side_effect = self._get_api_error(422)
+
+        with self.assertRaises(kubernetes.dynamic.exceptions.DynamicApiError):
+            self.k8s.crd_api_apply(self.manifest)
+
+        self.crd_api.create.assert_not_called()
+
+    def test_crd_api_apply_many(self) -> None:
+        manifests = {
+            "pool-{0:d}".format(index): {
+                **self.manifest,
+                "metadata": {"name": "pool-{0:d}".format(index), "namespace": "rook"},
+            }
+            for index in range(16)
+        }
+
+        self.crd_api.server_side_apply.side_effect = lambda body, **kwargs: (
+            self._raise(self._get_api_error(422))
+            if body["metadata"]["name"] == "pool-3"
+            else body["metadata"]["name"]
+        )
+
+        results = {
+            key: (result, exception)
+            for key, result, exception in self.k8s.crd_api_apply_many(manifests)
+        }
+
+        self.assertEqual(sorted(results.keys()), sorted(manifests.keys()))
+        self.assertEqual(results["pool-0"], ("pool-0", None))
+        self.assertIsNone(results["pool-3"][0])
+        self.assertIsInstance(
+            results["pool-3"][1], kubernetes.dynamic.exceptions.DynamicApiError
+        )
+
+    def _raise(self, exception: Exception) -> Any:
+        raise exception
+
+    def test_api_objects_cached(self) -> None:
+        self.assertIs(self.k8s.core_v1_api, self.k8s.core_v1_api)
+        self.assertIsNot(self.k8s.core_v1_api, self.k8s.apps_v1_api)
+
+    def test_discovery_cache_expired(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_file = os.path.join(temp_dir, "discovery.json")
+
+            k8s = K8s(
+                {
+                    **self.config,
+                    "kubernetes": {
+                        "config": "kubeconfig",
+                        "discovery_cache_file": cache_file,
+                        "discovery_cache_ttl": 60,
+                    },
+                }
+            )
+
+            with open(cache_file, "w") as file:
+                file.write("{}")
+
+            k8s._expire_discovery_cache()
+            self.assertTrue(os.path.exists(cache_file))
+
+            os.utime(cache_file, (0, 0))
+
+            k8s._expire_discovery_cache()
+            self.assertFalse(os.path.exists(cache_file))
+
+            k8s._expire_discovery_cache()
+
+    def test_throttled_retry(self) -> None:
+        throttled = kubernetes.client.exceptions.ApiException(status=429)
+        throttled.headers = {"Retry-After": "0"}
+
+        with patch.object(
+            kubernetes.client.ApiClient,
+            "call_api",
+            side_effect=[throttled, throttled, "pytest"],
+        ) as call_api:
+            self.assertEqual(self.k8s.core_v1_api.api_client.call_api("/"), "pytest")
+
+        self.assertEqual(call_api.call_count, 3)
+
+    def test_label_nodes(self) -> None:
+        def _patch_node(name: str, body: Any) -> None:
+            if name == "node-b":
+                raise kubernetes.client.exceptions.ApiException(status=404)
+
+        def _list_node(*args: Any, **kwargs: Any) -> Any:
+            return kubernetes.client.V1NodeList(
+                items=[
+                    kubernetes.client.V1Node(
+                        metadata=kubernetes.client.V1ObjectMeta(
+                            name="node-a", labels={"pytest": "true"}
+                        )
+                    ),
+                    kubernetes.client.V1Node(
+                        metadata=kubernetes.client.V1ObjectMeta(name="node-c")
+                    ),
+                ],
+                metadata=kubernetes.client.V1ListMeta(resource_version="1"),
+            )
+
+        core_v1_api = self.k8s.core_v1_api
+
+        with (
+            patch.object(kubernetes.watch, "Watch", MockWatch),
+            patch.object(core_v1_api, "patch_node", side_effect=_patch_node),
+            patch.object(core_v1_api, "list_node", side_effect=_list_node),
+        ):
+            results = self.k8s.label_nodes(
+                ["node-a", "node-b", "node-c"], "pytest", timeout=0.05
+            )
+
+            self.k8s.stop_informers()
+
+        self.assertFalse(results["node-a"].failed)
+        self.assertTrue(results["node-b"].failed)
+        self.assertTrue(results["node-c"].failed)
+        self.assertEqual(self.k8s.label_nodes([], "pytest"), {})
+
+    def test_check_rook_daemon(self) -> None:
+        container_state = kubernetes.client.V1ContainerState(
+            running=kubernetes.client.V1ContainerStateRunning()
+        )
+
+        pod_ready_status = "False"
+
+        def _list_namespaced_pod(*args: Any, **kwargs: Any) -> Any:
+            return kubernetes.client.V1PodList(
+                items=[
+                    kubernetes.client.V1Pod(
+                        metadata=kubernetes.client.V1ObjectMeta(
+                            name="rook-ceph-osd-0",
+                            namespace="rook-ceph",
+                            labels={"app": "rook-ceph-osd"},
+                        ),
+                        spec=kubernetes.client.V1PodSpec(
+                            containers=[], node_name="node-0"
+                        ),
+                        status=kubernetes.client.V1PodStatus(
+                            conditions=[
+                                kubernetes.client.V1PodCondition(
+                                    type="Ready", status=pod_ready_status
+                                )
+                            ],
+                            container_statuses=[
+                                kubernetes.client.V1ContainerStatus(
+                                    image="ceph",
+                                    image_id="ceph",
+                                    name="osd",
+                                    ready=True,
+                                    restart_count=0,
+                                    state=container_state,
+                                )
+                            ],
+                        ),
+                    )
+                ],
+                metadata=kubernetes.client.V1ListMeta(resource_version="1"),
+            )
+
+        def _list_namespaced_deployment(*args: Any, **kwargs: Any) -> Any:
+            return kubernetes.client.V1DeploymentList(
+                items=[],
+                metadata=kubernetes.client.V1ListMeta(resource_version="1"),
+            )
+
+        with (
+            patch.object(kubernetes.watch, "Watch", MockWatch),
+            patch.object(
+                self.k8s.core_v1_api,
+                "list_namespaced_pod",
+                side_effect=_list_namespaced_pod,
+            ),
+            patch.object(
+                self.k8s.apps_v1_api,
+                "list_namespaced_deployment",
+                side_effect=_list_namespaced_deployment,
+            ),
+        ):
+            self.assertFalse(self.k8s.check_rook_daemon("rook-ceph-osd", "node-0"))
+            self.k8s.stop_informers()
+
+            pod_ready_status = "True"
+
+            self.assertTrue(self.k8s.check_rook_daemon("rook-ceph-osd", "node-0"))
+            self.assertFalse(self.k8s.check_rook_daemon("rook-ceph-osd", "node-1"))
+            self.k8s.stop_informers()
+
+            container_state = kubernetes.client.V1ContainerState(
+                waiting=kubernetes.client.V1ContainerStateWaiting(
+                    reason="ImagePullBackOff"
+                )
+            )
+
+            with self.assertRaises(ModuleException):
+                self.k8s.check_rook_daemon("rook-ceph-osd")
+
+            self.k8s.stop_informers()
+
+    def test_check_rook_daemon_deployments(self) -> None:
+        def _list_namespaced_pod(*args: Any, **kwargs: Any) -> Any:
+            return kubernetes.client.V1PodList(
+                items=[],
+                metadata=kubernetes.client.V1ListMeta(resource_version="1"),
+            )
+
+        def _list_namespaced_deployment(*args: Any, **kwargs: Any) -> Any:
+            return kubernetes.client.V1DeploymentList(
+                items=[
+                    kubernetes.client.V1Deployment(
+                        metadata=kubernetes.client.V1ObjectMeta(
+                            name="rook-ceph-osd-1",
+                            namespace="rook-ceph",
+                            labels={
+                                "app": "rook-ceph-osd",
+                                "topology-location-host": "node-1",
+                            },
+                        ),
+                        spec=kubernetes.client.V1DeploymentSpec(
+                            selector=kubernetes.client.V1LabelSelector(),
+                            template=kubernetes.client.V1PodTemplateSpec(
+                                spec=kubernetes.client.V1PodSpec(containers=[])
+                            ),
+                        ),
+                        status=kubernetes.client.V1DeploymentStatus(
+                            conditions=[
+                                kubernetes.client.V1DeploymentCondition(
+                                    type="ReplicaFailure",
+                                    status="True",
+                                    message="pytest",
+                                )
+                            ]
+                        ),
+                    )
+                ],
+                metadata=kubernetes.client.V1ListMeta(resource_version="1"),
+            )
+
+        with (
+            patch.object(kubernetes.watch, "Watch", MockWatch),
+            patch.object(
+                self.k8s.core_v1_api,
+                "list_namespaced_pod",
+                side_effect=_list_namespaced_pod,
+            ),
+            patch.object(
+                self.k8s.apps_v1_api,
+                "list_namespaced_deployment",
+                side_effect=_list_namespaced_deployment,
+            ),
+        ):
+            # The failed deployment of another node is ignored
+            self.assertFalse(self.k8s.check_rook_daemon("rook-ceph-osd", "node-0"))
+
+            with self.assertRaises(ModuleException):
+                self.k8s.check_rook_daemon("rook-ceph-osd", "node-1")
+
+            with self.assertRaises(ModuleException):
+                self.k8s.check_rook_daemon("rook-ceph-osd")
+
+            self.k8s.stop_informers()
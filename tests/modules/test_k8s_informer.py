@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import kubernetes
+from queue import Empty, Queue
+from typing import Any, Dict, Iterator, List, Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from rookify.modules.k8s_informer import K8sInformer
+from rookify.modules.wait import WaitTimeoutException
+
+
+class MockWatch(object):
+    events: "Queue[Dict[str, Any]]" = Queue()
+    stream_kwargs: List[Dict[str, Any]] = []
+
+    def __init__(self) -> None:
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    def stream(self, *args: Any, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        self.__class__.stream_kwargs.append(kwargs)
+
+        while not self._stopped:
+            try:
+                yield self.__class__.events.get(timeout=0.01)
+            except Empty:
+                pass
+
+
+class TestK8sInformer(TestCase):
+    def setUp(self) -> None:
+        MockWatch.events = Queue()
+        MockWatch.stream_kwargs = []
+
+        self.list_calls = 0
+        self.watch_patcher = patch.object(kubernetes.watch, "Watch", MockWatch)
+        self.watch_patcher.start()
+
+        self.informer = K8sInformer("nodes", self._list_node, page_limit=1)
+
+    def tearDown(self) -> None:
+        self.informer.stop()
+        self.watch_patcher.stop()
+
+    def _get_node(
+        self, name: str, labels: Optional[Dict[str, str]] = None
+    ) -> kubernetes.client.V1Node:
+        return kubernetes.client.V1Node(
+            metadata=kubernetes.client.V1ObjectMeta(
+                name=name,
+                labels=labels,
+                managed_fields=[kubernetes.client.V1ManagedFieldsEntry()],
+                resource_version=name,
+            )
+        )
+
+    def _list_node(
+        self, limit: int, _continue: Optional[str] = None
+    ) -> kubernetes.client.V1NodeList:
+        self.list_calls += 1
+
+        self.assertEqual(limit, 1)
+
+        if _continue is None:
+            items = [self._get_node("node-0", {"placement-mon": "true"})]
+            _continue = "node-1"
+        else:
+            items = [self._get_node(_continue)]
+            _continue = None
+
+        return kubernetes.client.V1NodeList(
+            items=items,
+            metadata=kubernetes.client.V1ListMeta(
+                _continue=_continue, resource_version="1"
+            ),
+        )
+
+    def _get_node_names(self, nodes: List[kubernetes.client.V1Node]) -> List[str]:
+        return sorted(node.metadata.name for node in nodes)
+
+    def test_index(self) -> None:
+        self.informer.start()
+        self.informer.start()
+
+        self.assertEqual(self.list_calls, 2)
+        self.assertEqual(self.informer.resource_version, "1")
+        self.assertEqual(self.informer.get("node-1").metadata.name, "node-1")
+        self.assertIsNone(self.informer.get("node-1").metadata.managed_fields)
+        self.assertIsNone(self.informer.get("node-2"))
+
+        self.assertEqual(
+            self._get_node_names(self.informer.list()), ["node-0", "node-1"]
+        )
+
+        self.assertEqual(
+            self._get_node_names(self.informer.list("placement-mon", "true")),
+            ["node-0"],
+        )
+
+        self.assertEqual(self.informer.list("placement-mon", "false"), [])
+
+    def test_watch(self) -> None:
+        self.informer.start()
+
+        MockWatch.events.put(
+            {
+                "type": "MODIFIED",
+                "object": self._get_node("node-1", {"placement-mon": "true"}),
+            }
+        )
+
+        MockWatch.events.put({"type": "DELETED", "object": self._get_node("node-0")})
+
+        self.informer.wait_for(
+            lambda informer: (
+                self._get_node_names(informer.list("placement-mon")) == ["node-1"]
+            ),
+            timeout=5,
+        )
+
+        self.assertEqual(self.list_calls, 2)
+
+        with self.assertRaises(WaitTimeoutException):
+            self.informer.wait_for(lambda informer: informer.get("node-0"), 0.05)
+
+    def test_bookmark(self) -> None:
+        self.informer.start()
+
+        MockWatch.events.put(
+            {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "42"}}}
+        )
+
+        self.informer.wait_for(
+            lambda informer: informer.resource_version == "42", timeout=5
+        )
+
+        self.assertEqual(len(self.informer.list()), 2)
+        self.assertTrue(MockWatch.stream_kwargs[0]["allow_watch_bookmarks"])
+        self.assertEqual(MockWatch.stream_kwargs[0]["resource_version"], "1")
+
+    def test_wait_for_change(self) -> None:
+        self.informer.start()
+
+        self.assertFalse(self.informer.wait_for_change("1", 0.05))
+
+        MockWatch.events.put(
+            {"type": "MODIFIED", "object": self._get_node("node-1", {"a": "b"})}
+        )
+
+        self.assertTrue(self.informer.wait_for_change("1", 5))
@@ -9,8 +9,8 @@ from kubernetes.client import (
     V1DeploymentList,
     V1Namespace,
     V1ObjectMeta,
-    V1NamespaceList,
 )
+from kubernetes.client.exceptions import ApiException
 
 
 # Note: currently this test works with pytest but not with unittest, which is not able to import needed classes
@@ -25,15 +25,11 @@ class TestK8sPrerequisitesCheckHandler(unittest.TestCase):
                 return V1DeploymentList(items=[])
 
             return V1DeploymentList(items=["apple", "banana", "cherry"])
-        elif method == "core_v1_api.list_namespace":
-            # Create a list of Kubernetes V1Namespace objects
-            namespaces = [
-                V1Namespace(metadata=V1ObjectMeta(name="default")),
-                V1Namespace(metadata=V1ObjectMeta(name="kube-system")),
-                V1Namespace(metadata=V1ObjectMeta(name="test-namespace")),
-            ]
+        elif method == "core_v1_api.read_namespace":
+            if args[0] not in ("default", "kube-system", "test-namespace"):
+                raise ApiException(status=404)
 
-            return V1NamespaceList(items=namespaces)
+            return V1Namespace(metadata=V1ObjectMeta(name=args[0]))
 
     def test_namespaces(self) -> None:
         # Instantiate K8sPrerequisitesCheckHandler with the mock ModuleHandler
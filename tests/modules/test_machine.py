@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+import dill
+import os
+import tempfile
+from functools import partial
+from threading import Barrier
+from typing import Any, Callable, List
+from unittest import TestCase
+from unittest.mock import patch
+
+from rookify.modules.exception import ModuleException
+from rookify.modules.machine import Machine
+from rookify.modules.machine_snapshot import convert_pickle_file, is_snapshot_file
+
+
+class TestMachine(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pickle_file = os.path.join(self.temp_dir.name, "data.pickle")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _get_machine(self) -> Machine:
+        machine = Machine(self.pickle_file)
+        machine.add_execution_state("ExecutionTest", tags=["progress"])
+
+        return machine
+
+    def _execute_failing(self, machine: Machine) -> None:
+        machine.get_execution_state("Test").progress = [1]
+        machine.get_execution_state("Test").progress = [1, 2]
+
+        raise RuntimeError("pytest")
+
+    def test_journal_replay(self) -> None:
+        machine = self._get_machine()
+        machine._register_states(machine._execution_states)
+        machine._open_journal()
+
+        machine.get_execution_state("Test").progress = [1]
+        machine.get_execution_state("Test").progress = [1, 2]
+
+        # The process is killed before the final snapshot is written
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [1, 2])
+
+    def test_journal_torn_record(self) -> None:
+        machine = self._get_machine()
+        machine._register_states(machine._execution_states)
+        machine._open_journal()
+
+        machine.get_execution_state("Test").progress = [1]
+        machine._journal.close()  # type: ignore
+
+        with open(machine._get_journal_file(), "ab") as file:
+            file.write(b"\x80\x04\x95")
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [1])
+
+    def test_journal_compaction(self) -> None:
+        machine = self._get_machine()
+        machine._register_states(machine._execution_states)
+        machine._open_journal()
+
+        with patch.object(Machine, "JOURNAL_COMPACTION_THRESHOLD", 2):
+            for index in range(5):
+                machine.get_execution_state("Test").progress = list(range(index))
+
+        self.assertEqual(machine._journal.records_count, 1)  # type: ignore
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(
+            machine.get_execution_state_data("Test", "progress"), [0, 1, 2, 3]
+        )
+
+    def test_execute(self) -> None:
+        machine = Machine(self.pickle_file)
+
+        machine.add_execution_state(
+            "ExecutionTest",
+            tags=["progress"],
+            on_enter=partial(self._execute_failing, machine),
+        )
+
+        with self.assertRaises(RuntimeError):
+            machine.execute()
+
+        self.assertEqual(os.path.getsize(machine._get_journal_file()), 0)
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [1, 2])
+
+    def test_snapshot_lazy_sections(self) -> None:
+        machine = self._get_machine()
+        machine._register_states(machine._execution_states)
+        machine._open_journal()
+
+        machine.get_execution_state("Test").progress = [1]
+        machine._close_journal()
+
+        self.assertTrue(is_snapshot_file(self.pickle_file))
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertIn("ExecutionTest", machine._snapshot_sections)
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [1])
+        self.assertNotIn("ExecutionTest", machine._snapshot_sections)
+
+    def test_snapshot_of_pickle_file(self) -> None:
+        with open(self.pickle_file, "wb") as file:
+            dill.Pickler(file).dump({"ExecutionTest": {"progress": [1]}})
+
+        machine = self._get_machine()
+        machine._register_states(machine._execution_states)
+        machine._load_state_data()
+        machine._open_journal()
+
+        self.assertTrue(is_snapshot_file(self.pickle_file))
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [1])
+
+        machine._close_journal()
+
+        snapshot_file = os.path.join(self.temp_dir.name, "converted.snapshot")
+
+        with open(self.pickle_file + ".legacy", "wb") as file:
+            dill.Pickler(file).dump({"ExecutionTest": {"progress": [2]}})
+
+        convert_pickle_file(self.pickle_file + ".legacy", snapshot_file)
+
+        machine = Machine(snapshot_file)
+        machine.add_execution_state("ExecutionTest", tags=["progress"])
+        machine.register_states()
+
+        self.assertEqual(machine.get_execution_state_data("Test", "progress"), [2])
+
+    def _get_machine_with_progress(self) -> Machine:
+        machine = self._get_machine()
+        machine.register_states()
+        machine._write_state_data()
+
+        machine.add_execution_progress("Test", "progress", 1, 2)
+        machine.add_execution_progress("Test", "progress", 2, "osd.3")
+        machine.progress_store.close()
+
+        return machine
+
+    def test_execution_progress(self) -> None:
+        machine = self._get_machine_with_progress()
+
+        self.assertTrue(machine.has_execution_progress("Test", "progress", 2))
+        self.assertFalse(machine.has_execution_progress("Test", "progress", "2"))
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(machine.count_execution_progress("Test", "progress"), 3)
+        self.assertEqual(
+            machine.get_execution_progress("Test", "progress"), [1, 2, "osd.3"]
+        )
+
+    def test_execution_progress_keys(self) -> None:
+        item = {"name": "cephfs-ü", "id": 1}
+
+        machine = self._get_machine_with_progress()
+        machine.add_execution_progress("Test", "progress", item)
+        machine.progress_store.close()
+
+        # Keys do not depend on the JSON backend available
+        with patch("rookify.json_codec.orjson", None):
+            self.assertTrue(
+                machine.has_execution_progress(
+                    "Test", "progress", {"id": 1, "name": "cephfs-ü"}
+                )
+            )
+
+            self.assertEqual(
+                machine.get_execution_progress("Test", "progress")[-1], item
+            )
+
+        machine.progress_store.close()
+
+    def test_execution_progress_of_other_run(self) -> None:
+        self._get_machine_with_progress()
+
+        # The snapshot was removed to start over
+        os.unlink(self.pickle_file)
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertEqual(machine.count_execution_progress("Test", "progress"), 0)
+        machine.progress_store.close()
+
+        # The snapshot belongs to another run than the progress database
+        self._get_machine_with_progress()
+        os.unlink(self.pickle_file)
+
+        self._get_machine()._write_state_data()
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        with self.assertRaises(ModuleException):
+            machine.count_execution_progress("Test", "progress")
+
+    def test_execution_progress_import(self) -> None:
+        with open(self.pickle_file, "wb") as file:
+            dill.Pickler(file).dump({"ExecutionTest": {"progress": [1, 2]}})
+
+        machine = self._get_machine()
+        machine.register_states()
+
+        self.assertTrue(machine.has_execution_progress("Test", "progress", 2))
+
+        machine.add_execution_progress("Test", "progress", 3)
+
+        self.assertEqual(machine.get_execution_progress("Test", "progress"), [1, 2, 3])
+
+    def _get_parallel_machine(
+        self,
+        entered_states: List[str],
+        on_enter_a: Callable[[], Any],
+        on_enter_b: Callable[[], Any],
+        requires_b: List[str],
+    ) -> Machine:
+        machine = Machine(parallelism=2)
+
+        machine.add_preflight_state("PreflightA", on_enter=lambda: None)
+        machine.add_execution_state("ExecutionA", on_enter=on_enter_a)
+        machine.add_execution_state("ExecutionB", on_enter=on_enter_b)
+        machine.add_execution_state(
+            "ExecutionC", on_enter=partial(entered_states.append, "C")
+        )
+
+        machine.add_state_requirements("A", [])
+        machine.add_state_requirements("B", requires_b)
+        machine.add_state_requirements("C", ["A", "B"])
+
+        return machine
+
+    def _enter_parallel(
+        self, entered_states: List[str], name: str, barrier: Barrier
+    ) -> None:
+        barrier.wait()
+        entered_states.append(name)
+
+    def _enter_failing(self) -> None:
+        raise RuntimeError("pytest")
+
+    def test_execute_parallel(self) -> None:
+        barrier = Barrier(2, timeout=5)
+        entered_states: List[str] = []
+
+        # Both states must be entered concurrently to pass the barrier
+        machine = self._get_parallel_machine(
+            entered_states,
+            partial(self._enter_parallel, entered_states, "A", barrier),
+            partial(self._enter_parallel, entered_states, "B", barrier),
+            [],
+        )
+
+        machine.execute()
+
+        self.assertEqual(sorted(entered_states[:2]), ["A", "B"])
+        self.assertEqual(entered_states[2], "C")
+        self.assertEqual(machine.state, "migrated")
+
+    def test_execute_parallel_failing(self) -> None:
+        entered_states: List[str] = []
+
+        machine = self._get_parallel_machine(
+            entered_states,
+            self._enter_failing,
+            partial(entered_states.append, "B"),
+            ["A"],
+        )
+
+        with self.assertRaises(RuntimeError):
+            machine.execute()
+
+        self.assertEqual(entered_states, [])
+
+    def test_execute_preflight_concurrently(self) -> None:
+        barrier = Barrier(2, timeout=5)
+        entered_states: List[str] = []
+
+        machine = Machine()
+
+        machine.add_preflight_state(
+            "PreflightA",
+            on_enter=partial(self._enter_parallel, entered_states, "A", barrier),
+        )
+        machine.add_preflight_state(
+            "PreflightB",
+            on_enter=partial(self._enter_parallel, entered_states, "B", barrier),
+        )
+        machine.add_execution_state(
+            "ExecutionA", on_enter=partial(entered_states.append, "ExecutionA")
+        )
+        machine.add_execution_state(
+            "ExecutionB", on_enter=partial(entered_states.append, "ExecutionB")
+        )
+
+        machine.add_state_requirements("A", [])
+        machine.add_state_requirements("B", [])
+
+        machine.execute()
+
+        self.assertEqual(sorted(entered_states[:2]), ["A", "B"])
+        self.assertEqual(entered_states[2:], ["ExecutionA", "ExecutionB"])
+
+    def test_execute_preflight_failures(self) -> None:
+        entered_states: List[str] = []
+
+        machine = Machine()
+
+        machine.add_preflight_state("PreflightA", on_enter=self._enter_failing)
+        machine.add_preflight_state("PreflightB", on_enter=self._enter_failing)
+        machine.add_preflight_state(
+            "PreflightC", on_enter=partial(entered_states.append, "C")
+        )
+        machine.add_preflight_state(
+            "PreflightD", on_enter=partial(entered_states.append, "D")
+        )
+
+        machine.add_state_requirements("C", [])
+        machine.add_state_requirements("D", ["A", "C"])
+
+        with self.assertRaises(ModuleException) as context:
+            machine.execute(dry_run_mode=True)
+
+        self.assertIn("PreflightA", str(context.exception))
+        self.assertIn("PreflightB", str(context.exception))
+        self.assertEqual(entered_states, ["C"])
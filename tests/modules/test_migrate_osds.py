@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from unittest.mock import MagicMock, Mock
+
+from rookify.modules.migrate_osds.main import MigrateOSDsHandler
+
+
+class TestMigrateOSDsHandler(TestCase):
+    def setUp(self) -> None:
+        self.machine = Mock()
+        self.handler = MigrateOSDsHandler(self.machine, {})
+        self.handler._ssh = MagicMock()
+
+    def test_device_path_of_metadata(self) -> None:
+        self.assertEqual(
+            self.handler._get_osd_device_path_of_metadata(
+                {
+                    "devices": "sdb",
+                    "bluestore_bdev_partition_path": "/dev/mapper/ceph--a--b-osd--block--a--b",
+                }
+            ),
+            "/dev/ceph-a-b/osd-block-a-b",
+        )
+
+        self.assertEqual(
+            self.handler._get_osd_device_path_of_metadata(
+                {"devices": "sdb", "bluestore_bdev_dev_node": "/dev/ceph-a/osd-block-a"}
+            ),
+            "/dev/ceph-a/osd-block-a",
+        )
+
+    def test_device_path_of_ambiguous_metadata(self) -> None:
+        self.assertIsNone(
+            self.handler._get_osd_device_path_of_metadata(
+                {"devices": "sdb", "bluestore_bdev_partition_path": "/dev/dm-0"}
+            )
+        )
+
+        self.assertIsNone(
+            self.handler._get_osd_device_path_of_metadata(
+                {
+                    "devices": "sdb,sdc",
+                    "bluestore_bdev_dev_node": "/dev/ceph-a/osd-block-a",
+                }
+            )
+        )
+
+    def test_devices_of_hosts_without_ssh(self) -> None:
+        self.machine.get_preflight_state.return_value.data = {
+            "node": {"ls": {"osd": {"node-0": [0, 1]}}},
+            "report": {
+                "osd_metadata": [
+                    {
+                        "id": 0,
+                        "devices": "sdb",
+                        "bluestore_bdev_dev_node": "/dev/ceph-a/osd-block-a",
+                    },
+                    {
+                        "id": 1,
+                        "devices": "sdc",
+                        "bluestore_bdev_dev_node": "/dev/ceph-b/osd-block-b",
+                    },
+                ]
+            },
+        }
+
+        self.machine.get_preflight_state.return_value.osd_host_inventories = {}
+        self.handler._ssh.commands_on_hosts.return_value = {}  # type: ignore
+
+        self.assertEqual(
+            self.handler._get_devices_of_hosts(),
+            {"node-0": {0: "/dev/ceph-a/osd-block-a", 1: "/dev/ceph-b/osd-block-b"}},
+        )
+
+        self.handler._ssh.commands_on_hosts.assert_called_once_with({}, retry=True)  # type: ignore
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import invoke
+from typing import Any, List, Optional
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from rookify.modules.ssh import SSH
+
+
+class TestSSH(TestCase):
+    def setUp(self) -> None:
+        self.config = {
+            "private_key": "/dev/null",
+            "hosts": {
+                "node-0": {"address": "127.0.0.1", "user": "pytest"},
+                "node-1": {"address": "127.0.0.2", "user": "pytest"},
+            },
+        }
+
+        self.connections: List[MagicMock] = []
+        self.run_side_effect: Optional[Exception] = None
+
+    def _create_connection(self, *args: Any, **kwargs: Any) -> MagicMock:
+        connection = MagicMock()
+        connection.transport.is_active.return_value = True
+        connection.transport.is_authenticated.return_value = True
+        connection.run.side_effect = self.run_side_effect
+
+        self.connections.append(connection)
+        return connection
+
+    @patch("fabric.Connection")
+    def test_connection_reuse(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH(self.config)
+
+        ssh.command("node-0", "true")
+        ssh.command("node-0", "true")
+        ssh.command("node-1", "true")
+
+        self.assertEqual(len(self.connections), 2)
+        self.assertEqual(
+            ssh.get_statistics(),
+            {
+                "node-0": {"reused": 1, "missed": 1},
+                "node-1": {"reused": 0, "missed": 1},
+            },
+        )
+
+        ssh.close()
+
+        for connection in self.connections:
+            connection.close.assert_called_once()
+
+    @patch("fabric.Connection")
+    def test_shared_session(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+
+        ssh = SSH.get_session(self.config)
+        self.assertIs(SSH.get_session({**self.config}), ssh)
+
+        ssh.command("node-0", "true")
+        SSH.get_session(self.config).command("node-0", "true")
+
+        self.assertEqual(len(self.connections), 1)
+
+        SSH.close_sessions()
+
+        self.connections[0].close.assert_called_once()
+        self.assertIsNot(SSH.get_session(self.config), ssh)
+
+        SSH.close_sessions()
+
+    @patch("fabric.Connection")
+    def test_dead_connection_replaced(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH(self.config)
+
+        ssh.command("node-0", "true")
+        self.connections[0].transport.is_active.return_value = False
+        ssh.command("node-0", "true")
+
+        self.assertEqual(len(self.connections), 2)
+        self.connections[0].close.assert_called_once()
+        self.assertEqual(ssh.get_statistics()["node-0"], {"reused": 0, "missed": 2})
+
+    @patch("fabric.Connection")
+    def test_idle_connection_evicted(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH({**self.config, "connection_idle_timeout": -1})
+
+        ssh.command("node-0", "true")
+        ssh.command("node-0", "true")
+
+        self.assertEqual(len(self.connections), 2)
+        self.connections[0].close.assert_called_once()
+
+    @patch("fabric.Connection")
+    def test_failed_command_evicted(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH({**self.config, "connection_idle_timeout": -1})
+
+        self.run_side_effect = invoke.exceptions.UnexpectedExit(MagicMock())
+
+        with self.assertRaises(invoke.exceptions.UnexpectedExit):
+            ssh.command("node-0", "false")
+
+        self.run_side_effect = None
+        ssh.command("node-0", "true")
+
+        self.assertEqual(len(self.connections), 2)
+        self.connections[0].close.assert_called_once()
+
+    @patch("fabric.Connection")
+    def test_retry(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH(self.config)
+
+        ssh.command("node-0", "true")
+        self.connections[0].run.side_effect = EOFError()
+
+        with self.assertRaises(EOFError):
+            ssh.command("node-0", "sudo systemctl disable --now ceph-osd@0")
+
+        self.assertEqual(len(self.connections), 1)
+
+        ssh.command("node-0", "true")
+        self.connections[1].run.side_effect = EOFError()
+
+        ssh.command("node-0", "true", retry=True)
+
+        self.assertEqual(len(self.connections), 3)
+        self.connections[2].run.assert_called_once_with("true", hide=True)
+
+    @patch("fabric.Connection")
+    def test_commands_on_hosts(self, connection_class: MagicMock) -> None:
+        connection_class.side_effect = self._create_connection
+        ssh = SSH({**self.config, "concurrency": 2})
+
+        results = ssh.commands_on_hosts({"node-0": "true", "node-1": "false"})
+
+        self.assertEqual(set(results.keys()), {"node-0", "node-1"})
+        self.assertEqual(results["node-1"].command, "false")
+        self.assertGreaterEqual(results["node-0"].duration, 0)
+
+        results = ssh.command_on_hosts(["node-0", "unknown"], "true")
+
+        self.assertIsNone(results["unknown"].result)
+        self.assertTrue(results["unknown"].failed)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from unittest import TestCase
+
+from rookify.modules.token_bucket import TokenBucket
+
+
+class TestTokenBucket(TestCase):
+    def test_burst(self) -> None:
+        token_bucket = TokenBucket(10, 5)
+
+        self.assertEqual([token_bucket.acquire() for _ in range(5)], [0.0] * 5)
+        self.assertGreater(token_bucket.acquire(), 0.05)
+
+    def test_rate(self) -> None:
+        token_bucket = TokenBucket(100, 10)
+        started_at = monotonic()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: token_bucket.acquire(), range(30)))
+
+        # 10 burst tokens and 20 refilled ones at 100 per second
+        self.assertGreaterEqual(monotonic() - started_at, 0.19)
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            TokenBucket(0, 1)
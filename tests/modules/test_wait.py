@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from time import monotonic, sleep
+from typing import List
+from unittest import TestCase
+
+from rookify.modules.wait import Wait, WaitTimeoutException
+
+
+class TestWait(TestCase):
+    def setUp(self) -> None:
+        self.intervals: List[float] = []
+        self.wait = Wait(initial_interval=1, max_interval=4, backoff_factor=2)
+
+    def _sleep(self, interval: float) -> None:
+        self.intervals.append(interval)
+        sleep(interval)
+
+    def test_until_backoff(self) -> None:
+        results = iter([None, None, None, None, "converged"])
+
+        self.assertEqual(
+            self.wait.until(
+                "pytest", lambda: next(results), sleep_func=self.intervals.append
+            ),
+            "converged",
+        )
+
+        self.assertEqual(self.intervals, [1, 2, 4, 4])
+        self.assertEqual(list(self.wait.get_statistics().keys()), ["pytest"])
+
+    def test_until_deadline(self) -> None:
+        with self.assertRaises(WaitTimeoutException):
+            self.wait.until(
+                "pytest",
+                lambda: False,
+                deadline=monotonic() + 0.2,
+                sleep_func=self._sleep,
+            )
+
+        self.assertTrue(len(self.intervals) > 0)
+        self.assertTrue(all(interval <= 0.2 for interval in self.intervals))
+        self.assertEqual(self.wait.get_statistics(), {})
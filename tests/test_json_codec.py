@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from rookify import json_codec
+
+
+class TestJSONCodec(TestCase):
+    def test_loads(self) -> None:
+        self.assertEqual(json_codec.loads(b'{"epoch": 1}'), {"epoch": 1})
+        self.assertEqual(json_codec.loads('{"epoch": 1}'), {"epoch": 1})
+
+        # Values the stdlib accepts beyond the orjson feature set
+        self.assertEqual(json_codec.loads("[{0:d}]".format(2**70)), [2**70])
+
+        with self.assertRaises(ValueError):
+            json_codec.loads(b"{")
+
+    def test_dumps(self) -> None:
+        self.assertEqual(json.loads(json_codec.dumps({"epoch": 1})), {"epoch": 1})
+        self.assertEqual(json.loads(json_codec.dumps([2**70])), [2**70])
+
+    def test_dumps_readable(self) -> None:
+        self.assertEqual(
+            json_codec.dumps({"b": object, 1: True}, readable=True),
+            json.dumps({"b": repr(object), "1": True}, sort_keys=True, indent=2),
+        )
+
+    def test_dumps_readable_stdlib(self) -> None:
+        with patch.object(json_codec, "orjson", None):
+            self.assertEqual(
+                json_codec.dumps({"b": object, 1: True, None: [{2: 3}]}, readable=True),
+                json.dumps(
+                    {"b": repr(object), "1": True, "null": [{"2": 3}]},
+                    sort_keys=True,
+                    indent=2,
+                ),
+            )
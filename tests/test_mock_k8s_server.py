@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import kubernetes
+import os
+import tempfile
+from unittest import TestCase
+
+from rookify.modules.k8s import K8s
+from .mock_k8s_server import MockK8sServer, get_node_manifest
+
+
+class TestMockK8sServer(TestCase):
+    def setUp(self) -> None:
+        self.k8s_server = MockK8sServer()
+        self.k8s_server.create_objects(
+            "v1", "nodes", [get_node_manifest("node-{0:d}".format(i)) for i in range(5)]
+        )
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        kubeconfig = os.path.join(self.temp_dir.name, "kubeconfig")
+        self.k8s_server.write_kubeconfig(kubeconfig)
+
+        self.k8s = K8s(
+            {
+                "kubernetes": {
+                    "config": kubeconfig,
+                    "discovery_cache_file": os.path.join(
+                        self.temp_dir.name, "discovery.json"
+                    ),
+                    "list_page_limit": 2,
+                },
+                "rook": {"cluster": {"name": "rook-ceph", "namespace": "rook-ceph"}},
+            }
+        )
+
+    def tearDown(self) -> None:
+        self.k8s.stop_informers()
+        self.k8s_server.close()
+        self.temp_dir.cleanup()
+
+    def test_self(self) -> None:
+        self.assertEqual(len(self.k8s.nodes_informer.list()), 5)
+        self.assertEqual(self.k8s_server.request_counts["list"], 3)
+
+        results = self.k8s.label_nodes(["node-0", "node-1", "node-9"], "pytest")
+
+        self.assertFalse(results["node-0"].failed)
+        self.assertFalse(results["node-1"].failed)
+        self.assertTrue(results["node-9"].failed)
+        self.assertEqual(len(self.k8s.nodes_informer.list("pytest", "true")), 2)
+
+        self.k8s.crd_api_apply(
+            {
+                "apiVersion": "ceph.rook.io/v1",
+                "kind": "CephBlockPool",
+                "metadata": {"name": "pool", "namespace": "rook-ceph"},
+                "spec": {"replicated": {"size": 3}},
+            }
+        )
+
+        self.assertEqual(
+            self.k8s_server.get_object(
+                "ceph.rook.io/v1", "cephblockpools", "pool", "rook-ceph"
+            )["spec"],
+            {"replicated": {"size": 3}},
+        )
+
+    def test_rook_daemon_pods(self) -> None:
+        self.k8s_server.create_objects(
+            "v1",
+            "pods",
+            [
+                {
+                    "apiVersion": "v1",
+                    "kind": "Pod",
+                    "metadata": {
+                        "name": name,
+                        "namespace": "rook-ceph",
+                        "labels": {"app": app},
+                    },
+                    "spec": {"containers": []},
+                }
+                for name, app in (
+                    ("rook-ceph-mon-a", "rook-ceph-mon"),
+                    ("rook-ceph-operator", "rook-ceph-operator"),
+                    ("rook-ceph-osd-0", "rook-ceph-osd"),
+                )
+            ],
+        )
+
+        self.assertEqual(
+            sorted(pod.metadata.name for pod in self.k8s.get_rook_pods()),
+            ["rook-ceph-mon-a", "rook-ceph-osd-0"],
+        )
+
+    def test_watch(self) -> None:
+        self.k8s_server.delete_object("v1", "nodes", "node-0")
+
+        watcher = kubernetes.watch.Watch()
+
+        events = [
+            (event["type"], event["object"].metadata.name)
+            for event in watcher.stream(
+                self.k8s.core_v1_api.list_node,
+                resource_version="5",
+                timeout_seconds=1,
+            )
+        ]
+
+        self.assertEqual(events, [("DELETED", "node-0")])
+
+        self.k8s_server.expire_events()
+
+        with self.assertRaises(kubernetes.client.exceptions.ApiException) as context:
+            for _ in watcher.stream(
+                self.k8s.core_v1_api.list_node,
+                resource_version="5",
+                timeout_seconds=1,
+            ):
+                pass
+
+        self.assertEqual(context.exception.status, 410)